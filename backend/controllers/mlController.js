@@ -1,38 +1,38 @@
 import axios from "axios";
-import SkinIssue from "../models/SkinIssue.js";
 
 export const predictDisease = async (req, res) => {
   try {
-    // 1. Call Python ML API
+    // Python ML API returns the diagnosis together with the recommended
+    // doctors (served from its in-memory copy of the SkinIssue data)
     const mlResponse = await axios.post(
-      "http://127.0.0.1:8000/predict",
-      req.body
+      "http://127.0.0.1:8000/predict_and_recommend",
+      req.body,
+      { params: { doctor_location: req.query.location } }
     );
 
-    const disease = mlResponse.data.predicted_disease;
-    const diseaseLower = disease.toLowerCase();  // acne, eczema etc
+    const { predicted_disease, condition, doctors } = mlResponse.data;
 
-    // 2. Find matching disease in MongoDB
-    const skinData = await SkinIssue.findOne({
-      name: diseaseLower
-    });
-
-    // 3. If no doctors found
-    if (!skinData) {
+    // No doctors found
+    if (!condition) {
       return res.json({
-        predictedDisease: disease,
+        predictedDisease: predicted_disease,
         doctors: []
       });
     }
 
-    // 4. Send disease + doctors
+    // Send disease + doctors
     res.json({
-      predictedDisease: disease,
-      condition: skinData.condition,
-      doctors: skinData.doctors
+      predictedDisease: predicted_disease,
+      condition,
+      doctors
     });
 
   } catch (error) {
+    // Invalid input: pass the field errors through instead of a 500
+    const status = error.response?.status;
+    if (status >= 400 && status < 500) {
+      return res.status(status).json(error.response.data);
+    }
     console.error("ML Service Error:", error.message);
     res.status(500).json({ message: "ML Service Error", error: error.message });
   }
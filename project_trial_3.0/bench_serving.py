@@ -0,0 +1,161 @@
+"""
+Local scaling benchmark for serve.py.
+
+For each worker count it starts `python serve.py --workers N`, drives /predict
+from several client processes for a fixed duration, and reports requests/sec,
+latency percentiles and the memory of every worker: RSS, plus PSS, which
+splits shared pages between the processes that map them. PSS per worker is
+the number to watch. It should stay far below the single-process RSS when the
+artifacts are shared.
+
+Usage:
+    python bench_serving.py [--workers 1 2 4] [--clients 8] [--duration 10]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def _load_payloads(path, n=500):
+    import csv
+    with open(path) as f:
+        rows = list(csv.DictReader(f))[:n]
+    for row in rows:
+        row.pop('disease', None)
+        for key, value in row.items():
+            if value.isdigit():
+                row[key] = int(value)
+    return [json.dumps(row).encode() for row in rows]
+
+
+def _post(url, body):
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        response.read()
+
+
+def _client(url, payloads, duration, offset):
+    """Send requests back-to-back for `duration` seconds; return latencies (ms)."""
+    latencies = []
+    deadline = time.perf_counter() + duration
+    i = offset
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        _post(url, payloads[i % len(payloads)])
+        latencies.append((time.perf_counter() - start) * 1000)
+        i += 1
+    return latencies
+
+
+def _children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def _memory_kb(pid):
+    """(RSS, PSS) of a process in kB, from /proc."""
+    rss = pss = 0
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                rss = int(line.split()[1])
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    pss = int(line.split()[1])
+    except OSError:
+        pss = rss
+    return rss, pss
+
+
+def _wait_ready(base_url, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(base_url + '/health', timeout=2):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+def run_one(n_workers, args, payloads):
+    port = args.port
+    base_url = f'http://127.0.0.1:{port}'
+    server = subprocess.Popen(
+        [sys.executable, 'serve.py', '--workers', str(n_workers), '--port', str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        _wait_ready(base_url)
+        with ProcessPoolExecutor(args.clients) as pool:
+            # Warm up every worker before measuring
+            list(pool.map(_client, [base_url + '/predict'] * args.clients,
+                          [payloads] * args.clients, [1.0] * args.clients,
+                          range(args.clients)))
+            start = time.perf_counter()
+            results = list(pool.map(_client, [base_url + '/predict'] * args.clients,
+                                    [payloads] * args.clients, [args.duration] * args.clients,
+                                    range(args.clients)))
+            elapsed = time.perf_counter() - start
+
+        latencies = np.concatenate([np.asarray(r) for r in results])
+        memory = [_memory_kb(pid) for pid in _children(server.pid)]
+        rss = [m[0] / 1024 for m in memory]
+        pss = [m[1] / 1024 for m in memory]
+        return {
+            'workers': n_workers,
+            'requests': int(len(latencies)),
+            'requests_per_sec': len(latencies) / elapsed,
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p99_ms': float(np.percentile(latencies, 99)),
+            'rss_mb_per_worker': float(np.mean(rss)) if rss else None,
+            'pss_mb_per_worker': float(np.mean(pss)) if pss else None,
+            'pss_mb_total': float(np.sum(pss) + _memory_kb(server.pid)[1] / 1024),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark serve.py scaling across workers")
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--data', default='skin_disease_dataset.csv')
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    payloads = _load_payloads(args.data)
+    rows = []
+    print(f"{'workers':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'RSS/worker':>11} {'PSS/worker':>11} {'PSS total':>10}")
+    for n in args.workers:
+        row = run_one(n, args, payloads)
+        rows.append(row)
+        print(f"{row['workers']:>7} {row['requests_per_sec']:>9.1f} {row['p50_ms']:>8.2f} "
+              f"{row['p99_ms']:>8.2f} {row['rss_mb_per_worker']:>9.1f}MB "
+              f"{row['pss_mb_per_worker']:>9.1f}MB {row['pss_mb_total']:>8.1f}MB", flush=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,442 @@
+"""
+Reproducible benchmark suite for the skin disease model.
+
+Sections (run all, or pick some with --only):
+
+    preprocess  SkinDiseaseMLModel._preprocess latency per case
+    predict     single-row predict / predict_with_confidence latency and
+                predict_batch / predict_batch_with_confidence at several
+                batch sizes
+    http        /predict throughput and latency percentiles under concurrent
+                load (serve.py started locally, clients in separate processes)
+    metrics     cost of the per-stage instrumentation (metrics.py): single-row
+                and batch predictions with and without a Metrics recorder
+    drift       cost of the drift monitor (drift_monitor.py), measured the
+                same way with and without a DriftMonitor
+    early_exit  predict_early_exit against full evaluation on --data: latency,
+                trees evaluated and label agreement, without a budget and for
+                every --budgets-ms value
+    explain     cost of per-prediction feature contributions: single-row
+                predict_with_confidence with and without explain (cache
+                bypassed), and the tree engine alone at 1 and 128 rows
+    training    fit and predict time of every model.py candidate
+
+Requests are drawn from generate_dataset's DISEASES spec with a skewed
+class mix (--imbalance-ratio). Cases are then sampled from a fixed pool with
+Zipf-distributed popularity (--zipf), so some cases repeat the way real
+traffic does. Everything is seeded (--seed).
+
+Results are written as JSON (--output). With --baseline, every metric is
+compared to a stored run and the exit code is 1 if any metric got worse by
+more than --tolerance. --save-baseline stores the current run as the new
+baseline.
+
+Usage:
+    python bench_suite.py [--only preprocess predict http metrics drift early_exit explain training]
+                          [--output bench_results.json] [--baseline bench_baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+SECTIONS = ['preprocess', 'predict', 'http', 'metrics', 'drift', 'early_exit', 'explain', 'training']
+BATCH_SIZES = [1, 16, 128, 1024]
+
+
+# ============================================================================
+# WORKLOAD
+# ============================================================================
+
+def make_workload(n, seed=42, imbalance_ratio=5.0, zipf=1.1, pool_size=2000):
+    """
+    Skewed request stream generated from the DISEASES spec.
+
+    Args:
+        n (int): Number of requests
+        seed (int): Seed for the case pool and the request order
+        imbalance_ratio (float): Most / least frequent disease ratio
+        zipf (float): Zipf exponent of case popularity (0 = uniform)
+        pool_size (int): Number of distinct cases
+
+    Returns:
+        list: Feature dicts (may contain repeats)
+    """
+    from generate_dataset import compile_spec, class_weights, generate_chunk, COLUMNS
+
+    spec = compile_spec()
+    chunk = generate_chunk(pool_size, seed, spec, class_weights(spec, imbalance_ratio))
+    pool = []
+    for i in range(pool_size):
+        case = {}
+        for column in COLUMNS[1:]:
+            value = chunk[column][i]
+            case[column] = spec['vocab'][column][value] if column in spec['vocab'] else int(value)
+        pool.append(case)
+
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, pool_size + 1) ** zipf
+    picks = rng.choice(pool_size, size=n, p=weights / weights.sum())
+    return [pool[i] for i in picks]
+
+
+def _percentiles(samples, unit_scale, prefix, unit):
+    samples = np.asarray(samples) * unit_scale
+    return {
+        f'{prefix}.p50_{unit}': _metric(np.percentile(samples, 50), unit),
+        f'{prefix}.p99_{unit}': _metric(np.percentile(samples, 99), unit),
+        f'{prefix}.mean_{unit}': _metric(samples.mean(), unit),
+    }
+
+
+def _metric(value, unit, better='lower'):
+    return {'value': float(value), 'unit': unit, 'better': better}
+
+
+def _time_each(fn, items):
+    timings = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+# ============================================================================
+# SECTIONS
+# ============================================================================
+
+def bench_preprocess(model, workload, args):
+    for case in workload[:200]:
+        model._preprocess(case)
+    return _percentiles(_time_each(model._preprocess, workload), 1e6, 'preprocess', 'us')
+
+
+def bench_predict(model, workload, args):
+    results = {}
+    # Single-row calls go through the cache when it is enabled, like the API
+    results.update(_percentiles(_time_each(lambda c: model.predict(**c), workload),
+                                1e3, 'predict.single', 'ms'))
+    results.update(_percentiles(_time_each(lambda c: model.predict_with_confidence(**c), workload),
+                                1e3, 'predict_with_confidence.single', 'ms'))
+
+    for size in BATCH_SIZES:
+        batches = [workload[i:i + size] for i in range(0, len(workload), size)]
+        batches = [b for b in batches if len(b) == size][:max(3, args.requests // size)]
+        if not batches:
+            continue
+        for name, fn in (('predict_batch', model.predict_batch),
+                         ('predict_batch_with_confidence', model.predict_batch_with_confidence)):
+            timings = _time_each(fn, batches)
+            results[f'{name}.{size}.p50_ms'] = _metric(np.percentile(timings, 50) * 1e3, 'ms')
+            results[f'{name}.{size}.rows_per_sec'] = _metric(
+                size * len(timings) / sum(timings), 'rows/s', 'higher')
+    return results
+
+
+def bench_http(model, workload, args):
+    from bench_serving import _client, _wait_ready
+
+    payloads = [json.dumps(case).encode() for case in workload]
+    base_url = f'http://127.0.0.1:{args.port}'
+    server = subprocess.Popen(
+        [sys.executable, 'serve.py', '--workers', str(args.http_workers), '--port', str(args.port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        _wait_ready(base_url)
+        urls = [base_url + '/predict'] * args.clients
+        with ProcessPoolExecutor(args.clients) as pool:
+            list(pool.map(_client, urls, [payloads] * args.clients,
+                          [1.0] * args.clients, range(args.clients)))
+            start = time.perf_counter()
+            latencies = list(pool.map(_client, urls, [payloads] * args.clients,
+                                      [args.duration] * args.clients,
+                                      [i * 997 for i in range(args.clients)]))
+            elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = np.concatenate([np.asarray(l) for l in latencies])
+    return {
+        'http.requests_per_sec': _metric(len(latencies) / elapsed, 'req/s', 'higher'),
+        'http.p50_ms': _metric(np.percentile(latencies, 50), 'ms'),
+        'http.p95_ms': _metric(np.percentile(latencies, 95), 'ms'),
+        'http.p99_ms': _metric(np.percentile(latencies, 99), 'ms'),
+    }
+
+
+def bench_metrics(model, workload, args):
+    from metrics import Metrics
+
+    saved = model.metrics
+    batches = [workload[i:i + 128] for i in range(0, len(workload) - 127, 128)]
+    timings = {}
+    try:
+        # Alternate the two configurations so drift affects both equally
+        for _ in range(3):
+            for label, recorder in (('off', None), ('on', Metrics())):
+                model.metrics = recorder
+                single = _time_each(lambda c: model.predict(**c), workload)
+                batch = _time_each(model.predict_batch, batches)
+                timings.setdefault(label, ([], []))
+                timings[label][0].append(np.median(single))
+                timings[label][1].append(np.median(batch))
+    finally:
+        model.metrics = saved
+
+    off_single, off_batch = (min(t) for t in timings['off'])
+    on_single, on_batch = (min(t) for t in timings['on'])
+    return {
+        'metrics.single.overhead_us': _metric((on_single - off_single) * 1e6, 'us'),
+        'metrics.single.overhead_pct': _metric((on_single / off_single - 1) * 100, '%'),
+        'metrics.batch_128.overhead_us': _metric((on_batch - off_batch) * 1e6, 'us'),
+        'metrics.batch_128.overhead_pct': _metric((on_batch / off_batch - 1) * 100, '%'),
+    }
+
+
+def bench_drift(model, workload, args):
+    from drift_monitor import DriftMonitor, build_reference
+
+    # Any profile with the model's schema will do for timing the counting
+    X, _, _ = model._preprocess_batch(workload)
+    reference = build_reference(X, model.model.predict(X), model.feature_names,
+                                model.label_encoders, model.disease_encoder)
+    saved = model._monitor
+    batches = [workload[i:i + 128] for i in range(0, len(workload) - 127, 128)]
+    timings = {}
+    try:
+        for _ in range(3):
+            for label, monitor in (('off', None), ('on', DriftMonitor(reference))):
+                model._monitor = monitor
+                single = _time_each(lambda c: model.predict(**c), workload)
+                batch = _time_each(model.predict_batch, batches)
+                timings.setdefault(label, ([], []))
+                timings[label][0].append(np.median(single))
+                timings[label][1].append(np.median(batch))
+    finally:
+        model._monitor = saved
+
+    off_single, off_batch = (min(t) for t in timings['off'])
+    on_single, on_batch = (min(t) for t in timings['on'])
+    return {
+        'drift.single.overhead_us': _metric((on_single - off_single) * 1e6, 'us'),
+        'drift.single.overhead_pct': _metric((on_single / off_single - 1) * 100, '%'),
+        'drift.batch_128.overhead_us': _metric((on_batch - off_batch) * 1e6, 'us'),
+        'drift.batch_128.overhead_pct': _metric((on_batch / off_batch - 1) * 100, '%'),
+    }
+
+
+def bench_early_exit(model, workload, args):
+    import csv
+
+    with open(args.data) as f:
+        rows = list(csv.DictReader(f))
+    rng = np.random.default_rng(args.seed)
+    cases = []
+    for i in rng.permutation(len(rows))[:args.requests]:
+        case = {name: rows[i][name] for name in model.feature_names}
+        for name, _ in model._numeric_features:
+            case[name] = int(case[name])
+        cases.append(case)
+
+    # The same engine with every tree evaluated is the reference
+    full = [model.predict_early_exit(block_size=10 ** 9, **c) for c in cases]
+    expected = [r['disease'] for r in full]
+    results = _percentiles(
+        _time_each(lambda c: model.predict_early_exit(block_size=10 ** 9, **c), cases),
+        1e3, 'early_exit.full', 'ms')
+
+    for budget in [None] + args.budgets_ms:
+        label = 'exact' if budget is None else f'budget_{budget:g}ms'
+        outputs = []
+        timings = _time_each(
+            lambda c: outputs.append(model.predict_early_exit(budget_ms=budget, **c)), cases)
+        results.update(_percentiles(timings, 1e3, f'early_exit.{label}', 'ms'))
+        results[f'early_exit.{label}.trees_evaluated'] = _metric(
+            np.mean([r['trees_evaluated'] for r in outputs]), 'trees')
+        results[f'early_exit.{label}.exact_pct'] = _metric(
+            100 * np.mean([r['exact'] for r in outputs]), '%', 'higher')
+        results[f'early_exit.{label}.agreement_pct'] = _metric(
+            100 * np.mean([r['disease'] == e for r, e in zip(outputs, expected)]), '%', 'higher')
+    return results
+
+
+def bench_explain(model, workload, args):
+    saved = model.cache
+    model.cache = None  # explained predictions never use the cache
+    try:
+        plain = _time_each(lambda c: model.predict_with_confidence(**c), workload)
+        explained = _time_each(lambda c: model.predict_with_confidence(explain=5, **c), workload)
+    finally:
+        model.cache = saved
+    results = {}
+    results.update(_percentiles(plain, 1e3, 'explain.predict_with_confidence', 'ms'))
+    results.update(_percentiles(explained, 1e3, 'explain.predict_with_confidence_explained', 'ms'))
+    results['explain.single.overhead_ms'] = _metric(
+        (np.median(explained) - np.median(plain)) * 1e3, 'ms')
+
+    # The extra pass over the visited nodes, on the engine alone
+    engine = model._engine()
+    for size in (1, 128):
+        batches = [model._preprocess_batch(workload[i:i + size])[0]
+                   for i in range(0, min(len(workload), 100 * size), size)]
+        base = np.median(_time_each(engine.predict_proba, batches))
+        with_contributions = np.median(_time_each(engine.predict_proba_with_contributions, batches))
+        results[f'explain.engine_{size}.overhead_ms'] = _metric((with_contributions - base) * 1e3, 'ms')
+        results[f'explain.engine_{size}.overhead_pct'] = _metric(
+            (with_contributions / base - 1) * 100, '%')
+    return results
+
+
+def bench_training(model, workload, args):
+    from sklearn.model_selection import train_test_split
+    from model import build_models, load_dataset, _for_job
+
+    X, y, _, _ = load_dataset(args.data)
+    X_train, X_test, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    results = {}
+    for name, estimator in build_models().items():
+        if args.candidates and name not in args.candidates:
+            continue
+        estimator = _for_job(estimator, fold=None)
+        start = time.perf_counter()
+        estimator.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        estimator.predict_proba(X_test)
+        predict_seconds = time.perf_counter() - start
+        key = name.lower().replace(' ', '_')
+        results[f'training.{key}.fit_s'] = _metric(fit_seconds, 's')
+        results[f'training.{key}.predict_proba_test_s'] = _metric(predict_seconds, 's')
+        print(f"  {name}: fit {fit_seconds:.2f}s", flush=True)
+    return results
+
+
+RUNNERS = {
+    'preprocess': bench_preprocess,
+    'predict': bench_predict,
+    'http': bench_http,
+    'metrics': bench_metrics,
+    'drift': bench_drift,
+    'early_exit': bench_early_exit,
+    'explain': bench_explain,
+    'training': bench_training,
+}
+
+
+# ============================================================================
+# BASELINE COMPARISON
+# ============================================================================
+
+def compare(results, baseline, tolerance):
+    """
+    Compare metrics with a baseline run.
+
+    Returns:
+        list: (name, baseline value, current value, relative change) of every
+        metric that got worse by more than tolerance
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None or not base['value']:
+            continue
+        change = (current['value'] - base['value']) / base['value']
+        worse = change > tolerance if current['better'] == 'lower' else change < -tolerance
+        if worse:
+            regressions.append((name, base['value'], current['value'], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark preprocessing, inference, HTTP and training")
+    parser.add_argument('--only', nargs='+', choices=SECTIONS, default=SECTIONS)
+    parser.add_argument('--requests', type=int, default=2000, help="Requests per latency section")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--imbalance-ratio', type=float, default=5.0)
+    parser.add_argument('--zipf', type=float, default=1.1)
+    parser.add_argument('--cache-size', type=int, default=4096,
+                        help="Prediction cache size of the in-process model (0 disables)")
+    parser.add_argument('--bundle', default=None, help="Benchmark a model bundle instead of the pickles")
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--http-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--data', default='skin_disease_dataset.csv')
+    parser.add_argument('--budgets-ms', type=float, nargs='*', default=[0.25, 0.5, 1.0],
+                        help="Time budgets of the early_exit section")
+    parser.add_argument('--candidates', nargs='*', default=None,
+                        help="Training candidates to time (default: all)")
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--baseline', default=None)
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Allowed relative slowdown before a metric counts as a regression")
+    parser.add_argument('--save-baseline', default=None, help="Also write the results here")
+    args = parser.parse_args(argv)
+
+    from predictor import SkinDiseaseMLModel
+    import sklearn
+
+    workload = make_workload(args.requests, args.seed, args.imbalance_ratio, args.zipf)
+    model = SkinDiseaseMLModel(cache_size=args.cache_size, bundle_path=args.bundle)
+
+    results = {}
+    for section in SECTIONS:
+        if section not in args.only:
+            continue
+        print(f"Running {section}...", flush=True)
+        started = time.perf_counter()
+        results.update(RUNNERS[section](model, workload, args))
+        print(f"  done in {time.perf_counter() - started:.1f}s", flush=True)
+
+    report = {
+        'meta': {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__,
+            'cpu_count': os.cpu_count(),
+            'model_version': model.version,
+            'sections': [s for s in SECTIONS if s in args.only],
+            'workload': {'requests': args.requests, 'seed': args.seed,
+                         'imbalance_ratio': args.imbalance_ratio, 'zipf': args.zipf,
+                         'cache_size': args.cache_size},
+        },
+        'results': results,
+    }
+
+    width = max(len(name) for name in results) if results else 0
+    print()
+    for name, metric in results.items():
+        print(f"{name:<{width}}  {metric['value']:>12.3f} {metric['unit']}")
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to '{path}'")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['meta'].get('workload') != report['meta']['workload']:
+            print("Warning: the baseline used a different workload; comparisons may not be meaningful")
+        regressions = compare(results, baseline['results'], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for name, before, after, change in regressions:
+                print(f"  {name}: {before:.3f} -> {after:.3f} ({change:+.0%})")
+            return 1
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against '{args.baseline}'")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
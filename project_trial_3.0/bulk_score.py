@@ -0,0 +1,291 @@
+"""
+Bulk scoring of large case files (CSV or JSONL) with SkinDiseaseMLModel.
+
+The input is read as raw chunks of --chunk-size lines (one case per line).
+Parsing, vectorized preprocessing and inference run in a process pool where
+every worker loads the model once. Results are written in input order as
+soon as each chunk is done:
+
+    row,predicted_disease,confidence,error
+
+(or one JSON object per line for a .jsonl output). At most 2 x --workers
+chunks are in flight, so memory does not grow with the input size. Lines
+are parsed one by one: a malformed line (bad JSON, wrong CSV field count)
+becomes an error record for its row and the rest of the chunk is scored.
+
+After each chunk is written and flushed, a checkpoint records the input and
+output byte offsets. --resume truncates the output to the last committed
+chunk and continues from there. A resume is refused if the input file or
+the model version changed.
+
+Usage:
+    python bulk_score.py cases.csv predictions.csv [--workers N] [--chunk-size 50000]
+                         [--bundle model_bundle] [--resume]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+CHECKPOINT_VERSION = 1
+OUTPUT_FIELDS = ['row', 'predicted_disease', 'confidence', 'error']
+
+_model = None
+
+
+def _init_worker(model_kwargs):
+    global _model
+    from predictor import SkinDiseaseMLModel
+
+    _model = SkinDiseaseMLModel(**model_kwargs)
+
+
+def _parse(text, header, input_format):
+    """
+    Parse raw lines one by one, so a malformed line only fails its own row.
+
+    Returns:
+        tuple: (predictor input for the lines that parsed (columnar for CSV),
+        their line indices, errors mapping line index -> message)
+    """
+    lines = text.splitlines()
+    rows, valid, errors = [], [], {}
+    if input_format == 'csv':
+        names = next(csv.reader([header]))
+        # Fast path: the whole chunk at once, if every line is one
+        # well-formed row (a quote left open would swallow the next lines)
+        reader = csv.reader(lines, strict=True)
+        try:
+            rows = list(reader)
+        except csv.Error:
+            rows = []
+        if len(rows) == len(lines) == reader.line_num and \
+                all(len(fields) == len(names) for fields in rows):
+            columns = [list(column) for column in zip(*rows)] if rows else [[] for _ in names]
+            return dict(zip(names, columns)), list(range(len(lines))), errors
+        rows = []
+        for i, line in enumerate(lines):
+            try:
+                fields = next(csv.reader((line,), strict=True))
+            except csv.Error as e:
+                errors[i] = f"malformed CSV line: {e}"
+                continue
+            if len(fields) != len(names):
+                errors[i] = f"malformed CSV line: expected {len(names)} fields, got {len(fields)}"
+                continue
+            rows.append(fields)
+            valid.append(i)
+        columns = [list(column) for column in zip(*rows)] if rows else [[] for _ in names]
+        return dict(zip(names, columns)), valid, errors
+    for i, line in enumerate(lines):
+        try:
+            rows.append(json.loads(line))
+            valid.append(i)
+        except ValueError as e:
+            errors[i] = f"invalid JSON: {e}"
+    return rows, valid, errors
+
+
+def score_chunk(first_row, text, header, input_format, output_format):
+    """
+    Score one raw chunk in a worker.
+
+    Returns:
+        tuple: (output text, rows, errors)
+    """
+    records, valid, parse_errors = _parse(text, header, input_format)
+    predictions, confidences, errors = _model.predict_batch_with_confidence(records)
+    if parse_errors:
+        # Back to line positions, with the unparsed lines as errors
+        n = len(valid) + len(parse_errors)
+        all_predictions, all_confidences = [None] * n, np.full(n, np.nan)
+        all_errors = dict(parse_errors)
+        for j, i in enumerate(valid):
+            all_predictions[i], all_confidences[i] = predictions[j], confidences[j]
+            if j in errors:
+                all_errors[i] = errors[j]
+        predictions, confidences, errors = all_predictions, all_confidences, all_errors
+
+    out = io.StringIO()
+    for i, (disease, confidence) in enumerate(zip(predictions, confidences)):
+        error = errors.get(i)
+        if output_format == 'jsonl':
+            record = {'row': first_row + i, 'predicted_disease': disease,
+                      'confidence': None if error else round(float(confidence), 6),
+                      'error': error}
+            out.write(json.dumps(record) + '\n')
+        elif error:
+            out.write(f"{first_row + i},,,\"{error.replace(chr(34), chr(39))}\"\n")
+        else:
+            out.write(f"{first_row + i},{disease},{confidence:.6f},\n")
+    return out.getvalue(), len(predictions), len(errors)
+
+
+def _read_chunks(f, chunk_size):
+    """Yield raw text chunks of chunk_size lines and the offset after each."""
+    while True:
+        lines = []
+        for _ in range(chunk_size):
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                lines.append(line.decode())
+        if not lines:
+            return
+        yield ''.join(lines), len(lines), f.tell()
+
+
+class _Checkpoint:
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        return state if state.get('version') == CHECKPOINT_VERSION else None
+
+    def save(self, state):
+        from tree_engine import write_atomic
+
+        state = {'version': CHECKPOINT_VERSION, **state}
+        write_atomic(self.path, lambda f: f.write(json.dumps(state, indent=2).encode()))
+
+
+def bulk_score(input_path, output_path, model_kwargs, workers=1, chunk_size=50_000,
+               resume=False, checkpoint_path=None, progress_every=1.0):
+    """
+    Score every case in input_path and write the results to output_path.
+
+    Args:
+        input_path (str): .csv (header row) or .jsonl input
+        output_path (str): .csv or .jsonl output
+        model_kwargs (dict): SkinDiseaseMLModel arguments for every worker
+        workers (int): Scoring processes (1 scores in this process)
+        chunk_size (int): Lines per chunk
+        resume (bool): Continue from the checkpoint instead of starting over
+        checkpoint_path (str, optional): Default: output_path + '.checkpoint.json'
+        progress_every (float): Seconds between progress lines
+
+    Returns:
+        dict: Rows, errors, seconds and rows/sec of this run
+    """
+    from predictor import SkinDiseaseMLModel
+
+    input_format = 'jsonl' if input_path.endswith(('.jsonl', '.ndjson')) else 'csv'
+    output_format = 'jsonl' if output_path.endswith(('.jsonl', '.ndjson')) else 'csv'
+    checkpoint = _Checkpoint(checkpoint_path or output_path + '.checkpoint.json')
+    stat = os.stat(input_path)
+    source = {'input': os.path.abspath(input_path), 'input_bytes': stat.st_size,
+              'input_mtime_ns': stat.st_mtime_ns, 'chunk_size': chunk_size}
+
+    # Loaded here too: validates the artifacts and pins the version before forking
+    version = SkinDiseaseMLModel(**model_kwargs).version
+    state = checkpoint.load() if resume else None
+    if state is not None:
+        if state['source'] != source:
+            raise ValueError("The input file or chunk size changed since the checkpoint; "
+                             "rerun without --resume")
+        if state['model_version'] != version:
+            raise ValueError(f"The checkpoint was written with model version "
+                             f"{state['model_version']}, the current model is {version}; "
+                             f"rerun without --resume")
+        print(f"Resuming after row {state['rows']:,}")
+    else:
+        state = {'source': source, 'model_version': version, 'input_offset': 0,
+                 'output_offset': 0, 'rows': 0, 'errors': 0, 'chunks': 0}
+
+    started = time.perf_counter()
+    start_rows = state['rows']
+    last_report = started
+    with open(input_path, 'rb') as f_in, open(output_path, 'a+b') as f_out:
+        header = ''
+        if input_format == 'csv':
+            header = f_in.readline().decode()
+        if state['input_offset']:
+            f_in.seek(state['input_offset'])
+        f_out.truncate(state['output_offset'])
+        f_out.seek(state['output_offset'])
+        if state['output_offset'] == 0 and output_format == 'csv':
+            f_out.write((','.join(OUTPUT_FIELDS) + '\n').encode())
+
+        def commit(result, input_offset):
+            nonlocal last_report
+            text, n_rows, n_errors = result
+            f_out.write(text.encode())
+            f_out.flush()
+            os.fsync(f_out.fileno())
+            state.update(input_offset=input_offset, output_offset=f_out.tell(),
+                         rows=state['rows'] + n_rows, errors=state['errors'] + n_errors,
+                         chunks=state['chunks'] + 1)
+            checkpoint.save(state)
+            now = time.perf_counter()
+            if now - last_report >= progress_every:
+                last_report = now
+                rate = (state['rows'] - start_rows) / (now - started)
+                print(f"  {state['rows']:,} rows ({input_offset / max(stat.st_size, 1):.0%}), "
+                      f"{rate:,.0f} rows/s, {state['errors']:,} errors", flush=True)
+
+        chunks = _read_chunks(f_in, chunk_size)
+        first_row = state['rows']
+        if workers <= 1:
+            _init_worker(model_kwargs)
+            for text, n_lines, offset in chunks:
+                commit(score_chunk(first_row, text, header, input_format, output_format), offset)
+                first_row += n_lines
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(model_kwargs,)) as pool:
+                window = []
+                for text, n_lines, offset in chunks:
+                    future = pool.submit(score_chunk, first_row, text, header,
+                                         input_format, output_format)
+                    window.append((future, offset))
+                    first_row += n_lines
+                    if len(window) >= 2 * workers:
+                        future, offset = window.pop(0)
+                        commit(future.result(), offset)
+                for future, offset in window:
+                    commit(future.result(), offset)
+
+    seconds = time.perf_counter() - started
+    rows = state['rows'] - start_rows
+    return {'rows': rows, 'total_rows': state['rows'], 'errors': state['errors'],
+            'seconds': seconds, 'rows_per_sec': rows / seconds if seconds else 0.0,
+            'model_version': version}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a large CSV/JSONL case file")
+    parser.add_argument('input')
+    parser.add_argument('output')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=50_000, help="Lines per chunk")
+    parser.add_argument('--resume', action='store_true')
+    parser.add_argument('--checkpoint', default=None)
+    parser.add_argument('--bundle', default=None, help="Model bundle directory")
+    parser.add_argument('--compiled', default=None, help="Compiled model directory")
+    args = parser.parse_args(argv)
+
+    model_kwargs = {'bundle_path': args.bundle, 'compiled_model_path': args.compiled,
+                    'mmap_mode': 'r'}
+    result = bulk_score(args.input, args.output, model_kwargs, workers=args.workers,
+                        chunk_size=args.chunk_size, resume=args.resume,
+                        checkpoint_path=args.checkpoint)
+    print(f"\nScored {result['rows']:,} rows in {result['seconds']:.1f}s "
+          f"({result['rows_per_sec']:,.0f} rows/s); {result['total_rows']:,} rows and "
+          f"{result['errors']:,} errors in '{args.output}' (model {result['model_version']})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
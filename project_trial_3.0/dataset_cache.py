@@ -0,0 +1,258 @@
+"""
+Encoded columnar cache of the training CSV.
+
+Parsing the CSV and label-encoding its string columns is done once. The
+result is stored as one memory-mappable .npy file per column with compact
+dtypes: uint8 category codes (uint16 if a column has more than 256
+values), uint16 durations and ages, uint8 flags. The encoder classes go
+into meta.json:
+
+    .dataset_cache/<sha256 of the CSV>/
+        meta.json        source hash, row count, columns, dtypes, classes
+        <column>.npy
+
+Codes use sorted classes, exactly like LabelEncoder, so a model trained from
+the cache is the same as one trained from the CSV. The cache directory is
+named after the CSV's sha256, so an edited CSV never hits a stale cache.
+
+Usage:
+    python dataset_cache.py build [skin_disease_dataset.csv] [--chunk-size 1000000]
+    python dataset_cache.py info [skin_disease_dataset.csv]
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+CACHE_ROOT = '.dataset_cache'
+CACHE_VERSION = 1
+META_FILE = 'meta.json'
+TARGET = 'disease'
+CATEGORICAL_COLUMNS = ['location', 'color', 'texture', 'size', 'gender', TARGET]
+# Numeric columns stored narrower than int64; anything else is stored as int64
+NUMERIC_DTYPES = {
+    'duration_days': np.uint16, 'age': np.uint16,
+    'itching': np.uint8, 'pain': np.uint8, 'scaling': np.uint8, 'spreading': np.uint8,
+    'family_history': np.uint8, 'seasonal_variation': np.uint8,
+}
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_dir_for(csv_path, cache_root=None, sha256=None):
+    """Cache directory for the current contents of csv_path."""
+    root = cache_root or os.path.join(os.path.dirname(os.path.abspath(csv_path)), CACHE_ROOT)
+    return os.path.join(root, sha256 or file_sha256(csv_path))
+
+
+def _count_rows(path):
+    with open(path, 'rb') as f:
+        lines = 0
+        last = b'\n'
+        for block in iter(lambda: f.read(1 << 20), b''):
+            lines += block.count(b'\n')
+            last = block[-1:]
+    return lines - 1 + (last != b'\n')  # header, missing final newline
+
+
+def build_cache(csv_path, cache_root=None, chunk_size=1_000_000):
+    """
+    Parse and encode a CSV once into a columnar cache directory.
+
+    The CSV is read in chunks, so memory is bounded by chunk_size. Categories
+    get provisional codes in order of appearance, which are remapped to
+    sorted (LabelEncoder) order once every value is known.
+
+    Args:
+        csv_path (str): Source CSV
+        cache_root (str, optional): Parent of the per-hash cache directories
+            (default: .dataset_cache next to the CSV)
+        chunk_size (int): Rows parsed at a time
+
+    Returns:
+        str: The cache directory
+    """
+    from numpy.lib.format import open_memmap
+    from tree_engine import write_atomic
+
+    started = time.perf_counter()
+    sha256 = file_sha256(csv_path)
+    final_dir = cache_dir_for(csv_path, cache_root, sha256)
+    if os.path.exists(os.path.join(final_dir, META_FILE)):
+        return final_dir
+
+    rows = _count_rows(csv_path)
+    columns = list(pd.read_csv(csv_path, nrows=0).columns)
+    work_dir = f'{final_dir}.tmp-{os.getpid()}'
+    os.makedirs(work_dir, exist_ok=True)
+
+    def column_file(column, suffix=''):
+        return os.path.join(work_dir, f'{column}{suffix}.npy')
+
+    vocab = {column: {} for column in columns if column in CATEGORICAL_COLUMNS}
+    arrays = {}
+    for column in columns:
+        if column in vocab:
+            arrays[column] = open_memmap(column_file(column, '.raw'), mode='w+',
+                                         dtype=np.uint32, shape=(rows,))
+        else:
+            arrays[column] = open_memmap(column_file(column), mode='w+',
+                                         dtype=NUMERIC_DTYPES.get(column, np.int64), shape=(rows,))
+
+    offset = 0
+    reader = pd.read_csv(csv_path, chunksize=chunk_size,
+                         dtype={column: str for column in vocab})
+    for chunk in reader:
+        n = len(chunk)
+        for column in columns:
+            values = chunk[column]
+            if column in vocab:
+                known = vocab[column]
+                for value in pd.unique(values):
+                    known.setdefault(value, len(known))
+                codes = pd.Categorical(values, categories=list(known)).codes
+                arrays[column][offset:offset + n] = codes
+            else:
+                dtype = arrays[column].dtype
+                values = values.to_numpy()
+                if np.iinfo(dtype).min > values.min() or values.max() > np.iinfo(dtype).max:
+                    raise ValueError(f"'{column}' has values outside {dtype.name}: "
+                                     f"[{values.min()}, {values.max()}]")
+                arrays[column][offset:offset + n] = values
+        offset += n
+    if offset != rows:
+        raise ValueError(f"Parsed {offset} rows from {csv_path}, expected {rows}")
+
+    classes = {}
+    for column, known in vocab.items():
+        sorted_classes = sorted(known)
+        dtype = np.uint8 if len(sorted_classes) <= 256 else np.uint16
+        remap = np.empty(len(known), dtype=dtype)
+        for value, code in known.items():
+            remap[code] = sorted_classes.index(value)
+        final = open_memmap(column_file(column), mode='w+', dtype=dtype, shape=(rows,))
+        raw = arrays[column]
+        for start in range(0, rows, chunk_size):
+            final[start:start + chunk_size] = remap[raw[start:start + chunk_size]]
+        final.flush()
+        del raw, arrays[column]
+        os.remove(column_file(column, '.raw'))
+        classes[column] = sorted_classes
+    for array in arrays.values():
+        array.flush()
+
+    meta = {
+        'version': CACHE_VERSION,
+        'source': os.path.abspath(csv_path),
+        'sha256': sha256,
+        'rows': rows,
+        'columns': columns,
+        'dtypes': {column: np.load(column_file(column), mmap_mode='r').dtype.name
+                   for column in columns},
+        'classes': classes,
+        'build_seconds': time.perf_counter() - started,
+    }
+    write_atomic(os.path.join(work_dir, META_FILE),
+                 lambda f: f.write(json.dumps(meta, indent=2).encode()))
+    try:
+        os.replace(work_dir, final_dir)
+    except OSError:
+        # Another process built the same cache first
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return final_dir
+
+
+def read_meta(cache_dir):
+    """meta.json of a complete cache directory, or None."""
+    try:
+        with open(os.path.join(cache_dir, META_FILE)) as f:
+            meta = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return meta if meta.get('version') == CACHE_VERSION else None
+
+
+def _label_encoder(classes):
+    from sklearn.preprocessing import LabelEncoder
+
+    encoder = LabelEncoder()
+    encoder.classes_ = np.array(classes, dtype=object)
+    return encoder
+
+
+def load_cached(csv_path, cache_root=None, build=True, mmap_mode='r'):
+    """
+    Load the encoded dataset for csv_path from its cache.
+
+    Args:
+        csv_path (str): Source CSV (hashed to find the cache)
+        cache_root (str, optional): See build_cache
+        build (bool): Build the cache if it is missing
+        mmap_mode (str, optional): How the columns are mapped
+
+    Returns:
+        tuple: (X DataFrame of encoded features, y codes, label_encoders,
+        disease_encoder, cache_dir), or None if there is no valid cache
+        and build is False
+    """
+    cache_dir = cache_dir_for(csv_path, cache_root)
+    meta = read_meta(cache_dir)
+    if meta is None:
+        if not build:
+            return None
+        cache_dir = build_cache(csv_path, cache_root)
+        meta = read_meta(cache_dir)
+
+    columns = {column: np.load(os.path.join(cache_dir, f'{column}.npy'), mmap_mode=mmap_mode)
+               for column in meta['columns']}
+    y = columns.pop(TARGET)
+    X = pd.DataFrame(columns, copy=False)
+    label_encoders = {column: _label_encoder(classes)
+                      for column, classes in meta['classes'].items() if column != TARGET}
+    disease_encoder = _label_encoder(meta['classes'][TARGET])
+    return X, y, label_encoders, disease_encoder, cache_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect the encoded dataset cache")
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help="Encode a CSV into the cache")
+    build.add_argument('csv', nargs='?', default='skin_disease_dataset.csv')
+    build.add_argument('--cache-root', default=None)
+    build.add_argument('--chunk-size', type=int, default=1_000_000)
+    info = sub.add_parser('info', help="Show the cache entry for a CSV")
+    info.add_argument('csv', nargs='?', default='skin_disease_dataset.csv')
+    info.add_argument('--cache-root', default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        started = time.perf_counter()
+        cache_dir = build_cache(args.csv, args.cache_root, args.chunk_size)
+        print(f"Cache ready in {time.perf_counter() - started:.2f}s: {cache_dir}")
+        return 0
+
+    cache_dir = cache_dir_for(args.csv, args.cache_root)
+    meta = read_meta(cache_dir)
+    if meta is None:
+        print(f"No valid cache for {args.csv} (expected {cache_dir})")
+        return 1
+    size = sum(os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir))
+    print(json.dumps({k: v for k, v in meta.items() if k != 'classes'}, indent=2))
+    print(f"{size / 1e6:.1f} MB on disk vs {os.path.getsize(args.csv) / 1e6:.1f} MB CSV")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""
+In-process doctor directory for the fused /predict_and_recommend endpoint.
+
+The directory is a JSON export of the SkinIssue collection: the seed file
+backend/data/skinIssues.json, or `mongoexport --collection skinissues
+--jsonArray` output (Mongo's _id fields are ignored). It is indexed once per
+load:
+
+    by disease               name (lowercased, like the Express controller)
+                             -> condition and doctors
+    by disease and location  (disease, city) -> doctors, for location filters
+    by location              city -> (disease, doctor) pairs
+
+so a lookup is a dict access instead of a MongoDB query or a collection
+scan. Doctors keep the order of the file, which is the order the Express
+controller returned from MongoDB; sort='rating' lists the best rated first. The file is re-checked at most every poll_interval seconds on lookup;
+a changed file is re-indexed and swapped in with a single reference
+assignment. A file that fails to load is reported and the previous index
+keeps serving.
+
+Usage:
+    python doctor_directory.py [../backend/data/skinIssues.json] [--disease Acne] [--location Delhi]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            '..', 'backend', 'data', 'skinIssues.json')
+DOCTOR_FIELDS = ('name', 'specialization', 'experience', 'hospital', 'location',
+                 'contact', 'rating')
+SORTS = (None, 'rating')
+
+
+def build_index(issues):
+    """
+    Index SkinIssue records by disease, by location and by both.
+
+    Args:
+        issues (list): SkinIssue documents (name, keywords, condition, doctors)
+
+    Returns:
+        dict: by_disease, by_disease_location, by_location, n_issues, n_doctors
+
+    Raises:
+        ValueError: If a record has no name or two records share one
+    """
+    by_disease, by_disease_location, by_location = {}, {}, {}
+    n_doctors = 0
+    for issue in issues:
+        name = str(issue.get('name') or '').strip().lower()
+        if not name:
+            raise ValueError(f"SkinIssue without a name: {issue}")
+        if name in by_disease:
+            raise ValueError(f"Duplicate SkinIssue name: {name!r}")
+
+        doctors = [{field: doctor.get(field) for field in DOCTOR_FIELDS}
+                   for doctor in issue.get('doctors') or []]
+        by_disease[name] = {'condition': issue.get('condition'), 'doctors': doctors}
+        n_doctors += len(doctors)
+
+        for doctor in doctors:
+            city = (doctor['location'] or '').strip().lower()
+            by_disease_location.setdefault((name, city), []).append(doctor)
+            by_location.setdefault(city, []).append((name, doctor))
+
+    return {'by_disease': by_disease, 'by_disease_location': by_disease_location,
+            'by_location': by_location, 'n_issues': len(by_disease), 'n_doctors': n_doctors}
+
+
+class DoctorDirectory:
+    """
+    Disease -> doctors lookups served from memory, refreshed when the file changes.
+
+    Args:
+        path (str): JSON export of the SkinIssue collection
+        poll_interval (float, optional): Minimum seconds between checks of
+            the file on lookup; None or 0 disables refreshing (reload() still
+            works)
+    """
+
+    def __init__(self, path=DEFAULT_PATH, poll_interval=None):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.last_error = None
+        self._reload_lock = threading.Lock()
+        self._next_check = 0.0
+        self._signature = _signature(path)
+        self._index = self._load()
+
+    def _load(self):
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        issues = json.loads(raw)
+        if isinstance(issues, dict):
+            issues = [issues]
+        index = build_index(issues)
+        index['version'] = hashlib.sha256(raw).hexdigest()[:12]
+        index['loaded_at'] = time.time()
+        return index
+
+    def reload(self):
+        """
+        Re-read and re-index the file now.
+
+        Returns:
+            dict: {'status': 'swapped'|'failed'|'in_progress', 'version', 'error'}
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return {'status': 'in_progress'}
+        signature = _signature(self.path)
+        try:
+            index = self._load()
+        except (OSError, ValueError) as e:
+            # Not retried until the file changes again
+            self._signature = signature
+            self.last_error = f"{type(e).__name__}: {e}"
+            print(f"Doctor directory reload failed, keeping version "
+                  f"{self._index['version']}: {self.last_error}")
+            return {'status': 'failed', 'version': self._index['version'],
+                    'error': self.last_error}
+        finally:
+            self._reload_lock.release()
+        self._signature = signature
+        self._index = index  # atomic swap
+        self.last_error = None
+        return {'status': 'swapped', 'version': index['version']}
+
+    def _current(self):
+        """The index to answer with, after a throttled check of the file."""
+        if self.poll_interval:
+            now = time.monotonic()
+            if now >= self._next_check:
+                self._next_check = now + self.poll_interval
+                if _signature(self.path) != self._signature:
+                    self.reload()
+        return self._index
+
+    @property
+    def version(self):
+        """sha256 prefix of the loaded file."""
+        return self._current()['version']
+
+    def recommend(self, disease, location=None, limit=None, sort=None):
+        """
+        Doctors for a disease, optionally in one city.
+
+        Args:
+            disease (str): Disease name as predicted (case-insensitive)
+            location (str, optional): Doctor city (case-insensitive)
+            limit (int, optional): Return at most this many doctors
+            sort (str, optional): 'rating' for the best rated first; by
+                default doctors keep the order of the file
+
+        Returns:
+            dict: condition, doctors and directory_version; condition is None
+            and doctors empty for diseases not in the directory
+
+        Raises:
+            ValueError: For an unknown sort
+        """
+        if sort not in SORTS:
+            raise ValueError(f"Unknown sort {sort!r}; expected one of {[s for s in SORTS if s]}")
+        index = self._current()
+        key = disease.strip().lower()
+        entry = index['by_disease'].get(key)
+        if entry is None:
+            doctors, condition = [], None
+        elif location:
+            doctors = index['by_disease_location'].get((key, location.strip().lower()), [])
+            condition = entry['condition']
+        else:
+            doctors, condition = entry['doctors'], entry['condition']
+        if sort == 'rating':
+            doctors = sorted(doctors, key=_by_rating)
+        if limit is not None:
+            doctors = doctors[:max(limit, 0)]
+        return {'condition': condition, 'doctors': list(doctors),
+                'directory_version': index['version']}
+
+    def doctors_in(self, location):
+        """
+        Every doctor in a city.
+
+        Returns:
+            list: {'disease', **doctor} dicts in the order of the file
+        """
+        pairs = self._current()['by_location'].get(location.strip().lower(), [])
+        return [{'disease': disease, **doctor} for disease, doctor in pairs]
+
+    def describe(self):
+        """Loaded version, sizes and refresh state."""
+        index = self._current()
+        return {
+            'path': os.path.abspath(self.path),
+            'version': index['version'],
+            'loaded_at': index['loaded_at'],
+            'issues': index['n_issues'],
+            'doctors': index['n_doctors'],
+            'locations': sorted(index['by_location']),
+            'poll_interval': self.poll_interval,
+            'last_error': self.last_error,
+        }
+
+
+def _by_rating(doctor):
+    return -(doctor['rating'] or 0), doctor['name'] or ''
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or query the doctor directory")
+    parser.add_argument('path', nargs='?', default=DEFAULT_PATH)
+    parser.add_argument('--disease', default=None)
+    parser.add_argument('--location', default=None)
+    parser.add_argument('--limit', type=int, default=None)
+    parser.add_argument('--sort', choices=['rating'], default=None)
+    args = parser.parse_args(argv)
+
+    directory = DoctorDirectory(args.path)
+    if args.disease:
+        result = directory.recommend(args.disease, args.location, args.limit, args.sort)
+    elif args.location:
+        result = directory.doctors_in(args.location)
+    else:
+        result = directory.describe()
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,511 @@
+"""
+Streaming input-drift and prediction-distribution monitor.
+
+model.py writes a reference profile (reference_profile.json) at training
+time. It holds, for every feature, fixed bins and their counts in the
+training data:
+
+    categorical  one bin per category (location, color, texture, size, gender)
+    binary       0 and 1 (the clinical flags)
+    numeric      bins between the reference's ventiles (age, duration_days),
+                 a constant-memory quantile sketch: live quantiles are read
+                 back from it to within one bin
+
+plus the distribution of predicted diseases (on the held-out test set when
+model.py writes it). Every feature also has a last bin for missing or
+out-of-range values.
+
+DriftMonitor counts live traffic into the same bins. Predictor entry points
+hand it the encoded rows they already built and the predicted classes, so
+an observation is a handful of list increments (single rows) or one
+bincount (batches). Counts go to a per-thread shard, so recording takes no
+lock; the shard of an exited thread is folded into a shared total
+(metrics.ThreadShards). report() merges the shards and scores every feature
+and the predictions with the population stability index,
+
+    PSI = sum((live - reference) * ln(live / reference))
+
+over bin shares: below 0.1 is stable, 0.1-0.25 moderate, above 0.25 drift.
+Optionally a background thread writes the counts and the report to a
+snapshot file every snapshot_interval seconds; the "recent" section of the
+report covers the rows since the previous snapshot.
+
+Counts are per process. Under serve.py every worker keeps its own; put
+{pid} in the snapshot path and merge the files with `report`.
+
+Usage:
+    python drift_monitor.py build [--data skin_disease_dataset.csv] [--out reference_profile.json]
+    python drift_monitor.py report drift_snapshot_*.json [--reference reference_profile.json]
+"""
+import argparse
+import bisect
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from metrics import ThreadShards
+
+REFERENCE_FORMAT = 'drift_reference'
+REFERENCE_VERSION = 1
+DEFAULT_REFERENCE_PATH = 'reference_profile.json'
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+# PSI bands, and the smallest share a bin is given so empty bins stay finite
+MODERATE_PSI = 0.1
+DRIFT_PSI = 0.25
+_MIN_SHARE = 1e-4
+# Edges of the numeric bins: the reference's 5%, 10%, ..., 95% quantiles
+_EDGE_QUANTILES = np.linspace(0.05, 0.95, 19)
+
+
+# ============================================================================
+# REFERENCE PROFILE
+# ============================================================================
+
+def build_reference(X, predicted, feature_names, label_encoders, disease_encoder):
+    """
+    Profile the training inputs and the model's predictions.
+
+    Args:
+        X: Encoded feature matrix (DataFrame or array) in feature_names order
+        predicted: Encoded predicted diseases (model.py uses the test split)
+        feature_names (list): Column order of X
+        label_encoders (dict): Fitted encoders of the categorical features
+        disease_encoder: Fitted disease encoder
+
+    Returns:
+        dict: The reference profile (see the module docstring)
+    """
+    X = np.asarray(X, dtype=np.float64)
+    features = {}
+    for j, name in enumerate(feature_names):
+        column = X[:, j]
+        if name in label_encoders:
+            spec = {'kind': 'categorical',
+                    'bins': [str(c) for c in label_encoders[name].classes_]}
+        elif np.isin(column[~np.isnan(column)], (0, 1)).all():
+            spec = {'kind': 'binary', 'bins': ['0', '1']}
+        else:
+            edges = np.unique(np.nanquantile(column, _EDGE_QUANTILES))
+            spec = {'kind': 'numeric', 'edges': edges.tolist(),
+                    'quantiles': {f'p{round(q * 100)}': float(v) for q, v in
+                                  zip(QUANTILES, np.nanquantile(column, QUANTILES))}}
+        layout = _layout(spec)
+        spec['counts'] = np.bincount(_bin_column(column, layout),
+                                     minlength=layout[2]).tolist()
+        features[name] = spec
+
+    classes = [str(c) for c in disease_encoder.classes_]
+    predicted = np.asarray(predicted, dtype=np.int64)
+    return {
+        'format': REFERENCE_FORMAT,
+        'version': REFERENCE_VERSION,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'n_rows': int(len(X)),
+        'feature_names': list(feature_names),
+        'features': features,
+        'predictions': {'bins': classes,
+                        'counts': np.bincount(predicted, minlength=len(classes) + 1).tolist()},
+    }
+
+
+def save_reference(profile, path=DEFAULT_REFERENCE_PATH):
+    """Write a reference profile as JSON (atomically)."""
+    tmp = f'{path}.tmp-{os.getpid()}'
+    with open(tmp, 'w') as f:
+        json.dump(profile, f, indent=1)
+    os.replace(tmp, path)
+
+
+def load_reference(path=DEFAULT_REFERENCE_PATH):
+    """
+    Read a reference profile.
+
+    Raises:
+        ValueError: If the file is not a reference profile
+    """
+    with open(path) as f:
+        profile = json.load(f)
+    if profile.get('format') != REFERENCE_FORMAT or profile.get('version') != REFERENCE_VERSION:
+        raise ValueError(f"{path} is not a drift reference profile (version {REFERENCE_VERSION})")
+    return profile
+
+
+def _layout(spec):
+    """(kind, edges or bin count, total bins including the missing / other bin)."""
+    if spec['kind'] == 'numeric':
+        edges = spec['edges']
+        return 'numeric', edges, len(edges) + 2
+    size = len(spec['bins'])
+    return spec['kind'], size, size + 1
+
+
+def _bin_column(values, layout):
+    """Bin indices of a float column; the last bin takes missing / invalid values."""
+    kind, parameter, n_bins = layout
+    values = np.asarray(values, dtype=np.float64)
+    missing = ~np.isfinite(values)
+    if kind == 'numeric':
+        bins = np.searchsorted(parameter, values, side='left')
+    else:
+        missing |= (values != np.floor(values)) | (values < 0) | (values >= parameter)
+        bins = np.where(missing, 0, values).astype(np.int64)
+    return np.where(missing, n_bins - 1, bins)
+
+
+# ============================================================================
+# MONITOR
+# ============================================================================
+
+class DriftMonitor:
+    """
+    Per-process streaming counts of live inputs and predictions.
+
+    Args:
+        reference (dict): Reference profile (see build_reference)
+        snapshot_path (str, optional): File the counts and report are written
+            to; '{pid}' is replaced by the process id
+        snapshot_interval (float): Seconds between snapshot writes
+        min_rows (int): Rows needed before a drift status is given
+    """
+
+    def __init__(self, reference, snapshot_path=None, snapshot_interval=60.0, min_rows=200):
+        self.reference = reference
+        self.feature_names = list(reference['feature_names'])
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.min_rows = min_rows
+        self.started_at = time.time()
+
+        # One flat count vector: every feature's bins, then the predictions
+        self._plan = []
+        self._offsets = {}
+        offset = 0
+        for j, name in enumerate(self.feature_names):
+            layout = _layout(reference['features'][name])
+            self._plan.append((j, offset, layout))
+            self._offsets[name] = (offset, layout[2])
+            offset += layout[2]
+        n_classes = len(reference['predictions']['bins'])
+        self._offsets['predictions'] = (offset, n_classes + 1)
+        self._prediction_offset = offset
+        self._n_classes = n_classes
+        self.size = offset + n_classes + 1
+
+        # Single rows: (column, code -> cell, missing cell) for categorical /
+        # binary, (column, offset, edges) for numeric features. Float codes
+        # hash like ints, and NaN or invalid codes miss the lookup.
+        self._direct = [(j, off, layout[1]) for j, off, layout in self._plan if layout[0] != 'numeric']
+        self._cells = [(j, {code: off + code for code in range(size)}, off + size)
+                       for j, off, size in self._direct]
+        self._numeric = [(j, off, list(layout[1])) for j, off, layout in self._plan
+                         if layout[0] == 'numeric']
+        # Batches: all categorical / binary columns are binned in one pass
+        self._direct_columns = np.array([j for j, _, _ in self._direct], dtype=np.int64)
+        self._direct_offsets = np.array([off for _, off, _ in self._direct], dtype=np.int64)
+        self._direct_sizes = np.array([size for _, _, size in self._direct], dtype=np.float64)
+
+        # Single rows increment the list; batches add into the array
+        self._shards = ThreadShards(self._new_shard, _fold_counts)
+        self._recent_base = np.zeros(self.size, dtype=np.int64)
+        self._snapshots_written = 0
+        self._writer_pid = None
+        self._writer_lock = threading.Lock()
+
+    @classmethod
+    def from_path(cls, path=DEFAULT_REFERENCE_PATH, **kwargs):
+        """Create a monitor from a reference profile file."""
+        return cls(load_reference(path), **kwargs)
+
+    def matches(self, feature_names, categories, diseases):
+        """
+        Whether the reference was built for a model with this schema.
+
+        Args:
+            feature_names (list): The model's feature order
+            categories (dict): Categorical feature -> classes
+            diseases (list): Disease names in encoder order
+        """
+        features = self.reference['features']
+        return (self.feature_names == list(feature_names)
+                and all(features[name].get('bins') == [str(c) for c in classes]
+                        for name, classes in categories.items())
+                and self.reference['predictions']['bins'] == [str(d) for d in diseases])
+
+    def _new_shard(self):
+        return [0] * self.size, np.zeros(self.size, dtype=np.int64)
+
+    def _shard(self):
+        if self.snapshot_path and self._writer_pid != os.getpid():
+            self._start_writer()
+        return self._shards.get()
+
+    def observe_row(self, row, predicted=None):
+        """
+        Count one encoded case.
+
+        Args:
+            row: Encoded features in reference feature order
+            predicted (int, optional): Encoded predicted disease
+        """
+        counts = self._shard()[0]
+        values = row.tolist() if hasattr(row, 'tolist') else list(row)
+        for j, cells, missing in self._cells:
+            counts[cells.get(values[j], missing)] += 1
+        for j, offset, edges in self._numeric:
+            value = values[j]
+            counts[offset + (bisect.bisect_left(edges, value) if math.isfinite(value)
+                             else len(edges) + 1)] += 1
+        if predicted is not None:
+            predicted = int(predicted)
+            counts[self._prediction_offset
+                   + (predicted if 0 <= predicted < self._n_classes else self._n_classes)] += 1
+
+    def observe_batch(self, X, predicted=None):
+        """
+        Count a batch of encoded cases.
+
+        Args:
+            X: Encoded feature matrix of shape (n_rows, n_features)
+            predicted: Encoded predicted diseases, one per row
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if not len(X):
+            return
+        counts = self._shard()[1]
+        V = X[:, self._direct_columns]
+        # NaN fails every comparison and lands in the missing bin
+        valid = (V >= 0) & (V < self._direct_sizes) & (V == np.floor(V))
+        cells = [(self._direct_offsets + np.where(valid, V, self._direct_sizes).astype(np.int64)).ravel()]
+        for j, offset, edges in self._numeric:
+            cells.append(offset + _bin_column(X[:, j], ('numeric', edges, len(edges) + 2)))
+        if predicted is not None:
+            predicted = np.asarray(predicted, dtype=np.int64)
+            valid = (predicted >= 0) & (predicted < self._n_classes)
+            cells.append(self._prediction_offset + np.where(valid, predicted, self._n_classes))
+        counts += np.bincount(np.concatenate(cells), minlength=self.size)
+
+    def counts(self):
+        """
+        Merge all thread shards.
+
+        Returns:
+            np.ndarray: Flat counts (see the per-feature slices in report())
+        """
+        return self._shards.merge(self._new_shard())[1]
+
+    def report(self, counts=None):
+        """
+        Score drift against the reference.
+
+        Args:
+            counts (np.ndarray, optional): Flat counts to score (defaults to
+                the live counts)
+
+        Returns:
+            dict: rows, overall status, max_psi, drifted feature names, a
+            'features' and a 'predictions' section with psi, status and live
+            vs reference shares (numeric features: quantiles instead), and
+            a 'recent' section scoring only the rows since the last snapshot
+        """
+        live = self.counts() if counts is None else np.asarray(counts, dtype=np.int64)
+        report = self._score(live, detail=True)
+        if counts is None:
+            recent = self._score(live - self._recent_base, detail=False)
+            recent['since_snapshot'] = self._snapshots_written
+            report['recent'] = recent
+        report['started_at'] = self.started_at
+        report['reference_created_at'] = self.reference.get('created_at')
+        return report
+
+    def _score(self, live, detail):
+        sections = {}
+        for name in self.feature_names + ['predictions']:
+            offset, n_bins = self._offsets[name]
+            spec = self.reference['predictions'] if name == 'predictions' else self.reference['features'][name]
+            sections[name] = self._score_section(spec, live[offset:offset + n_bins], detail)
+
+        # Every observed row adds one count to each feature
+        rows = sections[self.feature_names[0]]['rows'] if self.feature_names else 0
+        features = {name: sections[name] for name in self.feature_names}
+        scored = {name: s['psi'] for name, s in sections.items() if s['psi'] is not None}
+        max_psi = max(scored.values()) if scored else None
+        report = {
+            'rows': rows,
+            'status': _status(max_psi) if rows >= self.min_rows else 'insufficient_data',
+            'max_psi': max_psi,
+            'drifted': sorted(name for name, psi in scored.items() if psi >= DRIFT_PSI),
+        }
+        if detail:
+            report['features'] = features
+            report['predictions'] = sections['predictions']
+        else:
+            report['psi'] = scored
+        return report
+
+    def _score_section(self, spec, live, detail):
+        reference = np.asarray(spec['counts'], dtype=np.float64)
+        n = live.sum()
+        psi = _psi(reference, live) if n else None
+        section = {'rows': int(n), 'psi': psi,
+                   'status': _status(psi) if n >= self.min_rows else 'insufficient_data',
+                   'missing_or_invalid_rate': float(live[-1] / n) if n else None}
+        if not detail:
+            return section
+        if spec.get('kind') == 'numeric':
+            section['quantiles'] = {
+                key: {'reference': value,
+                      'live': _sketch_quantile(spec['edges'], live, q) if n else None}
+                for (key, value), q in zip(spec['quantiles'].items(), QUANTILES)
+            }
+        else:
+            shares = live[:-1] / n if n else np.zeros(len(live) - 1)
+            expected = reference[:-1] / max(reference.sum(), 1)
+            section['shares'] = {label: {'reference': float(e), 'live': float(s)}
+                                 for label, e, s in zip(spec['bins'], expected, shares)}
+        return section
+
+    def snapshot(self):
+        """
+        Current state for the snapshot file.
+
+        Returns:
+            dict: pid, time, the flat counts by section and the report
+        """
+        live = self.counts()
+        return {
+            'pid': os.getpid(),
+            'written_at': time.time(),
+            'counts': {name: live[offset:offset + n].tolist()
+                       for name, (offset, n) in self._offsets.items()},
+            'report': self.report(),
+        }
+
+    def write_snapshot(self, path=None):
+        """
+        Write snapshot() to path (default: snapshot_path) and start a new
+        "recent" window.
+
+        Returns:
+            str: The file written
+        """
+        path = (path or self.snapshot_path).replace('{pid}', str(os.getpid()))
+        state = self.snapshot()
+        tmp = f'{path}.tmp-{os.getpid()}'
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+        self._recent_base = np.concatenate(
+            [np.asarray(state['counts'][name], dtype=np.int64)
+             for name in self.feature_names + ['predictions']])
+        self._snapshots_written += 1
+        return path
+
+    def from_snapshot_counts(self, sections):
+        """Flat counts from the per-section lists of a snapshot file."""
+        return np.concatenate([np.asarray(sections[name], dtype=np.int64)
+                               for name in self.feature_names + ['predictions']])
+
+    def _start_writer(self):
+        pid = os.getpid()
+        with self._writer_lock:
+            if self._writer_pid == pid:
+                return  # another request thread just started it
+            # Threads do not survive fork, so each serving process runs its own
+            self._writer_pid = pid
+            threading.Thread(target=self._write_periodically, name='drift-snapshot',
+                             daemon=True).start()
+
+    def _write_periodically(self):
+        while True:
+            time.sleep(self.snapshot_interval)
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                print(f"Drift snapshot failed: {e}")
+
+
+def _fold_counts(target, shard):
+    """Add a (single-row list, batch array) shard into the target's array."""
+    counts = target[1]
+    np.add(counts, np.asarray(shard[0], dtype=np.int64), out=counts)
+    np.add(counts, shard[1], out=counts)
+
+
+def _psi(reference, live):
+    expected = np.maximum(reference / max(reference.sum(), 1), _MIN_SHARE)
+    actual = np.maximum(live / live.sum(), _MIN_SHARE)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def _status(psi):
+    if psi is None:
+        return 'insufficient_data'
+    if psi >= DRIFT_PSI:
+        return 'drift'
+    return 'moderate' if psi >= MODERATE_PSI else 'stable'
+
+
+def _sketch_quantile(edges, counts, q):
+    """Quantile from binned counts, interpolated inside the bin it falls in."""
+    counts = np.asarray(counts[:-1], dtype=np.float64)  # without missing values
+    total = counts.sum()
+    if not total:
+        return None
+    cumulative = np.cumsum(counts)
+    k = int(np.searchsorted(cumulative, q * total))
+    # Open-ended outer bins are reported at the nearest edge
+    if k == 0:
+        return float(edges[0])
+    if k >= len(edges):
+        return float(edges[-1])
+    low, high = edges[k - 1], edges[k]
+    within = (q * total - cumulative[k - 1]) / counts[k]
+    return float(low + within * (high - low))
+
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build drift reference profiles and read snapshots")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help="Profile a dataset with the current model")
+    build.add_argument('--data', default='skin_disease_dataset.csv')
+    build.add_argument('--model', default='skin_disease_model.pkl')
+    build.add_argument('--out', default=DEFAULT_REFERENCE_PATH)
+
+    report = sub.add_parser('report', help="Merge snapshot files and score them")
+    report.add_argument('snapshots', nargs='+')
+    report.add_argument('--reference', default=DEFAULT_REFERENCE_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        import joblib
+        from model import load_dataset
+
+        X, _, label_encoders, disease_encoder = load_dataset(args.data)
+        model = joblib.load(args.model)
+        profile = build_reference(X, model.predict(X), list(X.columns),
+                                  label_encoders, disease_encoder)
+        save_reference(profile, args.out)
+        print(f"Reference profile of {profile['n_rows']} rows written to '{args.out}'")
+        return 0
+
+    monitor = DriftMonitor.from_path(args.reference)
+    counts = np.zeros(monitor.size, dtype=np.int64)
+    for path in args.snapshots:
+        with open(path) as f:
+            counts += monitor.from_snapshot_counts(json.load(f)['counts'])
+    print(json.dumps(monitor.report(counts), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,39 @@
+"""
+Synthetic skin disease dataset generator.
+
+Without --rows, the original row-by-row generator writes the 5000-row
+skin_disease_dataset.csv exactly as before. With --rows, a NumPy-vectorized
+generator draws each column of a whole chunk at once from the DISEASES spec.
+The chunks are streamed to a CSV and/or a columnar directory, so memory
+stays bounded by the chunk size:
+
+    <columnar>/
+        meta.json        row count, column dtypes, category vocabularies
+        <column>.npy     one array per column (categorical columns hold
+                         codes into the sorted vocabulary)
+
+Chunk i is always drawn from the i-th child of SeedSequence(--seed), so the
+output only depends on --seed, --rows and --chunk-size, not on --workers.
+The CSV defaults to skin_disease_dataset_<rows>.csv with --rows, so a large
+generated dataset never replaces the tracked training CSV by accident.
+
+Usage:
+    python generate_dataset.py                                  (legacy 5000 rows)
+    python generate_dataset.py --rows 10000000 [--chunk-size 500000] [--workers N]
+                               [--out skin_disease_dataset_<rows>.csv] [--columnar data_npy]
+                               [--imbalance-ratio 10 | --class-weights Acne=5,Hives=0.5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 import random
 
-# Set random seed for reproducibility
-np.random.seed(42)
-random.seed(42)
-
 # Define skin diseases and their characteristics
 DISEASES = {
     'Acne': {
@@ -154,32 +181,299 @@ def generate_sample(disease, disease_characteristics):
     
     return sample
 
-# Generate balanced dataset
-samples_per_disease = 500  # Adjust this for larger dataset
-data = []
-
-for disease, characteristics in DISEASES.items():
-    for _ in range(samples_per_disease):
-        sample = generate_sample(disease, characteristics)
-        data.append(sample)
-
-# Create DataFrame
-df = pd.DataFrame(data)
-
-# Shuffle the dataset
-df = df.sample(frac=1, random_state=42).reset_index(drop=True)
-
-# Save dataset
-df.to_csv('skin_disease_dataset.csv', index=False)
-
-# Print dataset information
-print(f"Dataset created successfully!")
-print(f"\nDataset shape: {df.shape}")
-print(f"\nClass distribution:")
-print(df['disease'].value_counts())
-print(f"\nDataset preview:")
-print(df.head(10))
-print(f"\nDataset info:")
-print(df.info())
-print(f"\nNumerical features statistics:")
-print(df.describe())
\ No newline at end of file
+def generate_legacy_dataset(samples_per_disease=500, out='skin_disease_dataset.csv'):
+    """Row-by-row generator that produced the original skin_disease_dataset.csv."""
+    # Set random seed for reproducibility
+    np.random.seed(42)
+    random.seed(42)
+
+    # Generate balanced dataset
+    data = []
+
+    for disease, characteristics in DISEASES.items():
+        for _ in range(samples_per_disease):
+            sample = generate_sample(disease, characteristics)
+            data.append(sample)
+
+    # Create DataFrame
+    df = pd.DataFrame(data)
+
+    # Shuffle the dataset
+    df = df.sample(frac=1, random_state=42).reset_index(drop=True)
+
+    # Save dataset
+    df.to_csv(out, index=False)
+
+    # Print dataset information
+    print(f"Dataset created successfully!")
+    print(f"\nDataset shape: {df.shape}")
+    print(f"\nClass distribution:")
+    print(df['disease'].value_counts())
+    print(f"\nDataset preview:")
+    print(df.head(10))
+    print(f"\nDataset info:")
+    print(df.info())
+    print(f"\nNumerical features statistics:")
+    print(df.describe())
+
+
+# ============================================================================
+# VECTORIZED, CHUNKED GENERATOR
+# ============================================================================
+
+COLUMNS = ['disease', 'location', 'color', 'texture', 'size', 'duration_days',
+           'itching', 'pain', 'scaling', 'spreading', 'age', 'gender',
+           'family_history', 'seasonal_variation']
+# Categorical column -> DISEASES key holding its options
+CATEGORY_SOURCES = {'location': 'locations', 'color': 'colors', 'texture': 'textures', 'size': 'sizes'}
+BINARY_SOURCES = {'itching': 'itching_prob', 'pain': 'pain_prob',
+                  'scaling': 'scaling_prob', 'spreading': 'spreading_prob'}
+GENDERS = ['female', 'male']
+DTYPES = {column: np.uint8 for column in COLUMNS}
+DTYPES['duration_days'] = np.uint16
+
+
+def compile_spec(diseases=DISEASES):
+    """
+    Turn the DISEASES dict into lookup arrays indexed by disease code.
+
+    Vocabularies are sorted, so the codes match a LabelEncoder fitted on a
+    dataset that contains every value.
+    """
+    names = sorted(diseases)
+    spec = {'diseases': names, 'vocab': {'gender': GENDERS}, 'tables': {}, 'n_options': {}}
+    for column, key in CATEGORY_SOURCES.items():
+        vocab = sorted({value for d in names for value in diseases[d][key]})
+        index = {value: code for code, value in enumerate(vocab)}
+        width = max(len(diseases[d][key]) for d in names)
+        table = np.zeros((len(names), width), dtype=np.uint8)
+        for row, d in enumerate(names):
+            options = [index[value] for value in diseases[d][key]]
+            table[row, :len(options)] = options
+        spec['vocab'][column] = vocab
+        spec['tables'][column] = table
+        spec['n_options'][column] = np.array([len(diseases[d][key]) for d in names])
+    for column, key in (('duration_days', 'duration_range'), ('age', 'age_range')):
+        spec[column] = np.array([diseases[d][key] for d in names], dtype=np.int64)
+    spec['probs'] = {column: np.array([diseases[d][key] for d in names])
+                     for column, key in BINARY_SOURCES.items()}
+    return spec
+
+
+def class_weights(spec, imbalance_ratio=None, weights=None):
+    """
+    Class probabilities for the disease column.
+
+    Args:
+        imbalance_ratio (float, optional): Most / least frequent class ratio;
+            frequencies decay geometrically in DISEASES order
+        weights (dict, optional): Disease -> relative weight (others 1)
+
+    Returns:
+        np.ndarray: Probabilities in spec['diseases'] order
+    """
+    names = spec['diseases']
+    p = np.ones(len(names))
+    if imbalance_ratio:
+        order = {d: i for i, d in enumerate(DISEASES)}
+        steps = np.array([order[d] for d in names]) / max(len(names) - 1, 1)
+        p = float(imbalance_ratio) ** -steps
+    for disease, weight in (weights or {}).items():
+        if disease not in names:
+            raise ValueError(f"Unknown disease '{disease}'. Known: {names}")
+        p[names.index(disease)] *= weight
+    return p / p.sum()
+
+
+def generate_chunk(n_rows, seed, spec, p):
+    """
+    Draw n_rows samples, one vectorized draw per column.
+
+    Args:
+        n_rows (int): Rows to draw
+        seed: np.random.SeedSequence (or int) for this chunk
+        spec (dict): compile_spec() output
+        p (np.ndarray): Disease probabilities
+
+    Returns:
+        dict: Column -> array of DTYPES[column] (codes for categoricals)
+    """
+    rng = np.random.default_rng(seed)
+    disease = rng.choice(len(spec['diseases']), size=n_rows, p=p).astype(np.uint8)
+    chunk = {'disease': disease}
+    for column in CATEGORY_SOURCES:
+        option = (rng.random(n_rows) * spec['n_options'][column][disease]).astype(np.intp)
+        chunk[column] = spec['tables'][column][disease, option]
+    low, high = spec['duration_days'][disease].T
+    chunk['duration_days'] = rng.integers(low, high, endpoint=True).astype(np.uint16)
+    for column in BINARY_SOURCES:
+        chunk[column] = (rng.random(n_rows) < spec['probs'][column][disease]).astype(np.uint8)
+    low, high = spec['age'][disease].T
+    chunk['age'] = rng.integers(low, high, endpoint=True).astype(np.uint8)
+    chunk['gender'] = rng.integers(0, 2, size=n_rows, dtype=np.uint8)
+    chunk['family_history'] = rng.integers(0, 2, size=n_rows, dtype=np.uint8)
+    chunk['seasonal_variation'] = rng.integers(0, 2, size=n_rows, dtype=np.uint8)
+    return {column: chunk[column] for column in COLUMNS}
+
+
+def chunk_to_csv(chunk, spec):
+    """CSV text (no header) for a chunk, with category codes decoded."""
+    frame = {}
+    for column in COLUMNS:
+        if column == 'disease':
+            frame[column] = pd.Categorical.from_codes(chunk[column], spec['diseases'])
+        elif column in spec['vocab']:
+            frame[column] = pd.Categorical.from_codes(chunk[column], spec['vocab'][column])
+        else:
+            frame[column] = chunk[column]
+    return pd.DataFrame(frame).to_csv(index=False, header=False)
+
+
+def _chunk_job(n_rows, seed, p, want_csv):
+    spec = compile_spec()
+    chunk = generate_chunk(n_rows, seed, spec, p)
+    return chunk, chunk_to_csv(chunk, spec) if want_csv else None
+
+
+def write_dataset(rows, out=None, columnar=None, chunk_size=500_000, workers=1, seed=42, p=None):
+    """
+    Generate rows samples chunk by chunk and stream them to disk.
+
+    At most 2 * workers chunks are in memory at any time. Chunks are
+    written in order, so the output does not depend on workers.
+
+    Args:
+        rows (int): Total rows
+        out (str, optional): CSV path
+        columnar (str, optional): Directory for the .npy columns
+        chunk_size (int): Rows per chunk
+        workers (int): Generator processes (1 generates inline)
+        seed (int): Root seed; chunk i uses SeedSequence(seed).spawn()[i]
+        p (np.ndarray, optional): Disease probabilities (default balanced)
+
+    Returns:
+        dict: {'rows', 'chunks', 'seconds', 'class_counts'}
+    """
+    from numpy.lib.format import open_memmap
+    from tree_engine import write_atomic
+
+    spec = compile_spec()
+    p = class_weights(spec) if p is None else p
+    sizes = [chunk_size] * (rows // chunk_size) + ([rows % chunk_size] if rows % chunk_size else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    started = time.perf_counter()
+
+    csv_file = None
+    if out:
+        csv_file = open(out, 'w', newline='')
+        csv_file.write(','.join(COLUMNS) + '\n')
+    arrays = {}
+    if columnar:
+        os.makedirs(columnar, exist_ok=True)
+        arrays = {column: open_memmap(os.path.join(columnar, f'{column}.npy'), mode='w+',
+                                      dtype=DTYPES[column], shape=(rows,))
+                  for column in COLUMNS}
+
+    counts = np.zeros(len(spec['diseases']), dtype=np.int64)
+    offset = 0
+
+    def consume(chunk, text):
+        nonlocal offset
+        n = len(chunk['disease'])
+        if csv_file:
+            csv_file.write(text)
+        for column, array in arrays.items():
+            array[offset:offset + n] = chunk[column]
+        counts[:] += np.bincount(chunk['disease'], minlength=len(counts))
+        offset += n
+        print(f"  {offset:,}/{rows:,} rows ({time.perf_counter() - started:.1f}s)", flush=True)
+
+    try:
+        jobs = [(n, s, p, csv_file is not None) for n, s in zip(sizes, seeds)]
+        if workers <= 1:
+            for job in jobs:
+                consume(*_chunk_job(*job))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                window = []
+                for job in jobs:
+                    window.append(pool.submit(_chunk_job, *job))
+                    if len(window) >= 2 * workers:
+                        consume(*window.pop(0).result())
+                for future in window:
+                    consume(*future.result())
+    finally:
+        if csv_file:
+            csv_file.close()
+        for array in arrays.values():
+            array.flush()
+
+    if columnar:
+        meta = {
+            'rows': rows,
+            'columns': COLUMNS,
+            'dtypes': {column: np.dtype(DTYPES[column]).name for column in COLUMNS},
+            'categories': {'disease': spec['diseases'], **spec['vocab']},
+            'seed': seed,
+            'chunk_size': chunk_size,
+        }
+        write_atomic(os.path.join(columnar, 'meta.json'),
+                     lambda f: f.write(json.dumps(meta, indent=2).encode()))
+
+    return {
+        'rows': rows,
+        'chunks': len(sizes),
+        'seconds': time.perf_counter() - started,
+        'class_counts': dict(zip(spec['diseases'], counts.tolist())),
+    }
+
+
+def _parse_weights(text):
+    weights = {}
+    for item in filter(None, (text or '').split(',')):
+        disease, _, weight = item.partition('=')
+        weights[disease.strip()] = float(weight)
+    return weights
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the synthetic skin disease dataset")
+    parser.add_argument('--rows', type=int, default=None,
+                        help="Rows to generate with the vectorized generator "
+                             "(omit for the legacy 5000-row dataset)")
+    parser.add_argument('--chunk-size', type=int, default=500_000)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', default=None,
+                        help="CSV output path (default: skin_disease_dataset.csv, or "
+                             "skin_disease_dataset_<rows>.csv with --rows)")
+    parser.add_argument('--no-csv', action='store_true', help="Only write the columnar output")
+    parser.add_argument('--columnar', default=None, help="Directory for columnar .npy output")
+    parser.add_argument('--imbalance-ratio', type=float, default=None,
+                        help="Most / least frequent class ratio (geometric decay)")
+    parser.add_argument('--class-weights', default=None,
+                        help="Relative class weights, e.g. Acne=5,Melanoma=0.2")
+    args = parser.parse_args(argv)
+
+    if args.rows is None:
+        generate_legacy_dataset(out=args.out or 'skin_disease_dataset.csv')
+        return 0
+    out = args.out or f'skin_disease_dataset_{args.rows}.csv'
+
+    p = class_weights(compile_spec(), args.imbalance_ratio, _parse_weights(args.class_weights))
+    result = write_dataset(
+        args.rows, out=None if args.no_csv else out, columnar=args.columnar,
+        chunk_size=args.chunk_size, workers=args.workers, seed=args.seed, p=p
+    )
+    print(f"\nGenerated {result['rows']:,} rows in {result['chunks']} chunks, "
+          f"{result['seconds']:.1f}s ({result['rows'] / result['seconds']:,.0f} rows/s)")
+    if not args.no_csv:
+        print(f"CSV saved as '{out}'")
+    print("\nClass distribution:")
+    for disease, count in sorted(result['class_counts'].items(), key=lambda kv: -kv[1]):
+        print(f"  {disease:<20}{count:>12,}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""
+Budgeted hyperparameter search with successive halving.
+
+Every candidate (a model family plus one parameter setting) is first scored
+by cross-validation on a small stratified sample of the training set, with
+tree ensembles also shrunk to a fraction of their estimators. Only the best
+1/eta of the candidates move on to the next rung, which uses eta times more
+rows and estimators. The last rung uses the full training set and the full
+number of estimators. All (candidate, fold) fits of a rung run in a process pool.
+
+The search stops early once a fit-count or wall-clock budget is spent; fits
+still running when the time runs out are abandoned rather than awaited, and
+the winner is taken from the last rung that finished. Every finished fit is
+written to a JSON checkpoint, so rerunning an interrupted search with the
+same settings only runs the missing fits.
+
+Usage:
+    python hyperparam_search.py [--max-fits N] [--max-seconds S] [--workers N]
+                                [--checkpoint search_checkpoint.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, as_completed
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import ParameterSampler, StratifiedKFold, train_test_split
+
+from model import _for_job
+from tree_engine import write_atomic
+
+CHECKPOINT_VERSION = 1
+
+# Sampled values per family. The hard-coded settings in model.build_models()
+# are always included as the first candidate of each family.
+SEARCH_SPACES = {
+    'Random Forest': {
+        'max_depth': [None, 10, 20, 30],
+        'min_samples_split': [2, 5, 10],
+        'min_samples_leaf': [1, 2, 4],
+        'max_features': ['sqrt', 'log2', None],
+    },
+    'Gradient Boosting': {
+        'learning_rate': [0.05, 0.1, 0.2],
+        'max_depth': [3, 5, 7],
+        'subsample': [0.8, 1.0],
+        'min_samples_leaf': [1, 5, 10],
+    },
+    'SVM': {
+        'classifier__C': [1, 10, 100],
+        'classifier__gamma': ['scale', 0.01, 0.1],
+    },
+}
+
+
+def make_candidates(models, n_candidates=8, random_state=42):
+    """
+    Sample parameter settings for every family in SEARCH_SPACES.
+
+    Args:
+        models (dict): Name -> base estimator (model.build_models())
+        n_candidates (int): Settings per family, including the default one
+        random_state (int): Sampling seed
+
+    Returns:
+        list: [{'model': name, 'params': {...}}], families interleaved;
+        identical across runs with the same arguments
+    """
+    per_family = []
+    for name, space in SEARCH_SPACES.items():
+        if name not in models:
+            continue
+        defaults = models[name].get_params()
+        settings = [{key: defaults[key] for key in space}]
+        for params in ParameterSampler(space, n_iter=n_candidates * 4, random_state=random_state):
+            if params not in settings:
+                settings.append(params)
+            if len(settings) == n_candidates:
+                break
+        per_family.append([{'model': name, 'params': params} for params in settings])
+    # Interleaved, so trimming the list to a budget keeps every family
+    depth = max((len(family) for family in per_family), default=0)
+    return [family[i] for i in range(depth) for family in per_family if i < len(family)]
+
+
+def build_estimator(base, params, fraction=1.0):
+    """Base estimator with params applied and n_estimators scaled by fraction."""
+    estimator = clone(base).set_params(**params)
+    if 'n_estimators' in estimator.get_params():
+        full = base.get_params()['n_estimators']
+        estimator.set_params(n_estimators=max(10, int(round(full * fraction))))
+    return estimator
+
+
+# Training data shipped once to every pool process by _init_worker
+_worker_data = {}
+
+
+def _init_worker(X, y):
+    _worker_data.update(X=X, y=y)
+
+
+def _fit_fold(estimator, train_idx, test_idx):
+    X, y = _worker_data['X'], _worker_data['y']
+    started = time.perf_counter()
+    estimator = _for_job(estimator, fold=0)
+    estimator.fit(X[train_idx], y[train_idx])
+    score = accuracy_score(y[test_idx], estimator.predict(X[test_idx]))
+    return score, time.perf_counter() - started
+
+
+def _key(candidate, rung, fold):
+    params = json.dumps(candidate['params'], sort_keys=True)
+    return f"{candidate['model']}|{params}|{rung}|{fold}"
+
+
+class _Checkpoint:
+    """Finished fold scores keyed by candidate, rung and fold."""
+
+    def __init__(self, path, config):
+        self.path = path
+        self.results = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            if saved.get('version') == CHECKPOINT_VERSION and saved.get('config') == config:
+                self.results = saved['results']
+                print(f"Resuming search: {len(self.results)} fits loaded from '{path}'")
+            else:
+                print(f"Ignoring '{path}': it was written with different search settings")
+        self.config = config
+
+    def add(self, key, score, seconds):
+        self.results[key] = {'score': score, 'seconds': seconds}
+        if self.path:
+            payload = {'version': CHECKPOINT_VERSION, 'config': self.config, 'results': self.results}
+            write_atomic(self.path, lambda f: f.write(json.dumps(payload).encode()))
+
+
+def successive_halving(models, X, y, max_fits=None, max_seconds=None, n_candidates=8,
+                       eta=3, n_rungs=3, cv=3, workers=None, checkpoint='search_checkpoint.json',
+                       random_state=42):
+    """
+    Search the SEARCH_SPACES families with successive halving.
+
+    Rung r of n_rungs trains on eta**(r - n_rungs + 1) of the rows (and of
+    the estimators for tree ensembles); the best 1/eta of its candidates
+    are promoted.
+
+    Args:
+        models (dict): Name -> base estimator (model.build_models())
+        X: Training features (DataFrame or array)
+        y: Encoded training labels
+        max_fits (int, optional): Stop before a rung would exceed this many fits
+        max_seconds (float, optional): Stop once this much wall time passed,
+            without waiting for the fits still running
+        n_candidates (int): Settings sampled per family
+        eta (int): Promotion ratio between rungs
+        n_rungs (int): Number of rungs; the last one uses all rows
+        cv (int): Stratified folds per evaluation
+        workers (int, optional): Process pool size (default: CPU count)
+        checkpoint (str, optional): JSON file for finished fits (None disables)
+        random_state (int): Seed for sampling candidates and rung subsets
+
+    Returns:
+        dict: {'best': {'model', 'params', 'score', 'rung'}, 'rungs': [...],
+        'fits': fits run now, 'resumed_fits': fits read from the checkpoint,
+        'seconds', 'complete'}
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    candidates = make_candidates(models, n_candidates, random_state)
+    config = {
+        'candidates': candidates, 'eta': eta, 'n_rungs': n_rungs, 'cv': cv,
+        'n_rows': len(y), 'random_state': random_state,
+    }
+    store = _Checkpoint(checkpoint, config)
+    workers = workers or os.cpu_count() or 1
+
+    started = time.perf_counter()
+    deadline = None if max_seconds is None else started + max_seconds
+    fits = resumed = 0
+    rungs = []
+    survivors = list(range(len(candidates)))
+    complete = True
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(X, y)) as pool:
+        for rung in range(n_rungs):
+            fraction = float(eta) ** (rung - n_rungs + 1)
+            rows = np.arange(len(y))
+            if fraction < 1.0:
+                rows, _ = train_test_split(rows, train_size=fraction, stratify=y,
+                                           random_state=random_state + rung)
+            folds = list(StratifiedKFold(n_splits=cv).split(rows, y[rows]))
+
+            pending = [(c, f) for c in survivors for f in range(cv)
+                       if _key(candidates[c], rung, f) not in store.results]
+            resumed += len(survivors) * cv - len(pending)
+            if max_fits is not None and fits + len(pending) > max_fits:
+                if rung == 0:
+                    # Keep as many whole candidates as the budget allows
+                    allowed = max(1, (max_fits - fits) // cv)
+                    survivors = survivors[:allowed]
+                    pending = [(c, f) for c, f in pending if c in survivors]
+                else:
+                    complete = False
+                    break
+
+            print(f"Rung {rung}: {len(survivors)} candidates on {len(rows)} rows "
+                  f"({fraction:.0%} of rows/estimators), {len(pending)} fits to run")
+            futures = {}
+            for c, f in pending:
+                candidate = candidates[c]
+                estimator = build_estimator(models[candidate['model']], candidate['params'], fraction)
+                train_idx, test_idx = folds[f]
+                futures[pool.submit(_fit_fold, estimator, rows[train_idx], rows[test_idx])] = (c, f)
+
+            timeout = None if deadline is None else max(deadline - time.perf_counter(), 0)
+            try:
+                for future in as_completed(futures, timeout=timeout):
+                    c, f = futures[future]
+                    score, seconds = future.result()
+                    store.add(_key(candidates[c], rung, f), score, seconds)
+                    fits += 1
+            except TimeoutError:
+                # cancel() cannot stop a running fit, and leaving the with
+                # block would wait for it; the pool is left to finish alone
+                pool.shutdown(wait=False, cancel_futures=True)
+                complete = False
+                break
+
+            scores = {}
+            for c in survivors:
+                scores[c] = float(np.mean([store.results[_key(candidates[c], rung, f)]['score']
+                                           for f in range(cv)]))
+            ranked = sorted(survivors, key=lambda c: scores[c], reverse=True)
+            rungs.append({
+                'rung': rung,
+                'rows': int(len(rows)),
+                'fraction': fraction,
+                'scores': [{**candidates[c], 'score': scores[c]} for c in ranked],
+            })
+            survivors = ranked[:max(1, len(ranked) // eta)]
+
+    best = None
+    if rungs:
+        last = rungs[-1]
+        best = {**last['scores'][0], 'rung': last['rung']}
+    return {
+        'best': best,
+        'rungs': rungs,
+        'fits': fits,
+        'resumed_fits': resumed,
+        'seconds': time.perf_counter() - started,
+        'complete': complete,
+    }
+
+
+def tuned_estimator(models, result):
+    """The winning family's base estimator with the winning parameters applied."""
+    best = result['best']
+    return clone(models[best['model']]).set_params(**best['params'])
+
+
+def print_result(result):
+    for rung in result['rungs']:
+        print(f"\nRung {rung['rung']} ({rung['rows']} rows)")
+        for entry in rung['scores']:
+            print(f"  {entry['score']:.4f}  {entry['model']:<20} {entry['params']}")
+    status = 'complete' if result['complete'] else 'stopped by budget'
+    print(f"\nSearch {status}: {result['fits']} fits run, {result['resumed_fits']} "
+          f"resumed, {result['seconds']:.1f}s")
+    if result['best']:
+        best = result['best']
+        print(f"Best: {best['model']} {best['params']} "
+              f"(CV {best['score']:.4f} at rung {best['rung']})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Successive-halving hyperparameter search")
+    parser.add_argument('--data', default='skin_disease_dataset.csv')
+    parser.add_argument('--max-fits', type=int, default=None)
+    parser.add_argument('--max-seconds', type=float, default=None)
+    parser.add_argument('--candidates', type=int, default=8, help="Settings per model family")
+    parser.add_argument('--eta', type=int, default=3)
+    parser.add_argument('--rungs', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--checkpoint', default='search_checkpoint.json')
+    parser.add_argument('--output', help="Write the result as JSON to this file")
+    args = parser.parse_args(argv)
+
+    from model import build_models, load_dataset
+    X, y, _, _ = load_dataset(args.data)
+    # Search on the training split only, as model.py does
+    X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    result = successive_halving(
+        build_models(), X_train, y_train, max_fits=args.max_fits, max_seconds=args.max_seconds,
+        n_candidates=args.candidates, eta=args.eta, n_rungs=args.rungs, workers=args.workers,
+        checkpoint=args.checkpoint
+    )
+    print_result(result)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+class InferencePolicy:
+    """
+    Decides how much parallelism one inference call may use.
+
+    Small inputs run sequentially in the calling thread. Large batches are
+    split into row chunks scored on a shared thread pool, with at most
+    max_workers_per_call chunks per call. The pool size caps the total number
+    of worker threads across all concurrent requests in the process.
+    """
+
+    def __init__(self, sequential_max_rows=256, rows_per_worker=512,
+                 max_workers_per_call=4, max_total_workers=None):
+        """
+        Args:
+            sequential_max_rows (int): Inputs up to this many rows never leave
+                the calling thread
+            rows_per_worker (int): Minimum rows given to each extra worker
+            max_workers_per_call (int): Most chunks a single call is split into
+            max_total_workers (int, optional): Size of the shared pool
+                (defaults to the number of CPUs)
+        """
+        self.sequential_max_rows = int(sequential_max_rows)
+        self.rows_per_worker = max(1, int(rows_per_worker))
+        self.max_workers_per_call = max(1, int(max_workers_per_call))
+        self.max_total_workers = max(1, int(max_total_workers or os.cpu_count() or 1))
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+
+    def workers_for(self, n_rows):
+        """Number of chunks an input of n_rows is split into."""
+        if n_rows <= self.sequential_max_rows:
+            return 1
+        wanted = math.ceil(n_rows / self.rows_per_worker)
+        return max(1, min(wanted, self.max_workers_per_call, self.max_total_workers + 1))
+
+    def run(self, fn, X):
+        """
+        Apply a row-wise scoring function to X under this policy.
+
+        Args:
+            fn: Callable mapping an (n, n_features) array to an array whose
+                first axis has n rows (e.g. model.predict_proba)
+            X (np.ndarray): Input rows
+
+        Returns:
+            np.ndarray: fn(X), computed chunk-wise when X is large
+        """
+        n_workers = self.workers_for(len(X))
+        if n_workers == 1:
+            return fn(X)
+
+        pool = self._shared_pool()
+        chunks = np.array_split(X, n_workers)
+        # The calling thread scores the first chunk instead of idling
+        futures = [pool.submit(fn, chunk) for chunk in chunks[1:]]
+        results = [fn(chunks[0])] + [future.result() for future in futures]
+        return np.concatenate(results)
+
+    def _shared_pool(self):
+        """The process's worker pool, created on first use."""
+        pid = os.getpid()
+        if self._pool_pid != pid:
+            with self._pool_lock:
+                # Re-check: another request thread may have just built it
+                if self._pool_pid != pid:
+                    # Pool threads do not survive a fork, so each process builds its own
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_total_workers, thread_name_prefix='inference'
+                    )
+                    self._pool_pid = pid
+        return self._pool
+
+    def describe(self):
+        """One-line summary of the active policy."""
+        return (
+            f"sequential up to {self.sequential_max_rows} rows, then "
+            f"{self.rows_per_worker} rows/worker, at most "
+            f"{self.max_workers_per_call} workers per call and "
+            f"{self.max_total_workers} worker threads in total"
+        )
+
+
+def disable_estimator_parallelism(model):
+    """
+    Force every n_jobs parameter of a fitted estimator to 1.
+
+    Models trained with n_jobs=-1 keep that setting in the pickle, which
+    makes each predict call fan out over joblib workers. Parallelism is
+    decided by InferencePolicy instead.
+
+    Returns:
+        list: Names of the parameters that were changed
+    """
+    if not hasattr(model, 'get_params'):
+        return []
+    changed = [
+        name for name, value in model.get_params().items()
+        if name.endswith('n_jobs') and value != 1
+    ]
+    if changed:
+        model.set_params(**{name: 1 for name in changed})
+    return changed
@@ -0,0 +1,265 @@
+"""
+Low-overhead request metrics with Prometheus text exposition.
+
+Counters and latency histograms are recorded into a per-thread shard, so
+the hot path takes no lock: one dict lookup, a bisect over the bucket
+bounds and a few increments. render() merges the shards when /metrics is
+scraped. The threaded servers start a thread per connection, so the shard
+of a thread that exits is folded into a shared total and dropped
+(ThreadShards). Gauges (model version, cache and batcher state) are read from
+callbacks at render time, so they cost nothing per request.
+
+Values are per process. Under serve.py each worker keeps its own metrics;
+every sample carries a pid label so scrapes of different workers stay apart.
+"""
+import bisect
+import itertools
+import os
+import threading
+import weakref
+
+# Seconds; fine resolution at the low end where single predictions live
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001,
+                   0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+_HELP = {
+    'stage_seconds': ('histogram', "Time spent in each prediction stage"),
+    'request_seconds': ('histogram', "HTTP request latency by endpoint"),
+    'requests_total': ('counter', "HTTP requests by endpoint and status code"),
+    'predictions_total': ('counter', "Cases scored, by entry point"),
+    'batches_total': ('counter', "Batch scoring calls"),
+    'batch_rows_total': ('counter', "Cases submitted in batch scoring calls"),
+    'errors_total': ('counter', "Rejected cases and failed requests by error type"),
+}
+
+
+def error_type(message, categorical=()):
+    """
+    Classify an error message from the predictor.
+
+    Args:
+        message (str): Exception or per-row error message
+        categorical: Names of the categorical features
+
+    Returns:
+        str: 'unseen_category', 'missing_feature', 'invalid_value',
+        'malformed_case' or 'other'
+    """
+    message = str(message)
+    if 'previously unseen labels' in message:
+        return 'unseen_category'
+    if 'missing features' in message or 'Missing feature' in message:
+        return 'missing_feature'
+    if 'invalid value for' in message:
+        column = message.split("'")[1] if "'" in message else ''
+        return 'unseen_category' if column in categorical else 'invalid_value'
+    if 'must be an object' in message:
+        return 'malformed_case'
+    return 'other'
+
+
+class _ThreadToken:
+    """Lives in a thread's locals; freed (and finalized) when the thread exits."""
+    __slots__ = ('__weakref__',)
+
+
+class ThreadShards:
+    """
+    Per-thread shards for lock-free recording, bounded by the live threads.
+
+    Each thread updates its own shard without locking. When the thread
+    exits, its shard is folded into a single retired shard and dropped, so
+    memory and merge time do not grow with every thread ever started.
+
+    Args:
+        new: Callable returning an empty shard
+        fold: Callable(target, shard) adding shard into target in place
+    """
+
+    def __init__(self, new, fold):
+        self._new = new
+        self._fold = fold
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._live = {}
+        self._retired = new()
+        self._ids = itertools.count()
+
+    def get(self):
+        """The calling thread's shard."""
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._register()
+        return shard
+
+    def _register(self):
+        shard = self._new()
+        key = next(self._ids)
+        token = _ThreadToken()
+        with self._lock:
+            self._live[key] = shard
+        self._local.shard = shard
+        self._local.token = token
+        # The token is freed with the thread's locals, after its last update
+        weakref.finalize(token, self._retire, key)
+        return shard
+
+    def _retire(self, key):
+        with self._lock:
+            shard = self._live.pop(key, None)
+            if shard is not None:
+                self._fold(self._retired, shard)
+
+    def live(self):
+        """Number of shards of threads that have not exited."""
+        return len(self._live)
+
+    def merge(self, target):
+        """
+        Fold the retired shard and every live shard into target.
+
+        Returns:
+            The target
+        """
+        with self._lock:
+            self._fold(target, self._retired)
+            for shard in self._live.values():
+                self._fold(target, shard)
+        return target
+
+
+class Metrics:
+    """
+    Process-local counters, histograms and gauge callbacks.
+
+    Args:
+        namespace (str): Prefix of every exported metric name
+        buckets (tuple): Histogram upper bounds in seconds
+        enabled (bool): When False every recording call returns immediately
+    """
+
+    def __init__(self, namespace='skin_model', buckets=DEFAULT_BUCKETS, enabled=True):
+        self.namespace = namespace
+        self.buckets = tuple(buckets)
+        self.enabled = enabled
+        self._shards = ThreadShards(_new_shard, _fold_shard)
+        self._gauges = []
+
+    def _shard(self):
+        return self._shards.get()
+
+    def observe(self, name, seconds, labels=()):
+        """
+        Record a duration in a histogram.
+
+        Args:
+            name (str): Histogram name (without namespace)
+            seconds (float): Observed value
+            labels (tuple): (label, value) pairs
+        """
+        if not self.enabled:
+            return
+        histograms = self._shard()['histograms']
+        key = (name, labels)
+        entry = histograms.get(key)
+        if entry is None:
+            entry = histograms[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect.bisect_left(self.buckets, seconds)] += 1
+        entry[1] += seconds
+
+    def observe_stage(self, stage, seconds):
+        """Record the time spent in one prediction stage."""
+        self.observe('stage_seconds', seconds, (('stage', stage),))
+
+    def inc(self, name, value=1, labels=()):
+        """Add value to a counter."""
+        if not self.enabled:
+            return
+        counters = self._shard()['counters']
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def add_gauges(self, callback):
+        """
+        Register a callback read at render time.
+
+        The callback returns a list of (name, help, labels, value) tuples.
+        """
+        self._gauges.append(callback)
+
+    def snapshot(self):
+        """
+        Merge all thread shards.
+
+        Returns:
+            tuple: (histograms, counters) keyed by (name, labels); histogram
+            values are [bucket counts (non-cumulative, +Inf last), sum]
+        """
+        merged = self._shards.merge(_new_shard())
+        return merged['histograms'], merged['counters']
+
+    def render(self):
+        """
+        Export everything in the Prometheus text format (version 0.0.4).
+
+        Returns:
+            str: The exposition text
+        """
+        histograms, counters = self.snapshot()
+        pid = (('pid', str(os.getpid())),)
+        lines = []
+        described = set()
+
+        def header(name, kind, help_text):
+            full = f'{self.namespace}_{name}'
+            if full not in described:
+                described.add(full)
+                lines.append(f'# HELP {full} {help_text}')
+                lines.append(f'# TYPE {full} {kind}')
+            return full
+
+        for (name, labels), (counts, total) in sorted(histograms.items()):
+            kind, help_text = _HELP.get(name, ('histogram', name))
+            full = header(name, kind, help_text)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{full}_bucket{_labels(labels + pid + (("le", le),))} {cumulative}')
+            lines.append(f'{full}_sum{_labels(labels + pid)} {total!r}')
+            lines.append(f'{full}_count{_labels(labels + pid)} {cumulative}')
+
+        for (name, labels), value in sorted(counters.items()):
+            kind, help_text = _HELP.get(name, ('counter', name))
+            full = header(name, kind, help_text)
+            lines.append(f'{full}{_labels(labels + pid)} {value}')
+
+        for callback in self._gauges:
+            for name, help_text, labels, value in callback():
+                full = header(name, 'gauge', help_text)
+                lines.append(f'{full}{_labels(tuple(labels) + pid)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _new_shard():
+    return {'histograms': {}, 'counters': {}}
+
+
+def _fold_shard(target, shard):
+    histograms, counters = target['histograms'], target['counters']
+    for key, (counts, total) in list(shard['histograms'].items()):
+        merged = histograms.setdefault(key, [[0] * len(counts), 0.0])
+        merged[0] = [a + b for a, b in zip(merged[0], counts)]
+        merged[1] += total
+    for key, value in list(shard['counters'].items()):
+        counters[key] = counters.get(key, 0) + value
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
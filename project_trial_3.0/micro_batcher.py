@@ -0,0 +1,154 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+# Upper edges (ms) of the added-wait histogram buckets
+WAIT_BUCKETS_MS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 25.0, 50.0, float('inf'))
+
+
+class MicroBatcher:
+    """
+    Merges concurrent single-case requests into vectorized batch calls.
+
+    Callers submit one item at a time from their own (request) threads. A
+    background thread takes the first queued item, keeps collecting until
+    max_batch_size items are queued or max_wait_ms has passed since that
+    first item arrived, scores them with one score_fn call and fans the
+    results back out to the waiting callers.
+
+    The background thread is started on first use, and restarted in a forked
+    child process, so a batcher can be created before serve.py forks.
+    """
+
+    def __init__(self, score_fn, max_batch_size=32, max_wait_ms=2.0, name='micro-batcher'):
+        """
+        Args:
+            score_fn: Callable taking a list of items and returning a list of
+                the same length. An Exception instance in the returned list
+                is raised to that item's caller only.
+            max_batch_size (int): Most items merged into one call
+            max_wait_ms (float): Longest time the first item of a batch
+                waits for others to join
+            name (str): Name of the background thread
+        """
+        self.score_fn = score_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self.name = name
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.batch_size_counts = np.zeros(self.max_batch_size + 1, dtype=np.int64)
+        self.wait_counts = np.zeros(len(WAIT_BUCKETS_MS), dtype=np.int64)
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+
+    def submit(self, item):
+        """
+        Queue one item for the next batch.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the item's result
+        """
+        if self._pid != os.getpid():
+            self._start()
+        future = Future()
+        self._queue.put((time.perf_counter(), item, future))
+        return future
+
+    def _start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            self._thread = threading.Thread(target=self._run, args=(self._queue,),
+                                            name=self.name, daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def __call__(self, item, timeout=None):
+        """Submit one item and wait for its result."""
+        return self.submit(item).result(timeout)
+
+    def _run(self, pending):
+        while True:
+            batch = [pending.get()]
+            deadline = batch[0][0] + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    if remaining > 0:
+                        batch.append(pending.get(timeout=remaining))
+                    else:
+                        batch.append(pending.get_nowait())
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        started = time.perf_counter()
+        self._record(len(batch), [(started - enqueued) * 1000 for enqueued, _, _ in batch])
+
+        try:
+            results = self.score_fn([item for _, item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"score_fn returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            results = [e] * len(batch)
+
+        for (_, _, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _record(self, size, waits_ms):
+        buckets = np.searchsorted(WAIT_BUCKETS_MS, waits_ms)
+        with self._stats_lock:
+            self.batches += 1
+            self.items += size
+            self.batch_size_counts[size] += 1
+            np.add.at(self.wait_counts, buckets, 1)
+            self.wait_total_ms += sum(waits_ms)
+            self.wait_max_ms = max(self.wait_max_ms, max(waits_ms))
+
+    def stats(self):
+        """
+        Get queue and batching statistics.
+
+        Returns:
+            dict: queue_depth, batches, items, mean_batch_size, the
+            batch_size_histogram (size -> count), and the added wait
+            (mean/max in ms plus a cumulative histogram keyed by bucket
+            upper edge)
+        """
+        with self._stats_lock:
+            sizes = {
+                int(size): int(count)
+                for size, count in enumerate(self.batch_size_counts) if count
+            }
+            cumulative = np.cumsum(self.wait_counts)
+            return {
+                'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'batches': self.batches,
+                'items': self.items,
+                'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+                'batch_size_histogram': sizes,
+                'wait_ms_mean': self.wait_total_ms / self.items if self.items else 0.0,
+                'wait_ms_max': self.wait_max_ms,
+                'wait_ms_histogram': {
+                    ('+Inf' if edge == float('inf') else str(edge)): int(count)
+                    for edge, count in zip(WAIT_BUCKETS_MS, cumulative)
+                }
+            }
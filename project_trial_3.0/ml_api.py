@@ -1,19 +1,380 @@
-from flask import Flask, request, jsonify
+import os
+import time
+from flask import Flask, Response, g, request, jsonify
 from predictor import SkinDiseaseMLModel
+from inference_policy import InferencePolicy
+from micro_batcher import MicroBatcher
+from model_registry import ModelRegistry
+from metrics import Metrics, error_type
+from doctor_directory import DoctorDirectory, DEFAULT_PATH as DEFAULT_DOCTOR_DIRECTORY
+from validation import RequestValidator, ValidationError
+from drift_monitor import DriftMonitor, DEFAULT_REFERENCE_PATH as DEFAULT_DRIFT_REFERENCE
 
 app = Flask(__name__)
 
-model = SkinDiseaseMLModel()
+# Per-stage timers, request histograms and error counters, served on /metrics
+metrics = Metrics(enabled=os.environ.get("ML_METRICS", "1") == "1")
+
+policy = InferencePolicy(
+    sequential_max_rows=int(os.environ.get("ML_SEQUENTIAL_MAX_ROWS", 256)),
+    rows_per_worker=int(os.environ.get("ML_ROWS_PER_WORKER", 512)),
+    max_workers_per_call=int(os.environ.get("ML_MAX_WORKERS_PER_CALL", 4)),
+    max_total_workers=int(os.environ["ML_MAX_TOTAL_WORKERS"]) if os.environ.get("ML_MAX_TOTAL_WORKERS") else None
+)
+
+# Live inputs and predictions scored against the training-time profile, served
+# on /drift; e.g. ML_DRIFT_SNAPSHOT="drift_{pid}.json" writes a snapshot per worker
+drift_reference = os.environ.get("ML_DRIFT_REFERENCE", DEFAULT_DRIFT_REFERENCE)
+monitor = DriftMonitor.from_path(
+    drift_reference,
+    snapshot_path=os.environ.get("ML_DRIFT_SNAPSHOT") or None,
+    snapshot_interval=float(os.environ.get("ML_DRIFT_SNAPSHOT_SECONDS", 60)),
+    min_rows=int(os.environ.get("ML_DRIFT_MIN_ROWS", 200))
+) if os.environ.get("ML_DRIFT", "1") == "1" and os.path.exists(drift_reference) else None
+
+def load_model():
+    return SkinDiseaseMLModel(
+        cache_size=int(os.environ.get("ML_CACHE_SIZE", 4096)),
+        cache_ttl=float(os.environ["ML_CACHE_TTL"]) if os.environ.get("ML_CACHE_TTL") else None,
+        compiled_model_path=os.environ.get("ML_COMPILED_MODEL"),
+        mmap_mode=os.environ.get("ML_MMAP_MODE") or None,
+        bundle_path=os.environ.get("ML_BUNDLE"),
+        warmup=os.environ.get("ML_WARMUP", "1") == "1",
+        inference_policy=policy,
+        metrics=metrics,
+        monitor=monitor
+    )
+
+# New artifact versions are loaded in the background and swapped in atomically
+registry = ModelRegistry(
+    load_model,
+    poll_interval=float(os.environ.get("ML_RELOAD_POLL_SECONDS", 0))
+)
+
+# SkinIssue export (a local JSON file standing in for MongoDB), re-indexed on change
+directory = DoctorDirectory(
+    os.environ.get("ML_DOCTOR_DIRECTORY", DEFAULT_DOCTOR_DIRECTORY),
+    poll_interval=float(os.environ.get("ML_DOCTOR_DIRECTORY_POLL_SECONDS", 5))
+)
+
+# Unseen categories of these features are replaced instead of rejected,
+# e.g. ML_UNKNOWN_CATEGORY_FALLBACK="location=body,texture=smooth"
+fallback_categories = dict(
+    item.split("=", 1) for item in os.environ.get("ML_UNKNOWN_CATEGORY_FALLBACK", "").split(",") if item
+)
+_validators = {}
+
+def validator_for(model):
+    """Request validator compiled from the serving model's schema (once per version)."""
+    validator = _validators.get(model.version)
+    if validator is None:
+        validator = RequestValidator.from_model(
+            model, fallback=fallback_categories,
+            allow_extra=os.environ.get("ML_ALLOW_EXTRA_FEATURES", "0") == "1"
+        )
+        _validators.clear()
+        _validators[model.version] = validator
+    return validator
+
+def score_cases(cases):
+    """Score a micro-batch of /predict bodies; bad cases fail individually."""
+    model = registry.current
+    predictions, errors = model.predict_batch(cases, return_errors=True)
+    count_errors(errors.values(), model)
+    return [
+        ValueError(errors[i]) if i in errors
+        else {"predicted_disease": disease, "model_version": model.version}
+        for i, disease in enumerate(predictions)
+    ]
+
+# Concurrent /predict calls are merged into one vectorized call when enabled
+batcher = None
+if os.environ.get("ML_MICROBATCH", "0") == "1":
+    batcher = MicroBatcher(
+        score_cases,
+        max_batch_size=int(os.environ.get("ML_MICROBATCH_MAX_SIZE", 32)),
+        max_wait_ms=float(os.environ.get("ML_MICROBATCH_MAX_WAIT_MS", 2))
+    )
+    print(f"Micro-batching enabled: up to {batcher.max_batch_size} cases "
+          f"or {batcher.max_wait * 1000:g} ms per batch")
+
+def count_errors(messages, model):
+    categorical = model._category_arrays
+    for message in messages:
+        metrics.inc("errors_total", labels=(("type", error_type(message, categorical)),))
+
+def parse_json(silent=False):
+    started = time.perf_counter()
+    data = request.get_json(silent=silent)
+    metrics.observe_stage("parse_json", time.perf_counter() - started)
+    return data
+
+def serving_model():
+    """The model serving this request, read once so every response names the same version."""
+    if "model" not in g:
+        g.model = registry.current
+    return g.model
+
+def respond(payload, status=200):
+    started = time.perf_counter()
+    response = jsonify(payload)
+    metrics.observe_stage("serialize", time.perf_counter() - started)
+    return response, status
+
+def error_response(payload, status=400):
+    """4xx body tagged with the version of the model the request was served by."""
+    return jsonify({**payload, "model_version": serving_model().version}), status
+
+def validated_case(model):
+    """Parse and validate a single-case body; raises ValidationError."""
+    data = parse_json(silent=True)
+    started = time.perf_counter()
+    try:
+        return validator_for(model).check(data)
+    finally:
+        metrics.observe_stage("validate", time.perf_counter() - started)
+
+@app.errorhandler(ValidationError)
+def invalid_request(error):
+    for item in error.errors:
+        metrics.inc("errors_total", labels=(("type", item["code"]),))
+    return error_response(error.to_dict(), error.status)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.observe("request_seconds", time.perf_counter() - g.request_started,
+                    (("endpoint", endpoint),))
+    metrics.inc("requests_total", labels=(("endpoint", endpoint),
+                                          ("status", str(response.status_code))))
+    return response
+
+@app.teardown_request
+def record_failure(exc):
+    # Unhandled exceptions (e.g. an unseen category on /predict)
+    if exc is not None:
+        count_errors([exc], serving_model())
 
 @app.route("/predict", methods=["POST"])
 def predict():
-    data = request.json
+    model = serving_model()
+    data, warnings = validated_case(model)
+    top_k = request.args.get("top_k", type=int) or None
+    budget_ms = request.args.get("budget_ms", type=float)
+    explain = (request.args.get("explain_features", 5, type=int)
+               if request.args.get("explain") == "1" else None)
 
-    disease = model.predict_from_dict(data)
+    # Opt-in early exit: stop evaluating trees once the label is settled
+    # or the time budget is spent
+    if budget_ms is not None or request.args.get("early_exit") == "1":
+        if explain is not None:
+            return error_response({"error": "explain=1 needs every tree; drop early_exit/budget_ms"})
+        try:
+            result = model.predict_early_exit(budget_ms=budget_ms, top_k=top_k, **data)
+        except TypeError as e:
+            return error_response({"error": str(e)})
+        payload = {
+            "predicted_disease": result["disease"],
+            "confidence": result["confidence"],
+            "trees_evaluated": result["trees_evaluated"],
+            "n_trees": result["n_trees"],
+            "exact": result["exact"],
+            "model_version": model.version
+        }
+        if top_k:
+            payload["top_k"] = [
+                {"disease": name, "probability": probability}
+                for name, probability in result["top_k"]
+            ]
+    # Opt-in differential diagnosis and per-feature explanation, served from
+    # the same inference pass
+    elif top_k or explain is not None:
+        try:
+            disease, confidence, *extra = model.predict_with_confidence(
+                top_k=top_k, explain=explain, **data)
+        except (TypeError, ValueError) as e:
+            return error_response({"error": str(e)})
+        payload = {
+            "predicted_disease": disease,
+            "confidence": confidence,
+            "model_version": model.version
+        }
+        if top_k:
+            payload["top_k"] = [
+                {"disease": name, "probability": probability}
+                for name, probability in extra.pop(0)
+            ]
+        if explain is not None:
+            explanation = extra.pop(0)
+            payload["explanation"] = {
+                "units": explanation["units"],
+                "baseline": explanation["baseline"],
+                "contributions": [
+                    {"feature": name, "value": data[name], "contribution": contribution}
+                    for name, contribution in explanation["contributions"]
+                ]
+            }
+    elif batcher is not None:
+        payload = batcher(data)
+    else:
+        payload = {
+            "predicted_disease": model.predict_from_dict(data),
+            "model_version": model.version
+        }
 
-    return jsonify({
-        "predicted_disease": disease
+    if warnings:
+        payload = {**payload, "warnings": warnings}
+    return respond(payload)
+
+@app.route("/predict_and_recommend", methods=["POST"])
+def predict_and_recommend():
+    """Diagnosis plus recommended doctors in one call (no MongoDB round-trip)."""
+    model = serving_model()
+    data, warnings = validated_case(model)
+    top_k = request.args.get("top_k", type=int)
+
+    if top_k:
+        disease, confidence, alternatives = model.predict_with_confidence(top_k=top_k, **data)
+    else:
+        disease, confidence = model.predict_with_confidence(**data)
+
+    started = time.perf_counter()
+    location = request.args.get("doctor_location")
+    try:
+        # Doctors in the stored order, like the MongoDB lookup; ?sort=rating for best rated first
+        recommendation = directory.recommend(disease, location=location,
+                                             limit=request.args.get("limit", type=int),
+                                             sort=request.args.get("sort") or None)
+    except ValueError as e:
+        return error_response({"error": str(e)})
+    metrics.observe_stage("recommend", time.perf_counter() - started)
+
+    payload = {
+        "predicted_disease": disease,
+        "confidence": confidence,
+        "condition": recommendation["condition"],
+        "doctors": recommendation["doctors"],
+        "doctor_location": location,
+        "model_version": model.version,
+        "directory_version": recommendation["directory_version"]
+    }
+    if top_k:
+        payload["top_k"] = [
+            {"disease": name, "probability": probability}
+            for name, probability in alternatives
+        ]
+    if warnings:
+        payload["warnings"] = warnings
+    return respond(payload)
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    data = parse_json(silent=True)
+    model = serving_model()
+
+    # Accept a bare list of cases, {"cases": [...]}, or a columnar object
+    if isinstance(data, dict) and "cases" in data:
+        data = data["cases"]
+    if not isinstance(data, (list, dict)):
+        return error_response({"error": "Expected a list of cases or a columnar object"})
+
+    # Vectorized validation; only valid rows reach the model
+    valid_idx, columns, invalid, warnings = validator_for(model).validate_batch(data)
+    for row_errors in invalid.values():
+        for item in row_errors:
+            metrics.inc("errors_total", labels=(("type", item["code"]),))
+
+    predictions, errors = model.predict_batch(columns, return_errors=True) if len(valid_idx) else ([], {})
+    count_errors(errors.values(), model)
+
+    results = [None] * (len(valid_idx) + len(invalid))
+    for i, row_errors in invalid.items():
+        results[i] = {"index": i, "error": "; ".join(e["message"] for e in row_errors),
+                      "errors": row_errors}
+    for j, (i, disease) in enumerate(zip(valid_idx.tolist(), predictions)):
+        if j in errors:
+            results[i] = {"index": i, "error": errors[j]}
+        else:
+            results[i] = {"index": i, "predicted_disease": disease}
+            if i in warnings:
+                results[i]["warnings"] = warnings[i]
+    n_errors = len(invalid) + len(errors)
+
+    return respond({
+        "results": results,
+        "n_predicted": len(results) - n_errors,
+        "n_errors": n_errors,
+        "model_version": model.version
     })
 
+@app.route("/health", methods=["GET"])
+def health():
+    return jsonify({"status": "ok", "pid": os.getpid(), "model_version": registry.current.version})
+
+@app.route("/admin/model", methods=["GET"])
+def model_status():
+    return jsonify(registry.describe())
+
+@app.route("/admin/directory", methods=["GET"])
+def directory_status():
+    return jsonify(directory.describe())
+
+@app.route("/admin/reload", methods=["POST"])
+def reload_model():
+    result = registry.reload(
+        wait=request.args.get("wait", "0") == "1",
+        force=request.args.get("force", "0") == "1"
+    )
+    if result["status"] == "failed":
+        return jsonify(result), 500
+    if result["status"] in ("started", "in_progress"):
+        return jsonify(result), 202
+    return jsonify(result)
+
+def model_gauges():
+    model = registry.current
+    gauges = [
+        ("model_info", "Serving model version", (("version", model.version),), 1),
+        ("model_loaded_timestamp_seconds", "When the serving model was swapped in", (), registry.loaded_at),
+    ]
+    cache = model.cache_stats()
+    if cache is not None:
+        for key in ("size", "hits", "misses", "evictions", "expirations"):
+            gauges.append((f"cache_{key}", f"Prediction cache {key}", (), cache[key]))
+    if batcher is not None:
+        stats = batcher.stats()
+        for key in ("queue_depth", "batches", "items"):
+            gauges.append((f"batcher_{key}", f"Micro-batcher {key}", (), stats[key]))
+    if monitor is not None:
+        report = monitor.report()
+        gauges.append(("drift_rows", "Rows counted by the drift monitor", (), report["rows"]))
+        for name, section in list(report["features"].items()) + [("prediction", report["predictions"])]:
+            if section["psi"] is not None:
+                gauges.append(("drift_psi", "Population stability index against the training profile",
+                               (("feature", name),), section["psi"]))
+    return gauges
+
+metrics.add_gauges(model_gauges)
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/drift", methods=["GET"])
+def drift():
+    if monitor is None:
+        return jsonify({"enabled": False, "reference": drift_reference})
+    return jsonify({"enabled": True, "pid": os.getpid(), **monitor.report()})
+
+@app.route("/batcher/stats", methods=["GET"])
+def batcher_stats():
+    if batcher is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **batcher.stats()})
+
 if __name__ == "__main__":
     app.run(port=8000)
@@ -1,6 +1,12 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split, StratifiedKFold
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.linear_model import LogisticRegression
@@ -9,175 +15,589 @@ from sklearn.metrics import classification_report, confusion_matrix, accuracy_sc
 from sklearn.pipeline import Pipeline
 import joblib
 import warnings
+from model_bundle import save_bundle
+from tree_engine import write_atomic
+from drift_monitor import DEFAULT_REFERENCE_PATH, build_reference, save_reference
 warnings.filterwarnings('ignore')
 
-# Load the dataset
-print("Loading dataset")
-df = pd.read_csv('skin_disease_dataset.csv')
-print(f"Dataset loaded: {df.shape}")
-
-# Separate features and target
-X = df.drop('disease', axis=1)
-y = df['disease']
-
-# Encoding the categorical features
-print("\nEncoding categorical features.")
-label_encoders = {}
-categorical_features = ['location', 'color', 'texture', 'size', 'gender']
-
-for col in categorical_features:
-    le = LabelEncoder()
-    X[col] = le.fit_transform(X[col])
-    label_encoders[col] = le
-
-# Save label encoders
-joblib.dump(label_encoders, 'label_encoders.pkl')
-print("Label encoders saved!")
-
-# Encode target variable
-disease_encoder = LabelEncoder()
-y_encoded = disease_encoder.fit_transform(y)
-joblib.dump(disease_encoder, 'disease_encoder.pkl')
-print(f"Disease encoder saved and the classes: {list(disease_encoder.classes_)}")
-
-# Split the data
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded
-)
-print(f"\nTraining set: {X_train.shape}")
-print(f"Test set: {X_test.shape}")
-
-# Create and train multiple models
-print("\n" + "="*60)
-print("TRAINING MULTIPLE MODELS")
-print("="*60)
-
-models = {
-    'Random Forest': RandomForestClassifier(
-        n_estimators=200,
-        max_depth=20,
-        min_samples_split=5,
-        min_samples_leaf=2,
-        random_state=42,
-        n_jobs=-1
-    ),
-    'Gradient Boosting': GradientBoostingClassifier(
-        n_estimators=150,
-        learning_rate=0.1,
-        max_depth=7,
-        random_state=42
-    ),
-    'Logistic Regression': Pipeline([
-        ('scaler', StandardScaler()),
-        ('classifier', LogisticRegression(
-            max_iter=1000,
-            multi_class='multinomial',
-            random_state=42
-        ))
-    ]),
-    'SVM': Pipeline([
-        ('scaler', StandardScaler()),
-        ('classifier', SVC(
-            kernel='rbf',
-            C=10,
-            gamma='scale',
+CATEGORICAL_FEATURES = ['location', 'color', 'texture', 'size', 'gender']
+
+
+def load_dataset(path='skin_disease_dataset.csv', use_cache=True):
+    """
+    Load the dataset and label-encode features and target.
+
+    With use_cache, the encoded columns come from the dataset cache keyed by
+    the CSV's hash (built on first use), so the CSV is parsed only once.
+
+    Returns:
+        tuple: (X, y_encoded, label_encoders, disease_encoder)
+    """
+    if use_cache:
+        from dataset_cache import load_cached
+
+        started = time.perf_counter()
+        X, y_encoded, label_encoders, disease_encoder, cache_dir = load_cached(path)
+        print(f"Encoded dataset loaded from cache '{cache_dir}' in "
+              f"{time.perf_counter() - started:.2f}s: {X.shape[0]} rows")
+        return X, y_encoded, label_encoders, disease_encoder
+
+    print("Loading dataset")
+    df = pd.read_csv(path)
+    print(f"Dataset loaded: {df.shape}")
+
+    # Separate features and target
+    X = df.drop('disease', axis=1)
+    y = df['disease']
+
+    # Encoding the categorical features
+    print("\nEncoding categorical features.")
+    label_encoders = {}
+    for col in CATEGORICAL_FEATURES:
+        le = LabelEncoder()
+        X[col] = le.fit_transform(X[col])
+        label_encoders[col] = le
+
+    # Encode target variable
+    disease_encoder = LabelEncoder()
+    y_encoded = disease_encoder.fit_transform(y)
+
+    return X, y_encoded, label_encoders, disease_encoder
+
+
+def build_models():
+    """The candidate models, keyed by display name."""
+    return {
+        'Random Forest': RandomForestClassifier(
+            n_estimators=200,
+            max_depth=20,
+            min_samples_split=5,
+            min_samples_leaf=2,
             random_state=42,
-            probability=True
-        ))
-    ])
-}
-
-results = {}
-
-for name, model in models.items():
-    print("\n")
-    print(f"\nTraining {name}")
-    
-    # Train the model
-    model.fit(X_train, y_train)
-    
-    # Make predictions
-    y_pred = model.predict(X_test)
-    
-    # Calculate accuracy
-    accuracy = accuracy_score(y_test, y_pred)
-    results[name] = accuracy
-    
-    print(f"{name} Accuracy: {accuracy:.4f}")
-    
-    # Cross-validation score
-    cv_scores = cross_val_score(model, X_train, y_train, cv=5)
-    print(f"Cross-validation scores: {cv_scores}")
-    print(f"Mean CV score: {cv_scores.mean():.4f} (+/- {cv_scores.std() * 2:.4f})")
-
-# Select best model
-best_model_name = max(results, key=results.get)
-best_model = models[best_model_name]
-
-print(f"\n{'='*60}")
-print(f"Best Model: {best_model_name}")
-print(f"Accuracy: {results[best_model_name]:.4f}")
-print(f"{'='*60}")
-
-# Train final model on full training data
-print("\nTraining final model on full training data")
-best_model.fit(X_train, y_train)
-
-# Save the best model
-joblib.dump(best_model, 'skin_disease_model.pkl')
-print(f"Model saved as 'skin_disease_model.pkl'")
-
-# Detailed evaluation on test set
-print("\n" + "="*60)
-print("Details of evaluation on test set")
-print("="*60)
-
-y_pred = best_model.predict(X_test)
-
-print("\nClassification Report:")
-print(classification_report(
-    y_test, 
-    y_pred, 
-    target_names=disease_encoder.classes_
-))
-
-print("\nConfusion Matrix:")
-cm = confusion_matrix(y_test, y_pred)
-print(cm)
-
-# Feature importance
-if hasattr(best_model, 'feature_importances_'):
+            n_jobs=-1
+        ),
+        'Gradient Boosting': GradientBoostingClassifier(
+            n_estimators=150,
+            learning_rate=0.1,
+            max_depth=7,
+            random_state=42
+        ),
+        'Logistic Regression': Pipeline([
+            ('scaler', StandardScaler()),
+            ('classifier', LogisticRegression(
+                max_iter=1000,
+                multi_class='multinomial',
+                random_state=42
+            ))
+        ]),
+        'SVM': Pipeline([
+            ('scaler', StandardScaler()),
+            ('classifier', SVC(
+                kernel='rbf',
+                C=10,
+                gamma='scale',
+                random_state=42,
+                probability=True
+            ))
+        ])
+    }
+
+
+# ============================================================================
+# PARALLEL MODEL SELECTION
+# ============================================================================
+
+# Training data shipped once to every pool process by _init_worker
+_worker_data = {}
+
+
+def _init_worker(X_train, y_train, X_test, y_test):
+    _worker_data.update(X_train=X_train, y_train=y_train, X_test=X_test, y_test=y_test)
+
+
+def _for_job(estimator, fold):
+    """
+    Clone an estimator for one pool job.
+
+    Parallelism comes from the pool, so per-estimator n_jobs is pinned to 1.
+    Fold fits only need predict(), so SVC skips its internal 5-fold Platt
+    calibration (probability=True) there; its predictions do not depend on it.
+    """
+    estimator = clone(estimator)
+    params = estimator.get_params()
+    overrides = {name: 1 for name in params if name.endswith('n_jobs')}
+    if fold is not None:
+        overrides.update({name: False for name, value in params.items()
+                          if name.endswith('probability') and value is True})
+    if overrides:
+        estimator.set_params(**overrides)
+    return estimator
+
+
+def _run_job(name, estimator, fold, train_idx, test_idx):
+    """
+    Fit and score one (model, fold) pair in a pool process.
+
+    fold is None for the fit on the whole training set, which is scored on
+    the test set and returned as the final model.
+    """
+    data = _worker_data
+    if fold is None:
+        X_fit, y_fit = data['X_train'], data['y_train']
+        X_eval, y_eval = data['X_test'], data['y_test']
+    else:
+        X_fit, y_fit = data['X_train'].iloc[train_idx], data['y_train'][train_idx]
+        X_eval, y_eval = data['X_train'].iloc[test_idx], data['y_train'][test_idx]
+
+    estimator = _for_job(estimator, fold)
+    started = time.perf_counter()
+    estimator.fit(X_fit, y_fit)
+    fit_seconds = time.perf_counter() - started
+    score = accuracy_score(y_eval, estimator.predict(X_eval))
+    score_seconds = time.perf_counter() - started - fit_seconds
+
+    return {
+        'name': name,
+        'fold': fold,
+        'score': score,
+        'fit_seconds': fit_seconds,
+        'score_seconds': score_seconds,
+        'model': estimator if fold is None else None
+    }
+
+
+def evaluate_models(models, X_train, y_train, X_test, y_test, cv=5, workers=None):
+    """
+    Fit every candidate on the training set and on each CV fold, concurrently.
+
+    Each model gets cv fold fits plus one fit on the whole training set; the
+    latter is scored on the test set and kept as the final model, so nothing
+    is refit afterwards. Folds match cross_val_score(cv=cv).
+
+    Args:
+        models (dict): Name -> unfitted estimator
+        cv (int): Number of stratified folds
+        workers (int, optional): Process pool size (default: CPU count;
+            1 runs everything in this process)
+
+    Returns:
+        dict: Name -> {'model', 'accuracy', 'cv_scores', 'fit_seconds',
+        'fold_seconds', 'total_seconds'}
+    """
+    folds = list(StratifiedKFold(n_splits=cv).split(X_train, y_train))
+    jobs = []
+    # Whole-training-set fits are the longest jobs, so they are queued first
+    for name, estimator in models.items():
+        jobs.append((name, estimator, None, None, None))
+    for fold, (train_idx, test_idx) in enumerate(folds):
+        for name, estimator in models.items():
+            jobs.append((name, estimator, fold, train_idx, test_idx))
+
+    workers = workers or os.cpu_count() or 1
+    print(f"Running {len(jobs)} fits ({len(models)} models x ({cv} folds + 1)) "
+          f"on {workers} worker(s)")
+    if workers == 1:
+        _init_worker(X_train, y_train, X_test, y_test)
+        outcomes = [_run_job(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(X_train, y_train, X_test, y_test)) as pool:
+            futures = [pool.submit(_run_job, *job) for job in jobs]
+            outcomes = [future.result() for future in futures]
+
+    results = {name: {'cv_scores': np.zeros(cv), 'fold_seconds': np.zeros(cv)} for name in models}
+    for outcome in outcomes:
+        result = results[outcome['name']]
+        seconds = outcome['fit_seconds'] + outcome['score_seconds']
+        if outcome['fold'] is None:
+            result.update(model=outcome['model'], accuracy=outcome['score'], fit_seconds=seconds)
+        else:
+            result['cv_scores'][outcome['fold']] = outcome['score']
+            result['fold_seconds'][outcome['fold']] = seconds
+    for result in results.values():
+        result['total_seconds'] = result['fit_seconds'] + result['fold_seconds'].sum()
+    return results
+
+
+def print_timing(results, wall_seconds):
+    """Print per-model and per-fold fit+score times."""
     print("\n" + "="*60)
-    print("Feature Importance")
+    print("Timing breakdown (seconds, fit + score)")
     print("="*60)
-    
-    feature_importance = pd.DataFrame({
-        'feature': X.columns,
-        'importance': best_model.feature_importances_
-    }).sort_values('importance', ascending=False)
-    
-    print(feature_importance)
-elif hasattr(best_model, 'named_steps') and hasattr(best_model.named_steps['classifier'], 'feature_importances_'):
+    n_folds = len(next(iter(results.values()))['fold_seconds'])
+    header = f"{'Model':<28}{'full':>8}" + "".join(f"{f'fold {i}':>8}" for i in range(n_folds)) + f"{'total':>9}"
+    print(header)
+    for name, result in results.items():
+        folds = "".join(f"{s:>8.2f}" for s in result['fold_seconds'])
+        print(f"{name:<28}{result['fit_seconds']:>8.2f}{folds}{result['total_seconds']:>9.2f}")
+    busy = sum(r['total_seconds'] for r in results.values())
+    print(f"Wall time: {wall_seconds:.2f}s (summed fit time {busy:.2f}s)")
+
+
+# ============================================================================
+# SERVING COST AND SELECTION
+# ============================================================================
+
+COST_METRICS = ['single_ms', 'batch_us_per_row', 'artifact_kb', 'memory_kb']
+COMPARISON_FIELDS = ['model', 'accuracy', 'cv_mean'] + COST_METRICS + ['objective', 'selected']
+
+
+def measure_serving_cost(estimator, X, n_single=200, batch_size=1024, repeats=3):
+    """
+    Measure what serving an estimator costs.
+
+    Rows are passed as NumPy arrays, the way the predictor feeds them.
+
+    Args:
+        estimator: Fitted estimator
+        X (DataFrame): Rows to predict (e.g. the test split)
+        n_single (int): Single-row predict_proba calls timed
+        batch_size (int): Rows per batched call
+        repeats (int): Batched calls timed (the fastest counts)
+
+    Returns:
+        dict: single_ms (median single-row latency), batch_us_per_row,
+        artifact_kb (pickled size) and memory_kb (resident memory the
+        loaded model adds to a serving process; None where it cannot be
+        measured)
+    """
+    import pickle
+
+    rows = X.to_numpy()
+    estimator.predict_proba(rows[:1])
+    single = []
+    for row in rows[:n_single]:
+        started = time.perf_counter()
+        estimator.predict_proba(row.reshape(1, -1))
+        single.append(time.perf_counter() - started)
+
+    batch = rows[np.arange(batch_size) % len(rows)]
+    batched = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        estimator.predict_proba(batch)
+        batched.append(time.perf_counter() - started)
+
+    payload = pickle.dumps(estimator, protocol=pickle.HIGHEST_PROTOCOL)
+    return {
+        'single_ms': float(np.median(single)) * 1e3,
+        'batch_us_per_row': min(batched) / batch_size * 1e6,
+        'artifact_kb': len(payload) / 1024,
+        'memory_kb': _loaded_memory_kb(payload),
+    }
+
+
+# Run in a fresh interpreter: tree nodes are allocated in C and not visible
+# to tracemalloc, and this process's heap is too warm for an RSS delta.
+# Current RSS comes from /proc (ru_maxrss is inherited across exec on Linux).
+_MEMORY_PROBE = """
+import os, pickle, sys
+import numpy, sklearn.ensemble, sklearn.linear_model, sklearn.pipeline, sklearn.svm
+def rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+before = rss()
+with open(sys.argv[1], 'rb') as f:
+    model = pickle.load(f)
+print(max(rss() - before, 0) / 1024)
+"""
+
+
+def _loaded_memory_kb(payload):
+    """
+    RSS growth (KB) of a fresh interpreter from unpickling payload.
+
+    Returns:
+        float or None: None without /proc (macOS, Windows) or if the probe fails
+    """
+    import subprocess
+    import sys
+    import tempfile
+
+    if not os.path.exists('/proc/self/statm'):
+        return None
+    # delete=False: Windows cannot reopen a NamedTemporaryFile that is still open
+    with tempfile.NamedTemporaryFile(suffix='.pkl', delete=False) as f:
+        f.write(payload)
+    try:
+        output = subprocess.run([sys.executable, '-c', _MEMORY_PROBE, f.name],
+                                capture_output=True, text=True, check=True).stdout
+        return float(output.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+    finally:
+        os.remove(f.name)
+
+
+def _known_metrics(results):
+    """Cost metrics measured for every candidate."""
+    return [metric for metric in COST_METRICS
+            if all(r['cost'][metric] is not None for r in results.values())]
+
+
+def select_model(results, strategy='tolerance', tolerance=0.005, cost_metric='single_ms',
+                 weights=None):
+    """
+    Pick the model to ship from accuracy and serving cost.
+
+    Strategies:
+        accuracy   highest test accuracy (serving cost ignored)
+        tolerance  cheapest model by cost_metric among those within
+                   tolerance of the best accuracy
+        weighted   highest accuracy - sum(weight * log2(cost / cheapest cost)),
+                   i.e. each weight is the accuracy given up per doubling of
+                   that cost
+
+    A cost metric that could not be measured for every candidate (memory_kb
+    without /proc) is unknown: the tolerance strategy then ranks by accuracy
+    and the weighted strategy ignores that metric's weight.
+
+    Ties are broken by accuracy, then by name.
+
+    Args:
+        results (dict): evaluate_models() results with a 'cost' dict per model
+        strategy (str): 'accuracy', 'tolerance' or 'weighted'
+        tolerance (float): Absolute accuracy tolerance
+        cost_metric (str): One of COST_METRICS (tolerance strategy)
+        weights (dict, optional): COST_METRICS name -> weight (weighted strategy)
+
+    Returns:
+        tuple: (selected name, {name: objective}); larger objective is better
+    """
+    best_accuracy = max(r['accuracy'] for r in results.values())
+    known = _known_metrics(results)
+    if strategy == 'tolerance' and cost_metric not in known:
+        print(f"{cost_metric} is unknown on this platform; selecting by accuracy")
+        strategy = 'accuracy'
+    if strategy == 'accuracy':
+        objective = {name: r['accuracy'] for name, r in results.items()}
+    elif strategy == 'tolerance':
+        objective = {
+            name: -r['cost'][cost_metric] if r['accuracy'] >= best_accuracy - tolerance else -np.inf
+            for name, r in results.items()
+        }
+    elif strategy == 'weighted':
+        weights = {metric: weight for metric, weight in (weights or {}).items() if metric in known}
+        cheapest = {metric: max(min(r['cost'][metric] for r in results.values()), 1e-12)
+                    for metric in weights}
+        objective = {
+            name: r['accuracy'] - sum(
+                weight * np.log2(max(r['cost'][metric], 1e-12) / cheapest[metric])
+                for metric, weight in weights.items()
+            )
+            for name, r in results.items()
+        }
+    else:
+        raise ValueError(f"Unknown selection strategy: {strategy!r}")
+    selected = max(results, key=lambda name: (objective[name], results[name]['accuracy'], name))
+    return selected, objective
+
+
+def write_comparison(results, objective, selected, path='model_comparison.csv'):
+    """Write the accuracy / serving cost table of every candidate as CSV."""
+    rows = []
+    for name, result in sorted(results.items(), key=lambda item: -item[1]['accuracy']):
+        row = {'model': name, 'accuracy': round(result['accuracy'], 6),
+               'cv_mean': round(float(result['cv_scores'].mean()), 6)}
+        row.update({metric: None if result['cost'][metric] is None else round(result['cost'][metric], 4)
+                    for metric in COST_METRICS})
+        row['objective'] = round(float(objective[name]), 6)
+        row['selected'] = int(name == selected)
+        rows.append(row)
+    pd.DataFrame(rows, columns=COMPARISON_FIELDS).to_csv(path, index=False)
+    return rows
+
+
+def print_comparison(rows):
     print("\n" + "="*60)
-    print("Feature Importance")
+    print("Accuracy vs serving cost")
     print("="*60)
-    
-    feature_importance = pd.DataFrame({
-        'feature': X.columns,
-        'importance': best_model.named_steps['classifier'].feature_importances_
-    }).sort_values('importance', ascending=False)
-    
-    print(feature_importance)
-
-# Saving feature names
-joblib.dump(list(X.columns), 'feature_names.pkl')
-print("\nFeature names saved!")
-
-print("\n" + "="*60)
-print("Model training complete!")
-print("="*60)
-print("\nSaved files:")
-print("- skin_disease_model.pkl")
-print("- label_encoders.pkl")
-print("- disease_encoder.pkl")
-print("- feature_names.pkl")
\ No newline at end of file
+    print(f"{'Model':<28}{'acc':>8}{'1-row ms':>10}{'batch us/row':>14}{'pickle KB':>11}{'memory KB':>11}")
+    for row in rows:
+        marker = ' *' if row['selected'] else ''
+        memory = 'n/a' if row['memory_kb'] is None else f"{row['memory_kb']:.0f}"
+        print(f"{row['model']:<28}{row['accuracy']:>8.4f}{row['single_ms']:>10.3f}"
+              f"{row['batch_us_per_row']:>14.2f}{row['artifact_kb']:>11.0f}{memory:>11}{marker}")
+
+
+def _parse_weights(text):
+    weights = {}
+    for item in filter(None, text.split(',')):
+        metric, _, value = item.partition('=')
+        if metric not in COST_METRICS:
+            raise argparse.ArgumentTypeError(f"unknown cost metric {metric!r}; "
+                                             f"choose from {', '.join(COST_METRICS)}")
+        weights[metric] = float(value)
+    return weights
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and select the skin disease model")
+    parser.add_argument('--data', default='skin_disease_dataset.csv')
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Parse and encode the CSV instead of using the dataset cache")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Process pool size for model selection (default: CPU count)")
+    parser.add_argument('--cv', type=int, default=5)
+    parser.add_argument('--search', action='store_true',
+                        help="Tune hyperparameters with successive halving first; the "
+                             "winner competes with the default candidates")
+    parser.add_argument('--search-max-fits', type=int, default=None)
+    parser.add_argument('--search-max-seconds', type=float, default=None)
+    parser.add_argument('--search-checkpoint', default='search_checkpoint.json',
+                        help="Finished search fits; rerunning resumes from it")
+    parser.add_argument('--selection', choices=['accuracy', 'tolerance', 'weighted'],
+                        default='tolerance',
+                        help="How the shipped model is chosen (see select_model)")
+    parser.add_argument('--accuracy-tolerance', type=float, default=0.005,
+                        help="Accuracy the tolerance strategy may give up for a cheaper model")
+    parser.add_argument('--cost-metric', choices=COST_METRICS, default='single_ms',
+                        help="Cost minimized by the tolerance strategy")
+    parser.add_argument('--cost-weights', type=_parse_weights,
+                        default='single_ms=0.002,artifact_kb=0.001',
+                        help="Weighted strategy: accuracy given up per doubling of each cost")
+    parser.add_argument('--comparison', default='model_comparison.csv',
+                        help="Where the accuracy / serving cost table is written")
+    args = parser.parse_args(argv)
+
+    X, y_encoded, label_encoders, disease_encoder = load_dataset(args.data, use_cache=not args.no_cache)
+
+    print(f"Disease classes: {list(disease_encoder.classes_)}")
+
+    # Split the data
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded
+    )
+    print(f"\nTraining set: {X_train.shape}")
+    print(f"Test set: {X_test.shape}")
+
+    # Create and train multiple models
+    print("\n" + "="*60)
+    print("TRAINING MULTIPLE MODELS")
+    print("="*60)
+
+    models = build_models()
+    if args.search:
+        from hyperparam_search import successive_halving, tuned_estimator, print_result
+
+        print("\nHyperparameter search (successive halving)")
+        search = successive_halving(
+            models, X_train, y_train, max_fits=args.search_max_fits,
+            max_seconds=args.search_max_seconds, workers=args.workers,
+            checkpoint=args.search_checkpoint
+        )
+        print_result(search)
+        if search['best']:
+            models[f"{search['best']['model']} (tuned)"] = tuned_estimator(models, search)
+
+    started = time.perf_counter()
+    results = evaluate_models(models, X_train, y_train, X_test, y_test,
+                              cv=args.cv, workers=args.workers)
+    wall_seconds = time.perf_counter() - started
+
+    for name, result in results.items():
+        cv_scores = result['cv_scores']
+        print("\n")
+        print(f"{name} Accuracy: {result['accuracy']:.4f}")
+        print(f"Cross-validation scores: {cv_scores}")
+        print(f"Mean CV score: {cv_scores.mean():.4f} (+/- {cv_scores.std() * 2:.4f})")
+
+    print_timing(results, wall_seconds)
+
+    # Serving cost of every candidate (already fit on the full training data)
+    for result in results.values():
+        result['cost'] = measure_serving_cost(result['model'], X_test)
+
+    best_model_name, objective = select_model(
+        results, args.selection, args.accuracy_tolerance, args.cost_metric, args.cost_weights
+    )
+    best_model = results[best_model_name]['model']
+    comparison = write_comparison(results, objective, best_model_name, args.comparison)
+    print_comparison(comparison)
+    print(f"Comparison table saved as '{args.comparison}'")
+
+    most_accurate = max(results, key=lambda name: results[name]['accuracy'])
+    print(f"\n{'='*60}")
+    print(f"Best Model: {best_model_name} (selection: {args.selection})")
+    print(f"Accuracy: {results[best_model_name]['accuracy']:.4f}")
+    if most_accurate != best_model_name:
+        print(f"Most accurate: {most_accurate} ({results[most_accurate]['accuracy']:.4f}), "
+              f"{results[most_accurate]['cost']['single_ms'] / results[best_model_name]['cost']['single_ms']:.1f}x "
+              f"the single-row latency")
+    print(f"{'='*60}")
+
+    # Save the best model, then its encoders and feature names right after it.
+    # Each file is replaced atomically and all four are written back to back,
+    # so a serving process watching them never loads a half-written pickle
+    # (and model_registry rejects encoders that do not match the model).
+    write_atomic('skin_disease_model.pkl', lambda f: joblib.dump(best_model, f))
+    print(f"Model saved as 'skin_disease_model.pkl'")
+    write_atomic('label_encoders.pkl', lambda f: joblib.dump(label_encoders, f))
+    print("Label encoders saved!")
+    write_atomic('disease_encoder.pkl', lambda f: joblib.dump(disease_encoder, f))
+    print("Disease encoder saved!")
+    write_atomic('feature_names.pkl', lambda f: joblib.dump(list(X.columns), f))
+    print("Feature names saved!")
+
+    # Detailed evaluation on test set
+    print("\n" + "="*60)
+    print("Details of evaluation on test set")
+    print("="*60)
+
+    y_pred = best_model.predict(X_test)
+
+    print("\nClassification Report:")
+    print(classification_report(
+        y_test,
+        y_pred,
+        target_names=disease_encoder.classes_
+    ))
+
+    print("\nConfusion Matrix:")
+    cm = confusion_matrix(y_test, y_pred)
+    print(cm)
+
+    # Feature importance
+    if hasattr(best_model, 'feature_importances_'):
+        importances = best_model.feature_importances_
+    elif hasattr(best_model, 'named_steps') and hasattr(best_model.named_steps['classifier'], 'feature_importances_'):
+        importances = best_model.named_steps['classifier'].feature_importances_
+    else:
+        importances = None
+
+    if importances is not None:
+        print("\n" + "="*60)
+        print("Feature Importance")
+        print("="*60)
+
+        feature_importance = pd.DataFrame({
+            'feature': X.columns,
+            'importance': importances
+        }).sort_values('importance', ascending=False)
+
+        print(feature_importance)
+
+    # Save everything again as a single versioned bundle (fast, memory-mappable loading)
+    manifest = save_bundle('model_bundle', best_model, label_encoders, disease_encoder, list(X.columns))
+    print(f"Model bundle saved to 'model_bundle/' ({manifest['engine']}, "
+          f"version {manifest['content_hash'][:12]})")
+
+    # Training-time profile the serving drift monitor compares live traffic with
+    save_reference(build_reference(X, y_pred, list(X.columns), label_encoders, disease_encoder))
+    print(f"Drift reference profile saved to '{DEFAULT_REFERENCE_PATH}'")
+
+    print("\n" + "="*60)
+    print("Model training complete!")
+    print("="*60)
+    print("\nSaved files:")
+    print("- skin_disease_model.pkl")
+    print("- label_encoders.pkl")
+    print("- disease_encoder.pkl")
+    print("- feature_names.pkl")
+    print("- model_bundle/")
+    print(f"- {DEFAULT_REFERENCE_PATH}")
+    print(f"- {args.comparison}")
+
+
+if __name__ == '__main__':
+    main()
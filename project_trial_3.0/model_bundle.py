@@ -0,0 +1,246 @@
+"""
+Single versioned model bundle.
+
+A bundle is one directory that replaces the four pickles:
+
+    model_bundle/
+        manifest.json   versions, input schema, per-file sha256, content hash
+        model/          tree ensembles: compiled node arrays (tree_engine format,
+                        optionally quantized with build --quantize)
+        model.pkl       other estimators: uncompressed joblib pickle
+
+The arrays are stored as uncompressed .npy files, so they can be
+memory-mapped. The encoders are rebuilt from the category lists in the
+manifest, so loading a tree bundle needs NumPy only. The content hash covers
+the schema and every file of the engine's payload and is used as the model
+version; a payload left by an earlier save with the other engine is removed.
+
+Usage:
+    python model_bundle.py build [--out model_bundle] [--quantize]   (from the training pickles)
+    python model_bundle.py inspect [model_bundle] [--verify]
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+
+BUNDLE_FORMAT = 'skin_disease_bundle'
+BUNDLE_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+COMPILED_DIR = 'model'
+PICKLE_FILE = 'model.pkl'
+# What each engine stores next to the manifest
+_PAYLOADS = {'compiled_trees': COMPILED_DIR, 'pickle': PICKLE_FILE}
+
+NUMERICAL_RANGES = {'duration_days': [0, 3650], 'age': [0, 120]}
+BINARY_FEATURES = ['itching', 'pain', 'scaling', 'spreading', 'family_history', 'seasonal_variation']
+
+
+def save_bundle(out_dir, model, label_encoders, disease_encoder, feature_names,
+                quantize=False, value_dtype='float32'):
+    """
+    Write a model and its encoders as a versioned bundle.
+
+    Tree ensembles are stored as compiled arrays; any other estimator is
+    stored as an uncompressed joblib pickle.
+
+    Args:
+        out_dir (str): Bundle directory (created if needed)
+        model: Fitted estimator
+        label_encoders (dict): Feature name -> fitted LabelEncoder
+        disease_encoder: Fitted LabelEncoder of the target
+        feature_names (list): Model column order
+        quantize (bool): Store tree ensembles in the compact quantized format
+        value_dtype (str): Leaf value dtype of the quantized format
+
+    Returns:
+        dict: The written manifest
+    """
+    from tree_engine import export_model, write_atomic
+
+    os.makedirs(out_dir, exist_ok=True)
+    try:
+        export_model(model, os.path.join(out_dir, COMPILED_DIR),
+                     label_encoders, disease_encoder, feature_names,
+                     quantize=quantize, value_dtype=value_dtype)
+        engine = 'compiled_trees'
+    except TypeError:
+        import joblib
+        write_atomic(os.path.join(out_dir, PICKLE_FILE), lambda f: joblib.dump(model, f))
+        engine = 'pickle'
+
+    schema = {
+        'feature_names': list(feature_names),
+        'categorical_features': {
+            col: [str(c) for c in le.classes_] for col, le in label_encoders.items()
+        },
+        'numerical_features': NUMERICAL_RANGES,
+        'binary_features': BINARY_FEATURES,
+        'diseases': [str(c) for c in disease_encoder.classes_],
+    }
+    files = _hash_files(out_dir, _PAYLOADS[engine])
+    manifest = {
+        'format': BUNDLE_FORMAT,
+        'bundle_version': BUNDLE_VERSION,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'engine': engine,
+        'estimator': type(model).__name__,
+        'versions': _library_versions(),
+        'schema': schema,
+        'files': files,
+        'content_hash': _content_hash(schema, files),
+    }
+    # Written last: a watcher seeing the new manifest sees a complete bundle
+    write_atomic(os.path.join(out_dir, MANIFEST_FILE),
+                 lambda f: f.write(json.dumps(manifest, indent=2).encode()))
+    # A previous save with the other engine left its payload behind; it is
+    # not in the manifest and only removed once the new manifest is in place
+    for other, payload in _PAYLOADS.items():
+        stale = os.path.join(out_dir, payload)
+        if other != engine and os.path.isdir(stale):
+            shutil.rmtree(stale)
+        elif other != engine and os.path.exists(stale):
+            os.remove(stale)
+    return manifest
+
+
+def read_manifest(path):
+    """Read and check a bundle manifest."""
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get('format') != BUNDLE_FORMAT:
+        raise ValueError(f"{path} is not a model bundle")
+    if manifest.get('bundle_version') != BUNDLE_VERSION:
+        raise ValueError(f"Unsupported bundle version {manifest.get('bundle_version')} in {path}")
+    return manifest
+
+
+def verify_bundle(path, manifest=None):
+    """
+    Recompute the file hashes of a bundle.
+
+    Raises:
+        ValueError: If any file is missing, changed or unexpected
+    """
+    manifest = manifest or read_manifest(path)
+    actual = _hash_files(path, _PAYLOADS[manifest['engine']])
+    expected = manifest['files']
+    changed = sorted(name for name in actual.keys() | expected.keys()
+                     if actual.get(name) != expected.get(name))
+    if changed:
+        raise ValueError(f"Bundle {path} does not match its manifest: {changed}")
+    if _content_hash(manifest['schema'], actual) != manifest['content_hash']:
+        raise ValueError(f"Bundle {path} content hash mismatch")
+
+
+def load_bundle(path, mmap_mode='r', verify=False):
+    """
+    Load a bundle with everything the predictor needs.
+
+    Args:
+        path (str): Bundle directory
+        mmap_mode (str, optional): How numeric arrays are mapped ('r' shares
+            them read-only between processes, None reads them into memory)
+        verify (bool): Recompute file hashes before loading
+
+    Returns:
+        tuple: (model, label_encoders, disease_encoder, feature_names, manifest)
+    """
+    from tree_engine import ExportedLabelEncoder
+
+    manifest = read_manifest(path)
+    if verify:
+        verify_bundle(path, manifest)
+
+    if manifest['engine'] == 'compiled_trees':
+        from tree_engine import CompiledForest
+        model = CompiledForest.load(os.path.join(path, COMPILED_DIR), mmap_mode=mmap_mode)
+    else:
+        import joblib
+        model = joblib.load(os.path.join(path, PICKLE_FILE), mmap_mode=mmap_mode)
+
+    schema = manifest['schema']
+    label_encoders = {
+        col: ExportedLabelEncoder(classes)
+        for col, classes in schema['categorical_features'].items()
+    }
+    disease_encoder = ExportedLabelEncoder(schema['diseases'])
+    return model, label_encoders, disease_encoder, list(schema['feature_names']), manifest
+
+
+def _hash_files(root, payload):
+    """sha256 and size of every file of the payload (a file or directory under root)."""
+    files = {}
+    top = os.path.join(root, payload)
+    walk = os.walk(top) if os.path.isdir(top) else [(root, [], [payload] if os.path.exists(top) else [])]
+    for dirpath, _, filenames in walk:
+        for filename in sorted(filenames):
+            full = os.path.join(dirpath, filename)
+            name = os.path.relpath(full, root).replace(os.sep, '/')
+            digest = hashlib.sha256()
+            with open(full, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+            files[name] = {'sha256': digest.hexdigest(), 'bytes': os.path.getsize(full)}
+    return dict(sorted(files.items()))
+
+
+def _content_hash(schema, files):
+    payload = json.dumps({'schema': schema, 'files': files}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _library_versions():
+    versions = {'python': platform.python_version()}
+    for name in ('numpy', 'sklearn', 'joblib'):
+        module = sys.modules.get(name)
+        if module is not None:
+            versions[name] = getattr(module, '__version__', 'unknown')
+    return versions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect a model bundle")
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help="Build a bundle from the training pickles")
+    build.add_argument('--model', default='skin_disease_model.pkl')
+    build.add_argument('--label-encoders', default='label_encoders.pkl')
+    build.add_argument('--disease-encoder', default='disease_encoder.pkl')
+    build.add_argument('--feature-names', default='feature_names.pkl')
+    build.add_argument('--out', default='model_bundle')
+    build.add_argument('--quantize', action='store_true',
+                       help="Store tree ensembles in the compact quantized format")
+    build.add_argument('--value-dtype', choices=['float32', 'float16'], default='float32')
+    inspect = sub.add_parser('inspect', help="Print a bundle manifest")
+    inspect.add_argument('path', nargs='?', default='model_bundle')
+    inspect.add_argument('--verify', action='store_true')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        import joblib
+        import sklearn  # noqa: F401  (recorded in the manifest versions)
+        manifest = save_bundle(
+            args.out, joblib.load(args.model), joblib.load(args.label_encoders),
+            joblib.load(args.disease_encoder), joblib.load(args.feature_names),
+            quantize=args.quantize, value_dtype=args.value_dtype
+        )
+        print(f"Bundle written to '{args.out}' ({manifest['engine']}, "
+              f"version {manifest['content_hash'][:12]})")
+        return 0
+
+    manifest = read_manifest(args.path)
+    if args.verify:
+        verify_bundle(args.path, manifest)
+        print("Bundle verified.")
+    summary = {k: v for k, v in manifest.items() if k not in ('schema', 'files')}
+    summary['files'] = {name: info['bytes'] for name, info in manifest['files'].items()}
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
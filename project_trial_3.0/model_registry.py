@@ -0,0 +1,188 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+
+class ModelRegistry:
+    """
+    Holds the model serving requests and hot-swaps in new artifact versions.
+
+    A reload builds (and, through the loader, warms up) a complete new model
+    in the background and validates it against the serving one. Only then is it swapped in by
+    rebinding a single reference. Requests read `current` once and keep that
+    model for their whole lifetime, so in-flight requests finish on the
+    version they started with and nothing blocks on a reload.
+    """
+
+    def __init__(self, loader, poll_interval=None):
+        """
+        Args:
+            loader: Zero-argument callable returning a freshly loaded
+                SkinDiseaseMLModel (called once now and once per reload)
+            poll_interval (float, optional): Seconds between checks of the
+                artifact files; a changed file triggers a reload. None or 0
+                disables watching (reloads then only happen via reload()).
+        """
+        self.loader = loader
+        self.poll_interval = poll_interval
+        self._current = loader()
+        self.loaded_at = time.time()
+        self.last_reload = None
+        self._reload_lock = threading.Lock()
+        self._watcher_pid = None
+        self._watcher_lock = threading.Lock()
+
+    @property
+    def current(self):
+        """The model to serve the next request with."""
+        if self.poll_interval and self._watcher_pid != os.getpid():
+            self._start_watcher()
+        return self._current
+
+    def reload(self, wait=False, force=False):
+        """
+        Load (and warm up), validate and swap in the artifacts currently on disk.
+
+        Args:
+            wait (bool): Block until the reload finished
+            force (bool): Swap even if the version did not change
+
+        Returns:
+            dict: The reload result when waiting, otherwise
+            {'status': 'started'} or {'status': 'in_progress'}
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return {'status': 'in_progress'}
+        if wait:
+            try:
+                return self._reload(force)
+            finally:
+                self._reload_lock.release()
+
+        def run():
+            try:
+                self._reload(force)
+            finally:
+                self._reload_lock.release()
+
+        threading.Thread(target=run, name='model-reload', daemon=True).start()
+        return {'status': 'started'}
+
+    def _reload(self, force):
+        started = time.perf_counter()
+        serving = self._current
+        result = {'previous_version': serving.version}
+        try:
+            candidate = self.loader()
+            result['version'] = candidate.version
+            if candidate.version == serving.version and not force:
+                result['status'] = 'unchanged'
+            else:
+                check_compatible(candidate, serving)
+                validate(candidate)
+                self._current = candidate  # atomic swap
+                self.loaded_at = time.time()
+                result['status'] = 'swapped'
+        except Exception as e:
+            result['status'] = 'failed'
+            result['error'] = f"{type(e).__name__}: {e}"
+        result['seconds'] = time.perf_counter() - started
+        result['finished_at'] = time.time()
+        self.last_reload = result
+        print(f"Model reload {result['status']}: {result}")
+        return result
+
+    def describe(self):
+        """Serving version and the outcome of the last reload."""
+        return {
+            'version': self._current.version,
+            'loaded_at': self.loaded_at,
+            'reloading': self._reload_lock.locked(),
+            'watching': self._current.artifact_paths() if self.poll_interval else [],
+            'last_reload': self.last_reload
+        }
+
+    def _start_watcher(self):
+        # Threads do not survive fork, so each serving process runs its own
+        with self._watcher_lock:
+            # Re-check: another request thread may have just started it
+            if self._watcher_pid == os.getpid():
+                return
+            self._watcher_pid = os.getpid()
+            threading.Thread(target=self._watch, name='model-watcher', daemon=True).start()
+
+    def _watch(self):
+        seen = _signature(self._current.artifact_paths())
+        pending = None
+        while True:
+            time.sleep(self.poll_interval)
+            signature = _signature(self._current.artifact_paths())
+            if signature == seen:
+                pending = None
+            elif signature != pending:
+                pending = signature  # wait one more poll for writers to finish
+            else:
+                result = self.reload(wait=True)
+                if result.get('status') != 'in_progress':
+                    seen, pending = signature, None
+
+
+def check_compatible(candidate, serving):
+    """
+    Check that a new model encodes every request the way the serving one does.
+
+    The feature order, every category list and the disease list must be
+    identical, order included: the encoded codes are positions in these
+    lists, so encoders from one training run paired with a model from
+    another would otherwise predict wrong classes without any error. A
+    retrain that adds categories or diseases therefore needs a restart.
+
+    Raises:
+        ValueError: Listing every incompatibility
+    """
+    problems = []
+    if list(candidate.feature_names) != list(serving.feature_names):
+        problems.append(f"feature_names changed from {list(serving.feature_names)} "
+                        f"to {list(candidate.feature_names)}")
+    old = serving.get_feature_info()['categorical_features']
+    new = candidate.get_feature_info()['categorical_features']
+    for col in sorted(set(old) | set(new)):
+        if list(old.get(col, [])) != list(new.get(col, [])):
+            problems.append(f"'{col}' categories changed from {list(old.get(col, []))} "
+                            f"to {list(new.get(col, []))}")
+    if list(candidate.get_possible_diseases()) != list(serving.get_possible_diseases()):
+        problems.append(f"diseases changed from {serving.get_possible_diseases()} "
+                        f"to {candidate.get_possible_diseases()}")
+    if problems:
+        raise ValueError("Incompatible model: " + "; ".join(problems))
+
+
+def validate(candidate):
+    """
+    Check that a model produces sane probabilities.
+
+    Raises:
+        ValueError: If the probabilities are not a valid distribution
+    """
+    probe = {}
+    info = candidate.get_feature_info()
+    for name in candidate.feature_names:
+        classes = info['categorical_features'].get(name)
+        probe[name] = classes[-1] if classes else 1
+    proba = candidate.predict_proba_batch([probe])
+    if proba.shape != (1, len(candidate.get_possible_diseases())) or \
+            not np.all(np.isfinite(proba)) or not np.isclose(proba.sum(), 1.0):
+        raise ValueError(f"Model returned invalid probabilities: {proba}")
+
+
+def _signature(paths):
+    stamps = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stamps.append((path, st.st_mtime_ns, st.st_size, st.st_ino))
+        except FileNotFoundError:
+            stamps.append((path, None))
+    return tuple(stamps)
@@ -0,0 +1,140 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """
+    Bounded in-process cache of model outputs keyed on canonicalized features.
+
+    Entries are evicted least-recently-used once max_size is reached and,
+    if ttl is set, expire ttl seconds after they were stored. All operations
+    are guarded by a single lock so the cache can be shared by Flask threads.
+    """
+
+    def __init__(self, feature_names, categorical_features, max_size=4096,
+                 ttl=None, buckets=None):
+        """
+        Create an empty cache.
+
+        Args:
+            feature_names (list): Feature order used to build keys
+            categorical_features (iterable): Features compared as strings
+            max_size (int): Maximum number of entries kept
+            ttl (float, optional): Seconds an entry stays valid
+            buckets (dict, optional): Numeric feature -> bucket width, e.g.
+                {'age': 5, 'duration_days': 7}. Cases in the same bucket share
+                one cached prediction, so this trades exactness for hit rate.
+        """
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.feature_names = list(feature_names)
+        self.categorical_features = set(categorical_features)
+        self.max_size = int(max_size)
+        self.ttl = ttl
+        self.buckets = dict(buckets or {})
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def make_key(self, input_data):
+        """
+        Build a canonical key for a case.
+
+        Key order follows feature_names, categorical values are compared as
+        strings and numeric values as numbers (so 14, 14.0 and '14' match),
+        with optional bucketing. Extra keys are ignored.
+
+        Args:
+            input_data (dict): Raw input features
+
+        Returns:
+            tuple or None: The key, or None if the case cannot be
+            canonicalized (missing or non-numeric values) and must bypass
+            the cache
+        """
+        key = []
+        for name in self.feature_names:
+            value = input_data.get(name)
+            if value is None:
+                return None
+            if name in self.categorical_features:
+                key.append(str(value))
+                continue
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                return None
+            if math.isnan(value):
+                return None
+            width = self.buckets.get(name)
+            if width:
+                value = float(math.floor(value / width) * width)
+            key.append(int(value) if value.is_integer() else value)
+        return tuple(key)
+
+    def get(self, key):
+        """
+        Look up a key, refreshing its LRU position.
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entry if full."""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Get cache counters.
+
+        Returns:
+            dict: size, max_size, ttl, hits, misses, evictions, expirations
+            and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,6 +1,13 @@
-import pandas as pd
-import joblib
+import hashlib
+import os
+import threading
+import time
+import numpy as np
 import warnings
+from prediction_cache import PredictionCache
+from tree_engine import CompiledForest, compile_arrays, load_compiled
+from model_bundle import load_bundle
+from inference_policy import InferencePolicy, disable_estimator_parallelism
 warnings.filterwarnings('ignore')
 
 
@@ -12,7 +19,10 @@ class SkinDiseaseMLModel:
     def __init__(self, model_path='skin_disease_model.pkl',
                  label_encoders_path='label_encoders.pkl',
                  disease_encoder_path='disease_encoder.pkl',
-                 feature_names_path='feature_names.pkl'):
+                 feature_names_path='feature_names.pkl',
+                 cache_size=0, cache_ttl=None, cache_buckets=None,
+                 compiled_model_path=None, inference_policy=None, mmap_mode=None,
+                 bundle_path=None, warmup=False, metrics=None, monitor=None):
         """
         Load the trained model and encoders.
         
@@ -21,18 +31,200 @@ class SkinDiseaseMLModel:
             label_encoders_path: Path to feature encoders
             disease_encoder_path: Path to disease encoder
             feature_names_path: Path to feature names
+            cache_size (int): Max cached predictions (0 disables the cache)
+            cache_ttl (float, optional): Seconds a cached prediction stays valid
+            cache_buckets (dict, optional): Bucket widths for numeric features
+                in cache keys, e.g. {'age': 5} (see PredictionCache)
+            compiled_model_path (str, optional): Directory written by
+                tree_engine.export_model(). When given, it is served with the
+                NumPy tree engine instead of the pickles (no sklearn needed).
+            inference_policy (InferencePolicy, optional): Parallelism policy
+                for batch inference (defaults to InferencePolicy())
+            mmap_mode (str, optional): e.g. 'r' to memory-map the compiled
+                model's node arrays (or numpy arrays stored in the pickle)
+                so forked workers share them through the page cache
+            bundle_path (str, optional): Model bundle directory written by
+                model_bundle.save_bundle(); takes precedence over the other paths
+            warmup (bool): Run a warmup prediction right after loading
+            metrics (Metrics, optional): Records per-stage timings and
+                prediction counters (see metrics.py)
+            monitor (DriftMonitor, optional): Counts served inputs and
+                predictions for drift scoring (see drift_monitor.py); ignored
+                while the loaded model does not match its reference profile
         """
+        started = time.perf_counter()
+        self._paths = (model_path, label_encoders_path,
+                       disease_encoder_path, feature_names_path)
+        self._compiled_model_path = compiled_model_path
+        self._bundle_path = bundle_path
+        self._mmap_mode = mmap_mode
+        self.inference_policy = inference_policy or InferencePolicy()
+        self._cache_config = (cache_size, cache_ttl, cache_buckets)
+        self.cache = None
+        self.metrics = metrics
+        self.monitor = monitor
+        self._load_artifacts()
+        
+        self.load_stats = {
+            'load_seconds': time.perf_counter() - started,
+            'warmup_seconds': None,
+            'time_to_first_prediction_seconds': None
+        }
+        if warmup:
+            self.load_stats['warmup_seconds'] = self.warmup()
+            self.load_stats['time_to_first_prediction_seconds'] = time.perf_counter() - started
+        print(self._format_load_stats())
+    
+    def _load_artifacts(self):
+        """
+        Internal method to load the artifacts and build derived state.
+        
+        Artifacts are only loaded once per instance: a new version is served
+        by loading a new instance and swapping the reference to it (see
+        ModelRegistry), so a request never mixes a model with the encoders
+        or cached outputs of another version.
+        """
+        model_path, label_encoders_path, disease_encoder_path, feature_names_path = self._paths
         print("Loading model and encoders......")
+        self.manifest = None
         try:
-            self.model = joblib.load(model_path)
-            self.label_encoders = joblib.load(label_encoders_path)
-            self.disease_encoder = joblib.load(disease_encoder_path)
-            self.feature_names = joblib.load(feature_names_path)
+            if self._bundle_path:
+                (self.model, self.label_encoders, self.disease_encoder,
+                 self.feature_names, self.manifest) = load_bundle(self._bundle_path, self._mmap_mode)
+            elif self._compiled_model_path:
+                (self.model, self.label_encoders, self.disease_encoder,
+                 self.feature_names) = load_compiled(self._compiled_model_path, self._mmap_mode)
+            else:
+                import joblib  # deferred: only the pickle path needs it
+                self.model = joblib.load(model_path, mmap_mode=self._mmap_mode)
+                self.label_encoders = joblib.load(label_encoders_path)
+                self.disease_encoder = joblib.load(disease_encoder_path)
+                self.feature_names = joblib.load(feature_names_path)
             print("Model loaded successfully!")
         except FileNotFoundError as e:
             raise FileNotFoundError(
                 f"Model files not found. Please run training first.\nMissing: {e.filename}"
             )
+        
+        # Parallelism is decided per call by the inference policy
+        disable_estimator_parallelism(self.model)
+        print(f"Inference policy: {self.inference_policy.describe()}")
+        
+        self._build_lookup_tables()
+        self._predict_is_argmax = _predict_is_argmax(self.model)
+        self._tree_engine = None
+        self.version = self._artifact_version()
+        
+        # Drift counts are only meaningful against the reference of this schema
+        self._monitor = self.monitor
+        if self.monitor is not None and not self.monitor.matches(
+                self.feature_names,
+                {col: le.classes_ for col, le in self.label_encoders.items()},
+                self.disease_encoder.classes_):
+            print("Drift monitor disabled: the reference profile does not match this model")
+            self._monitor = None
+        
+        # Cached outputs belong to the artifacts they were computed with,
+        # so every instance starts with its own empty cache
+        cache_size, cache_ttl, cache_buckets = self._cache_config
+        if cache_size:
+            self.cache = PredictionCache(
+                self.feature_names, self._category_codes,
+                max_size=cache_size, ttl=cache_ttl, buckets=cache_buckets
+            )
+    
+    def _artifact_version(self):
+        """
+        Internal method to identify the loaded artifacts.
+        
+        Returns:
+            str: The bundle content hash, or a sha256 of the loaded files,
+            shortened to 12 hex digits
+        """
+        if self.manifest is not None:
+            return self.manifest['content_hash'][:12]
+        if self._compiled_model_path:
+            root = self._compiled_model_path
+            paths = [os.path.join(root, name) for name in sorted(os.listdir(root))]
+        else:
+            paths = self._paths
+        digest = hashlib.sha256()
+        for path in paths:
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        return digest.hexdigest()[:12]
+    
+    def artifact_paths(self):
+        """
+        Get the files whose change means a new model version is on disk.
+        
+        Returns:
+            list: The bundle manifest, the compiled model header, or the
+            four pickles (bundles and compiled models write these last)
+        """
+        if self._bundle_path:
+            return [os.path.join(self._bundle_path, 'manifest.json')]
+        if self._compiled_model_path:
+            return [os.path.join(self._compiled_model_path, 'meta.json')]
+        return list(self._paths)
+    
+    def warmup(self, n_rows=8):
+        """
+        Run throwaway predictions so the first real request is not slow.
+        
+        Touches the single-row and batch paths (page-faulting memory-mapped
+        arrays and initializing lazy state) without going through the cache.
+        
+        Args:
+            n_rows (int): Rows in the warmup batch
+        
+        Returns:
+            float: Seconds spent
+        """
+        started = time.perf_counter()
+        case = {}
+        for name in self.feature_names:
+            classes = self._category_arrays.get(name)
+            case[name] = str(classes[0]) if classes is not None else 0
+        X = self._preprocess(case)
+        self.model.predict_proba(X)
+        self.predict_proba_batch([case] * n_rows)
+        return time.perf_counter() - started
+    
+    def _format_load_stats(self):
+        stats = self.load_stats
+        line = f"Model ready: loaded in {stats['load_seconds'] * 1000:.1f} ms"
+        if stats['warmup_seconds'] is not None:
+            line += (f", warmup {stats['warmup_seconds'] * 1000:.1f} ms, first prediction after "
+                     f"{stats['time_to_first_prediction_seconds'] * 1000:.1f} ms")
+        return line + f" (version {self.version})"
+    
+    def _build_lookup_tables(self):
+        """
+        Precompute the encodings used by the preprocessing fast path.
+        
+        Builds dict-based category -> code tables from the label encoders
+        (codes match LabelEncoder.transform), sorted class arrays for
+        vectorized batch encoding, and the column position of every feature.
+        """
+        self._category_codes = {
+            col: {value: code for code, value in enumerate(le.classes_)}
+            for col, le in self.label_encoders.items()
+        }
+        self._category_arrays = {
+            col: le.classes_.astype(str) for col, le in self.label_encoders.items()
+        }
+        self._feature_index = {name: j for j, name in enumerate(self.feature_names)}
+        self._numeric_features = [
+            (name, j) for name, j in self._feature_index.items()
+            if name not in self._category_codes
+        ]
+        self._categorical_features = [
+            (name, j, self._category_codes[name]) for name, j in self._feature_index.items()
+            if name in self._category_codes
+        ]
+        self._buffers = threading.local()
     
     def predict(self, location, color, texture, size, duration_days,
                 itching, pain, scaling, spreading, age, gender,
@@ -95,10 +287,25 @@ class SkinDiseaseMLModel:
             'seasonal_variation': seasonal_variation
         }
         
+        if self.cache is not None:
+            best, _ = self._infer(input_data)
+            return self.disease_encoder.classes_[self.model.classes_[best]]
+        
         # Preprocess and predict
+        metrics = self.metrics
+        started = time.perf_counter() if metrics else None
         X = self._preprocess(input_data)
+        if metrics:
+            started = self._record('preprocess', started)
         prediction_encoded = self.model.predict(X)[0]
+        if metrics:
+            started = self._record('inference', started)
+        if self._monitor is not None:
+            self._monitor.observe_row(X[0], prediction_encoded)
         disease = self.disease_encoder.inverse_transform([prediction_encoded])[0]
+        if metrics:
+            self._record('decode', started)
+            metrics.inc('predictions_total', labels=(('entry', 'single'),))
         
         return disease
     
@@ -135,15 +342,37 @@ class SkinDiseaseMLModel:
         """
         return self.predict(**input_dict)
     
-    def predict_with_confidence(self, **kwargs):
+    def predict_with_confidence(self, top_k=None, explain=None, **kwargs):
         """
         Predict disease with confidence score.
         
+        The label, its confidence and the top-k alternatives all come from a
+        single predict_proba pass (the label is the argmax of the
+        probabilities, which is what predict() computes for these models).
+        
+        With explain, the pass runs on the tree engine and also sums the
+        node value changes along every decision path per feature (Saabas
+        contributions), bypassing the prediction cache. Sklearn tree
+        ensembles are compiled into the engine on first use.
+        
         Args:
-            Same as predict() method
+            top_k (int, optional): Also return the k most likely diseases
+            explain (int, optional): Also return the explain features that
+                contributed most to the predicted disease
+            Other arguments are the same as predict() method
         
         Returns:
-            tuple: (disease_name, confidence_score)
+            tuple: (disease_name, confidence_score), followed by top_k_list
+            when top_k is given and explanation when explain is given.
+            top_k_list holds (disease_name, probability) pairs sorted by
+            probability. explanation is a dict with units ('probability' or
+            'log_odds'), baseline (the predicted disease's score before any
+            split) and contributions, (feature, contribution) pairs with the
+            largest absolute contribution first
+        
+        Raises:
+            TypeError: If explain is given and the model is not a tree ensemble
+            ValueError: If explain is given for a quantized compiled model
         
         Example:
             >>> disease, confidence = model.predict_with_confidence(
@@ -155,40 +384,435 @@ class SkinDiseaseMLModel:
             >>> print(f"{disease} ({confidence:.2%})")
             'Acne (92.45%)'
         """
-        # Preprocess
+        # Preprocess and predict (one inference pass)
+        if explain is None:
+            best, probabilities = self._infer(kwargs)
+        else:
+            best, probabilities, contributions, baseline = self._infer_explained(kwargs)
+        confidence = float(probabilities[best])
+        
+        # Decode disease name
+        disease = self.disease_encoder.classes_[self.model.classes_[best]]
+        
+        result = (disease, confidence)
+        if top_k is not None:
+            result += (self._top_k(probabilities, top_k),)
+        if explain is not None:
+            order = np.argsort(-np.abs(contributions[:, best]), kind='stable')[:max(int(explain), 0)]
+            result += ({
+                'units': 'probability' if self._engine().kind == 'forest' else 'log_odds',
+                'baseline': float(baseline[best]),
+                'contributions': [(self.feature_names[j], float(contributions[j, best]))
+                                  for j in order]
+            },)
+        return result
+    
+    def predict_early_exit(self, budget_ms=None, block_size=None, top_k=None, **kwargs):
+        """
+        Predict disease with confidence, evaluating only as many trees as needed.
+        
+        Trees are evaluated in blocks and evaluation stops once the leading
+        disease can no longer be overtaken by the remaining trees (the label
+        then equals predict_with_confidence's), or once budget_ms is spent
+        (the label is then the partial ensemble's best guess). The confidence
+        is the partial ensemble's. Sklearn tree ensembles are compiled into
+        the NumPy tree engine on first use; the prediction cache is bypassed.
+        
+        Args:
+            budget_ms (float, optional): Time budget for the inference
+            block_size (int, optional): Trees evaluated between checks
+            top_k (int, optional): Also return the k most likely diseases
+            Other arguments are the same as predict() method
+        
+        Returns:
+            dict: disease, confidence, trees_evaluated, n_trees, exact and
+            (with top_k) top_k as (disease_name, probability) pairs
+        
+        Raises:
+            TypeError: If the model is not a tree ensemble
+        """
+        engine = self._engine()
+        metrics = self.metrics
+        started = time.perf_counter() if metrics else None
         X = self._preprocess(kwargs)
+        if metrics:
+            started = self._record('preprocess', started)
+        probabilities, evaluated, exact = engine.predict_proba_early_exit(
+            X, block_size=block_size, budget_ms=budget_ms)
+        if metrics:
+            self._record('inference', started)
+            metrics.inc('predictions_total', labels=(('entry', 'early_exit'),))
         
-        # Predict
-        prediction_encoded = self.model.predict(X)[0]
+        probabilities = probabilities[0]
+        best = int(np.argmax(probabilities))
+        if self._monitor is not None:
+            self._monitor.observe_row(X[0], engine.classes_[best])
+        result = {
+            'disease': self.disease_encoder.classes_[engine.classes_[best]],
+            'confidence': float(probabilities[best]),
+            'trees_evaluated': int(evaluated[0]),
+            'n_trees': engine.n_trees,
+            'exact': bool(exact[0])
+        }
+        if top_k is not None:
+            result['top_k'] = self._top_k(probabilities, top_k)
+        return result
+    
+    def _engine(self):
+        """
+        Internal method to get the tree engine for early exit and explanations.
+        
+        Returns:
+            CompiledForest: The served model itself, or the sklearn ensemble
+            compiled in memory (once per load)
+        """
+        engine = self._tree_engine
+        if engine is None:
+            if isinstance(self.model, CompiledForest):
+                engine = self.model
+            else:
+                arrays, meta = compile_arrays(self.model, self.label_encoders,
+                                              self.disease_encoder, self.feature_names)
+                engine = CompiledForest(arrays, meta)
+            self._tree_engine = engine
+        return engine
+    
+    def _infer(self, input_data):
+        """
+        Internal method to run one inference pass for a single case.
+        
+        Goes through the prediction cache when it is enabled.
+        
+        Returns:
+            tuple: (best_class_index, probabilities)
+        """
+        metrics = self.metrics
+        started = time.perf_counter() if metrics else None
+        key = self.cache.make_key(input_data) if self.cache is not None else None
+        if key is not None:
+            cached = self.cache.get(key)
+            if metrics:
+                started = self._record('cache_lookup', started)
+            if cached is not None:
+                if metrics:
+                    metrics.inc('predictions_total', labels=(('entry', 'single'),))
+                if self._monitor is not None:
+                    # Buckets share a key, so count the actual input
+                    self._monitor.observe_row(self._preprocess(input_data)[0],
+                                              self.model.classes_[cached[0]])
+                return cached
+        
+        X = self._preprocess(input_data)
+        if metrics:
+            started = self._record('preprocess', started)
         probabilities = self.model.predict_proba(X)[0]
-        confidence = float(probabilities[prediction_encoded])
+        result = (self._best_index(X, probabilities), probabilities)
+        if metrics:
+            self._record('inference', started)
+            metrics.inc('predictions_total', labels=(('entry', 'single'),))
+        if self._monitor is not None:
+            self._monitor.observe_row(X[0], self.model.classes_[result[0]])
         
-        # Decode disease name
-        disease = self.disease_encoder.inverse_transform([prediction_encoded])[0]
+        if key is not None:
+            probabilities.setflags(write=False)
+            self.cache.put(key, result)
+        return result
+    
+    def _infer_explained(self, input_data):
+        """
+        Internal method to run one tree-engine pass with feature contributions.
+        
+        Returns:
+            tuple: (best_class_index, probabilities, contributions of shape
+            (n_features, n_classes), baseline of shape (n_classes,))
+        """
+        engine = self._engine()
+        metrics = self.metrics
+        started = time.perf_counter() if metrics else None
+        X = self._preprocess(input_data)
+        if metrics:
+            started = self._record('preprocess', started)
+        probabilities, contributions, baseline = engine.predict_proba_with_contributions(X)
+        if metrics:
+            self._record('inference', started)
+            metrics.inc('predictions_total', labels=(('entry', 'explain'),))
+        best = int(np.argmax(probabilities[0]))
+        if self._monitor is not None:
+            self._monitor.observe_row(X[0], engine.classes_[best])
+        return best, probabilities[0], contributions[0], baseline
+    
+    def _record(self, stage, started):
+        """
+        Internal method to record the time since started for a stage.
         
-        return disease, confidence
+        Returns:
+            float: The current perf_counter, to time the next stage from
+        """
+        now = time.perf_counter()
+        self.metrics.observe_stage(stage, now - started)
+        return now
+    
+    def cache_stats(self):
+        """
+        Get prediction cache counters.
+        
+        Returns:
+            dict: Cache statistics (see PredictionCache.stats), or None if
+            the cache is disabled
+        """
+        return self.cache.stats() if self.cache is not None else None
+    
+    def _best_index(self, X, probabilities):
+        """
+        Internal method to pick the predicted class index from probabilities.
+        
+        Falls back to a predict() call only for estimators whose predict is
+        not the argmax of predict_proba (e.g. SVC with Platt scaling).
+        """
+        if self._predict_is_argmax:
+            return int(np.argmax(probabilities))
+        return int(np.searchsorted(self.model.classes_, self.model.predict(X)[0]))
+    
+    def _top_k(self, probabilities, k):
+        """
+        Internal method to list the k most likely diseases.
+        
+        Returns:
+            list: (disease_name, probability) pairs, most likely first
+        """
+        order = np.argsort(-probabilities, kind='stable')[:max(int(k), 0)]
+        classes = self.disease_encoder.classes_[self.model.classes_[order]]
+        return [(disease, float(probabilities[i])) for disease, i in zip(classes, order)]
     
     def _preprocess(self, input_data):
         """
         Internal method to preprocess input data.
         
+        Encodes straight into a per-thread preallocated row using the lookup
+        tables from _build_lookup_tables, so no pandas objects or encoder
+        calls are involved. Missing features become NaN, like the columns of
+        the DataFrame this used to build.
+        
         Args:
             input_data (dict): Raw input features
         
         Returns:
-            pd.DataFrame: Preprocessed features ready for model
+            np.ndarray: Preprocessed features of shape (1, n_features), ready
+            for model. The buffer is reused by the next call on this thread.
         """
-        data = input_data.copy()
+        row = getattr(self._buffers, 'row', None)
+        if row is None:
+            row = self._buffers.row = np.empty((1, len(self.feature_names)), dtype=np.float64)
+        out = row[0]
         
         # Encode categorical features
-        for col in ['location', 'color', 'texture', 'size', 'gender']:
-            if col in data:
-                data[col] = self.label_encoders[col].transform([data[col]])[0]
+        for col, j, codes in self._categorical_features:
+            if col not in input_data:
+                out[j] = np.nan
+                continue
+            value = input_data[col]
+            try:
+                out[j] = codes[value]
+            except (KeyError, TypeError):
+                raise ValueError(f"y contains previously unseen labels: {[value]!r} for '{col}'")
+        
+        # Numeric and binary features keep their raw values
+        for col, j in self._numeric_features:
+            value = input_data.get(col)
+            out[j] = np.nan if value is None else value
+        
+        return row
+    
+    def predict_batch(self, records, return_errors=False):
+        """
+        Predict diseases for many cases with a single estimator call.
+        
+        Args:
+            records: List of feature dicts, or a columnar mapping
+                (dict / DataFrame) of feature name -> sequence of values
+            return_errors (bool): If True, invalid rows are skipped instead
+                of failing the whole batch
+        
+        Returns:
+            list: Predicted disease names in input order.
+            With return_errors=True, a tuple (predictions, errors) where
+            invalid rows are None in predictions and errors maps
+            row index -> error message.
+        
+        Raises:
+            ValueError: If any row is invalid and return_errors is False
+        
+        Example:
+            >>> diseases = model.predict_batch([acne_data, eczema_data])
+            >>> print(diseases)
+            ['Acne', 'Eczema']
+        """
+        metrics = self.metrics
+        started = time.perf_counter() if metrics else None
+        X, valid_idx, errors = self._preprocess_batch(records)
+        if metrics:
+            started = self._record('batch_preprocess', started)
+            metrics.inc('batches_total')
+            metrics.inc('batch_rows_total', len(valid_idx) + len(errors))
+        if errors and not return_errors:
+            raise ValueError(self._format_batch_errors(errors))
         
-        # Create DataFrame with correct column order
-        df = pd.DataFrame([data], columns=self.feature_names)
+        predictions = [None] * (len(valid_idx) + len(errors))
+        if len(valid_idx):
+            encoded = self.inference_policy.run(self.model.predict, X)
+            if metrics:
+                started = self._record('batch_inference', started)
+            diseases = self.disease_encoder.inverse_transform(encoded)
+            if self._monitor is not None:
+                self._monitor.observe_batch(X, encoded)
+            for i, disease in zip(valid_idx, diseases):
+                predictions[i] = disease
+            if metrics:
+                self._record('batch_decode', started)
+                metrics.inc('predictions_total', len(valid_idx), (('entry', 'batch'),))
         
-        return df
+        if return_errors:
+            return predictions, errors
+        return predictions
+    
+    def predict_proba_batch(self, records):
+        """
+        Predict class probabilities for many cases with a single estimator call.
+
+        Not counted by the drift monitor: warmup and the reload probe of
+        model_registry go through here.
+
+        Args:
+            records: List of feature dicts or a columnar mapping (see predict_batch)
+        
+        Returns:
+            np.ndarray: Array of shape (n_cases, n_diseases); columns follow
+            get_possible_diseases()
+        
+        Raises:
+            ValueError: If any row is invalid
+        """
+        X, valid_idx, errors = self._preprocess_batch(records)
+        if errors:
+            raise ValueError(self._format_batch_errors(errors))
+        if not len(valid_idx):
+            return np.empty((0, len(self.disease_encoder.classes_)))
+        return self.inference_policy.run(self.model.predict_proba, X)
+
+    def predict_batch_with_confidence(self, records):
+        """
+        Predict diseases and their confidences for many cases, skipping invalid rows.
+
+        Like predict_with_confidence, labels and confidences come from one
+        predict_proba pass over all valid rows.
+
+        Args:
+            records: List of feature dicts or a columnar mapping (see predict_batch)
+
+        Returns:
+            tuple: (predictions, confidences, errors) where predictions is a
+            list of disease names (None for invalid rows), confidences a
+            float array (NaN for invalid rows) and errors maps row index ->
+            error message
+        """
+        X, valid_idx, errors = self._preprocess_batch(records)
+        n_rows = len(valid_idx) + len(errors)
+        predictions = [None] * n_rows
+        confidences = np.full(n_rows, np.nan)
+        if len(valid_idx):
+            probabilities = self.inference_policy.run(self.model.predict_proba, X)
+            if self._predict_is_argmax:
+                best = np.argmax(probabilities, axis=1)
+            else:
+                encoded = self.inference_policy.run(self.model.predict, X)
+                best = np.searchsorted(self.model.classes_, encoded)
+            diseases = self.disease_encoder.classes_[self.model.classes_[best]]
+            if self._monitor is not None:
+                self._monitor.observe_batch(X, self.model.classes_[best])
+            confidences[valid_idx] = probabilities[np.arange(len(best)), best]
+            for i, disease in zip(valid_idx, diseases):
+                predictions[i] = disease
+        return predictions, confidences, errors
+
+    def _preprocess_batch(self, records):
+        """
+        Internal method to encode a batch of cases in one vectorized pass.
+        
+        Args:
+            records: List of feature dicts or a columnar mapping
+        
+        Returns:
+            tuple: (X, valid_idx, errors) where X is a float array holding
+            only the valid rows in feature order, valid_idx their positions
+            in the input and errors maps invalid row index -> message
+        """
+        columns, n_rows, problems = self._to_columns(records)
+        X = np.empty((n_rows, len(self.feature_names)), dtype=np.float64)
+        
+        for j, col in enumerate(self.feature_names):
+            values = columns[col]
+            if col in self._category_arrays:
+                classes = self._category_arrays[col]
+                values = np.asarray(values).astype(str)
+                codes = np.searchsorted(classes, values)
+                known = classes[np.minimum(codes, len(classes) - 1)] == values
+                bad = np.flatnonzero(~known)
+                X[:, j] = codes
+            else:
+                X[:, j] = _to_float_column(values)
+                bad = np.flatnonzero(np.isnan(X[:, j]))
+            for i in bad:
+                if columns[col][i] is None and problems[i]:
+                    continue  # already reported as missing
+                problems[i].append(f"invalid value for '{col}': {columns[col][i]!r}")
+        
+        errors = {i: '; '.join(msgs) for i, msgs in enumerate(problems) if msgs}
+        valid = np.ones(n_rows, dtype=bool)
+        valid[list(errors)] = False
+        valid_idx = np.flatnonzero(valid)
+        
+        return X[valid_idx], valid_idx, errors
+    
+    def _to_columns(self, records):
+        """
+        Internal method to turn row or columnar input into per-feature columns.
+        
+        Returns:
+            tuple: (columns, n_rows, problems) where problems holds a list
+            of error messages per row
+        """
+        if hasattr(records, 'keys'):
+            missing = [f for f in self.feature_names if f not in records]
+            if missing:
+                raise ValueError(f"Missing feature columns: {missing}")
+            columns = {f: list(records[f]) for f in self.feature_names}
+            lengths = {len(v) for v in columns.values()}
+            if len(lengths) > 1:
+                raise ValueError("All feature columns must have the same length")
+            n_rows = lengths.pop() if lengths else 0
+            return columns, n_rows, [[] for _ in range(n_rows)]
+        
+        records = list(records)
+        n_rows = len(records)
+        columns = {f: [None] * n_rows for f in self.feature_names}
+        problems = [[] for _ in range(n_rows)]
+        
+        for i, row in enumerate(records):
+            if not isinstance(row, dict):
+                problems[i].append("case must be an object of features")
+                continue
+            missing = [f for f in self.feature_names if f not in row]
+            if missing:
+                problems[i].append(f"missing features: {missing}")
+            for f in self.feature_names:
+                columns[f][i] = row.get(f)
+        
+        return columns, n_rows, problems
+    
+    @staticmethod
+    def _format_batch_errors(errors):
+        details = ', '.join(f"row {i}: {msg}" for i, msg in sorted(errors.items()))
+        return f"{len(errors)} invalid case(s) in batch - {details}"
     
     def get_possible_diseases(self):
         """
@@ -231,6 +855,27 @@ class SkinDiseaseMLModel:
         }
 
 
+def _predict_is_argmax(model):
+    """Whether model.predict() is the argmax of model.predict_proba()."""
+    estimator = model.steps[-1][1] if hasattr(model, 'steps') else model
+    # SVC predicts from its decision function, not its Platt-scaled probabilities
+    return type(estimator).__name__ not in ('SVC', 'NuSVC')
+
+
+def _to_float_column(values):
+    """Convert a column to float64, marking unparseable entries as NaN."""
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        out = np.empty(len(values), dtype=np.float64)
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(v)
+            except (TypeError, ValueError):
+                out[i] = np.nan
+        return out
+
+
 # ============================================================================
 # USAGE EXAMPLES & TESTING
 # ============================================================================
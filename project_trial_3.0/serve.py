@@ -0,0 +1,112 @@
+"""
+Pre-fork production server for ml_api.
+
+The parent process imports ml_api once (loading the model and encoders),
+binds the listening socket and then forks the workers. The workers share
+the parent's memory copy-on-write. With ML_COMPILED_MODEL set, the node
+arrays are memory-mapped read-only (ML_MMAP_MODE=r), so every worker reads
+the same page-cache pages. Resident memory then stays roughly flat as
+workers are added. The parent restarts workers that die and forwards
+SIGINT/SIGTERM to them.
+
+Usage:
+    python serve.py [--workers N] [--host 127.0.0.1] [--port 8000] [--threads]
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+
+
+def _bind(host, port, backlog=1024):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock, host, port, threaded):
+    from werkzeug.serving import make_server
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    server = make_server(host, port, app, threaded=threaded, fd=sock.fileno())
+    try:
+        server.serve_forever()
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+        os._exit(1)
+    os._exit(0)
+
+
+def _spawn(app, sock, args):
+    pid = os.fork()
+    if pid == 0:
+        _run_worker(app, sock, args.host, args.port, args.threads)
+    return pid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve ml_api with pre-forked workers")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--threads', action='store_true',
+                        help="Handle requests with a thread per connection inside each worker")
+    parser.add_argument('--access-log', action='store_true')
+    args = parser.parse_args(argv)
+
+    # Map the compiled arrays read-only instead of copying them into each process
+    os.environ.setdefault("ML_MMAP_MODE", "r")
+    from ml_api import app
+
+    if not args.access_log:
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    sock = _bind(args.host, args.port)
+    # Keep the garbage collector from touching (and so copying) the loaded objects
+    gc.collect()
+    gc.freeze()
+
+    workers = {_spawn(app, sock, args) for _ in range(args.workers)}
+    print(f"Serving on http://{args.host}:{args.port} with {len(workers)} workers "
+          f"(parent pid {os.getpid()})", flush=True)
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited with status {status}, restarting", flush=True)
+            workers.add(_spawn(app, sock, args))
+
+    sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import json
+import os
+import sys
+
+import joblib
+import pytest
+
+# The modules live flat in project_trial_3.0
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_dataset import generate_legacy_dataset  # noqa: E402
+from model import load_dataset  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def data(tmp_path_factory):
+    """(X, y, label_encoders, disease_encoder, raw rows) of a few hundred generated cases."""
+    path = tmp_path_factory.mktemp('data') / 'cases.csv'
+    generate_legacy_dataset(samples_per_disease=40, out=str(path))
+    X, y, label_encoders, disease_encoder = load_dataset(str(path), use_cache=False)
+    rows = X.to_dict('records')
+    for row in rows:
+        for col, le in label_encoders.items():
+            row[col] = str(le.classes_[row[col]])
+    return X, y, label_encoders, disease_encoder, rows
+
+
+@pytest.fixture(scope='session')
+def boosting(data):
+    """A small fitted GradientBoostingClassifier."""
+    from sklearn.ensemble import GradientBoostingClassifier
+
+    X, y = data[0], data[1]
+    return GradientBoostingClassifier(n_estimators=15, max_depth=3, random_state=0).fit(X.to_numpy(), y)
+
+
+@pytest.fixture(scope='session')
+def artifacts(tmp_path_factory, data, boosting):
+    """Paths of the four training pickles of the boosting model."""
+    X, _, label_encoders, disease_encoder, _ = data
+    root = tmp_path_factory.mktemp('artifacts')
+    paths = {}
+    for name, obj in (('model_path', boosting), ('label_encoders_path', label_encoders),
+                      ('disease_encoder_path', disease_encoder),
+                      ('feature_names_path', list(X.columns))):
+        paths[name] = str(root / f'{name}.pkl')
+        joblib.dump(obj, paths[name])
+    return paths
+
+
+@pytest.fixture(scope='session')
+def served(artifacts):
+    """The boosting model loaded through SkinDiseaseMLModel."""
+    from predictor import SkinDiseaseMLModel
+
+    return SkinDiseaseMLModel(**artifacts)
+
+
+DOCTORS = [
+    {'name': 'eczema', 'keywords': ['eczema'], 'condition': 'Eczema or Dermatitis', 'doctors': [
+        {'name': 'Dr. B', 'location': 'Kolkata', 'rating': 4.1},
+        {'name': 'Dr. A', 'location': 'Delhi', 'rating': 4.8},
+        {'name': 'Dr. C', 'location': 'Kolkata', 'rating': None},
+    ]},
+    {'name': 'acne', 'keywords': ['acne'], 'condition': 'Acne Vulgaris', 'doctors': [
+        {'name': 'Dr. D', 'location': 'Mumbai', 'rating': 4.0},
+    ]},
+]
+
+
+@pytest.fixture
+def doctors_file(tmp_path):
+    """A small SkinIssue export; doctors deliberately not in rating order."""
+    path = tmp_path / 'skinIssues.json'
+    path.write_text(json.dumps(DOCTORS))
+    return str(path)
+
+
+@pytest.fixture(scope='session')
+def api(tmp_path_factory, artifacts):
+    """ml_api imported against the boosting model's pickles (no drift, no warmup)."""
+    import importlib
+    import shutil
+
+    root = tmp_path_factory.mktemp('api')
+    names = {'model_path': 'skin_disease_model.pkl', 'label_encoders_path': 'label_encoders.pkl',
+             'disease_encoder_path': 'disease_encoder.pkl', 'feature_names_path': 'feature_names.pkl'}
+    for key, name in names.items():
+        shutil.copy(artifacts[key], root / name)
+    (root / 'skinIssues.json').write_text(json.dumps(DOCTORS))
+    environ = {'ML_DRIFT': '0', 'ML_WARMUP': '0', 'ML_DOCTOR_DIRECTORY': str(root / 'skinIssues.json')}
+    saved_environ, saved_cwd = {key: os.environ.get(key) for key in environ}, os.getcwd()
+    os.environ.update(environ)
+    os.chdir(root)
+    try:
+        sys.modules.pop('ml_api', None)
+        module = importlib.import_module('ml_api')
+    finally:
+        os.chdir(saved_cwd)
+        for key, value in saved_environ.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+    return module
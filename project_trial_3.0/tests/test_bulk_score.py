@@ -0,0 +1,77 @@
+"""Bulk scoring: per-line errors, and resuming after an interruption."""
+import json
+
+import pandas as pd
+import pytest
+
+import bulk_score
+from bulk_score import bulk_score as score_file
+
+
+@pytest.fixture
+def cases(tmp_path, data):
+    rows = data[4][:90]
+    path = tmp_path / 'cases.csv'
+    text = pd.DataFrame(rows).to_csv(index=False)
+    lines = text.splitlines()
+    # A short line and a line with an unseen category, among valid ones
+    lines.insert(11, 'Face,1,2')
+    unseen = pd.DataFrame([dict(rows[38], location='Wrist')]).to_csv(index=False, header=False)
+    lines.insert(41, unseen.strip())
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path), rows
+
+
+def _score(cases, tmp_path, artifacts, name, **kwargs):
+    output = str(tmp_path / name)
+    result = score_file(cases[0], output, artifacts, workers=1, chunk_size=16, **kwargs)
+    return output, result
+
+
+def test_rows_match_predict_and_bad_lines_become_errors(cases, tmp_path, artifacts, served):
+    output, result = _score(cases, tmp_path, artifacts, 'out.csv')
+    frame = pd.read_csv(output)
+    assert result['total_rows'] == len(frame) == 92 and result['errors'] == 2
+    assert list(frame['row']) == list(range(92))
+    assert frame['error'].notna().sum() == 2
+    assert pd.notna(frame.loc[10, 'error']) and pd.notna(frame.loc[40, 'error'])
+
+    valid = frame[frame['error'].isna()]
+    assert list(valid['predicted_disease']) == [served.predict(**row) for row in cases[1]]
+
+
+def test_resume_after_interruption_gives_identical_output(cases, tmp_path, artifacts, monkeypatch):
+    reference, _ = _score(cases, tmp_path, artifacts, 'reference.jsonl')
+
+    scored = []
+    real_score_chunk = bulk_score.score_chunk
+
+    def interrupted(*args):
+        if len(scored) == 3:
+            raise KeyboardInterrupt
+        scored.append(args[0])
+        return real_score_chunk(*args)
+
+    monkeypatch.setattr(bulk_score, 'score_chunk', interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        _score(cases, tmp_path, artifacts, 'out.jsonl')
+    monkeypatch.undo()
+
+    output = str(tmp_path / 'out.jsonl')
+    with open(output + '.checkpoint.json') as f:
+        assert json.load(f)['rows'] == 48
+    with open(output, 'a') as f:
+        f.write('{"row": 48, "half written')
+
+    _, result = _score(cases, tmp_path, artifacts, 'out.jsonl', resume=True)
+    assert result['rows'] == 92 - 48 and result['total_rows'] == 92
+    with open(reference) as expected, open(output) as actual:
+        assert actual.read() == expected.read()
+
+
+def test_resume_refuses_a_changed_input(cases, tmp_path, artifacts):
+    _score(cases, tmp_path, artifacts, 'out.csv')
+    with open(cases[0], 'a') as f:
+        f.write(open(cases[0]).read().splitlines()[1] + '\n')
+    with pytest.raises(ValueError, match="input file or chunk size changed"):
+        _score(cases, tmp_path, artifacts, 'out.csv', resume=True)
@@ -0,0 +1,42 @@
+"""Doctor directory: stored order by default, sort=rating on request."""
+import pytest
+
+from doctor_directory import DoctorDirectory
+
+
+def _names(result):
+    return [doctor['name'] for doctor in result['doctors']]
+
+
+def test_doctors_keep_the_stored_order(doctors_file):
+    directory = DoctorDirectory(doctors_file)
+    result = directory.recommend('Eczema')
+    assert result['condition'] == 'Eczema or Dermatitis'
+    assert _names(result) == ['Dr. B', 'Dr. A', 'Dr. C']
+    assert _names(directory.recommend('eczema', location='KOLKATA')) == ['Dr. B', 'Dr. C']
+    assert _names(directory.recommend('eczema', limit=1)) == ['Dr. B']
+    assert [d['name'] for d in directory.doctors_in('kolkata')] == ['Dr. B', 'Dr. C']
+
+
+def test_sort_by_rating(doctors_file):
+    directory = DoctorDirectory(doctors_file)
+    assert _names(directory.recommend('eczema', sort='rating')) == ['Dr. A', 'Dr. B', 'Dr. C']
+    assert _names(directory.recommend('eczema', limit=2, sort='rating')) == ['Dr. A', 'Dr. B']
+    # Sorting a lookup does not reorder the index
+    assert _names(directory.recommend('eczema')) == ['Dr. B', 'Dr. A', 'Dr. C']
+    with pytest.raises(ValueError, match="Unknown sort"):
+        directory.recommend('eczema', sort='price')
+
+
+def test_unknown_disease(doctors_file):
+    result = DoctorDirectory(doctors_file).recommend('Vitiligo')
+    assert result['condition'] is None and result['doctors'] == []
+
+
+def test_api_order_and_sort(api, data):
+    client = api.app.test_client()
+    case = next(row for row in data[4] if api.registry.current.predict(**row) == 'Eczema')
+    body = client.post('/predict_and_recommend', json=case).get_json()
+    assert _names(body) == ['Dr. B', 'Dr. A', 'Dr. C']
+    body = client.post('/predict_and_recommend?sort=rating&limit=2', json=case).get_json()
+    assert _names(body) == ['Dr. A', 'Dr. B']
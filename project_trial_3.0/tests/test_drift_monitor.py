@@ -0,0 +1,120 @@
+"""Drift monitor: binning, PSI, per-thread shards and predictor integration."""
+import gc
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from drift_monitor import DriftMonitor, build_reference, load_reference, save_reference
+from predictor import SkinDiseaseMLModel
+
+
+@pytest.fixture(scope='module')
+def reference(data, boosting):
+    X, _, label_encoders, disease_encoder, _ = data
+    return build_reference(X, boosting.predict(X.to_numpy()), list(X.columns),
+                           label_encoders, disease_encoder)
+
+
+@pytest.fixture
+def monitor(reference):
+    return DriftMonitor(reference, min_rows=50)
+
+
+def test_training_traffic_is_stable(monitor, data, boosting):
+    X = data[0].to_numpy(dtype=np.float64)
+    monitor.observe_batch(X, boosting.predict(X))
+    report = monitor.report()
+    assert report['rows'] == len(X)
+    assert report['status'] == 'stable' and report['drifted'] == []
+    assert report['max_psi'] < 1e-9
+    assert report['predictions']['rows'] == len(X)
+
+
+def test_shifted_feature_is_reported(monitor, data):
+    X = data[0].to_numpy(dtype=np.float64)
+    shifted = X.copy()
+    shifted[:, list(data[0].columns).index('age')] += 60
+    monitor.observe_batch(shifted)
+    report = monitor.report()
+    assert report['status'] == 'drift'
+    assert report['drifted'] == ['age']
+    assert report['features']['age']['quantiles']['p50']['live'] > \
+        report['features']['age']['quantiles']['p50']['reference']
+    assert report['features']['location']['psi'] < 1e-9
+
+
+def test_psi_matches_the_formula(monitor, reference, data):
+    location = list(data[0].columns).index('location')
+    X = data[0].to_numpy(dtype=np.float64)
+    half = X[X[:, location] == 0]
+    monitor.observe_batch(np.concatenate([X, half]))
+    expected = np.asarray(reference['features']['location']['counts'], dtype=np.float64)
+    live = np.bincount(np.concatenate([X, half])[:, location].astype(int),
+                       minlength=len(expected))
+    e = np.maximum(expected / expected.sum(), 1e-4)
+    a = np.maximum(live / live.sum(), 1e-4)
+    psi = float(np.sum((a - e) * np.log(a / e)))
+    assert monitor.report()['features']['location']['psi'] == pytest.approx(psi)
+
+
+def test_rows_and_batches_count_alike(reference, data):
+    X = data[0].to_numpy(dtype=np.float64)[:50].copy()
+    X[0, 0] = np.nan
+    X[1, list(data[0].columns).index('location')] = 99
+    predicted = np.arange(50) % 12  # includes out-of-range classes
+    by_row, by_batch = DriftMonitor(reference), DriftMonitor(reference)
+    for row, label in zip(X, predicted):
+        by_row.observe_row(row, label)
+    by_batch.observe_batch(X, predicted)
+    np.testing.assert_array_equal(by_row.counts(), by_batch.counts())
+
+
+def test_exited_threads_leave_no_shards(monitor, data):
+    row = data[0].to_numpy(dtype=np.float64)[0]
+
+    def observe():
+        monitor.observe_row(row, 0)
+        monitor.observe_batch(row[None, :], [0])
+
+    for _ in range(10):
+        threads = [threading.Thread(target=observe) for _ in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    gc.collect()
+    assert monitor._shards.live() <= 1
+    assert monitor.report()['rows'] == 1000
+
+
+def test_snapshot_round_trip(monitor, reference, data, tmp_path):
+    save_reference(reference, str(tmp_path / 'reference.json'))
+    assert load_reference(str(tmp_path / 'reference.json')) == json.loads(json.dumps(reference))
+    X = data[0].to_numpy(dtype=np.float64)
+    monitor.observe_batch(X[:100])
+    path = monitor.write_snapshot(str(tmp_path / 'drift_{pid}.json'))
+    with open(path) as f:
+        state = json.load(f)
+    np.testing.assert_array_equal(monitor.from_snapshot_counts(state['counts']), monitor.counts())
+    monitor.observe_batch(X[100:130])
+    assert monitor.report()['recent']['rows'] == 30
+
+
+def test_predictor_feeds_the_monitor(artifacts, reference, data):
+    monitor = DriftMonitor(reference)
+    model = SkinDiseaseMLModel(monitor=monitor, **artifacts)
+    rows = data[4][:20]
+    for row in rows[:5]:
+        model.predict(**row)
+    model.predict_batch(rows[5:])
+    report = monitor.report()
+    assert report['rows'] == 20 and report['predictions']['rows'] == 20
+
+
+def test_mismatched_reference_is_ignored(artifacts, reference):
+    other = json.loads(json.dumps(reference))
+    other['predictions']['bins'] = other['predictions']['bins'][::-1]
+    model = SkinDiseaseMLModel(monitor=DriftMonitor(other), **artifacts)
+    assert model._monitor is None
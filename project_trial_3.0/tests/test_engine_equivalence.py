@@ -0,0 +1,136 @@
+"""
+Equivalence checks for the fast paths against the ones they replace.
+
+A small forest and a small boosting model are trained on a few hundred
+generated rows; the tree engine (float and quantized), early exit,
+contributions, the predictor's batch entry points and the request validator
+must agree with sklearn and with the single-row paths.
+"""
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+
+from tree_engine import CompiledForest, compile_arrays, export_model
+from validation import RequestValidator
+
+NUMERIC = ('duration_days', 'age')
+
+
+@pytest.fixture(scope='module', params=['forest', 'boosting'])
+def trained(request, data):
+    X, y, _, _, _ = data
+    if request.param == 'forest':
+        model = RandomForestClassifier(n_estimators=8, max_depth=6, random_state=0)
+    else:
+        model = GradientBoostingClassifier(n_estimators=15, max_depth=3, random_state=0)
+    return model.fit(X.to_numpy(), y)
+
+
+def _engine(model, data):
+    X, _, label_encoders, disease_encoder, _ = data
+    return CompiledForest(*compile_arrays(model, label_encoders, disease_encoder, list(X.columns)))
+
+
+def _off_integers(X):
+    """Numeric features moved by multiples of 0.25, so some sit on thresholds."""
+    X_real = X.to_numpy(dtype=np.float64)
+    columns = [list(X.columns).index(name) for name in NUMERIC]
+    rng = np.random.default_rng(0)
+    X_real[:, columns] += rng.integers(-2, 3, size=(len(X_real), len(columns))) * 0.25
+    X_real[:, columns] = np.maximum(X_real[:, columns], 0)
+    return X_real
+
+
+# ============================================================================
+# TREE ENGINE
+# ============================================================================
+
+def test_compiled_matches_sklearn(trained, data):
+    X = data[0].to_numpy(dtype=np.float64)
+    engine = _engine(trained, data)
+    np.testing.assert_allclose(engine.predict_proba(X), trained.predict_proba(X), atol=1e-9)
+    np.testing.assert_array_equal(engine.predict(X), trained.predict(X))
+
+
+def test_quantized_matches_sklearn(trained, data, tmp_path):
+    X, _, label_encoders, disease_encoder, _ = data
+    export_model(trained, str(tmp_path), label_encoders, disease_encoder, list(X.columns),
+                 quantize=True)
+    compact = CompiledForest.load(str(tmp_path))
+    assert compact.quantization['grid_scale'] == 2
+    for inputs in (X.to_numpy(dtype=np.float64), _off_integers(X)):
+        expected = trained.predict_proba(inputs)
+        actual = compact.predict_proba(inputs)
+        np.testing.assert_array_equal(actual.argmax(axis=1), expected.argmax(axis=1))
+        np.testing.assert_allclose(actual, expected, atol=1e-5)
+
+
+def test_early_exit_exact_labels(trained, data):
+    X = data[0].to_numpy(dtype=np.float64)
+    engine = _engine(trained, data)
+    full = engine.predict_proba(X)
+    for block_size in (None, 1, 4):
+        proba, evaluated, exact = engine.predict_proba_early_exit(X, block_size=block_size)
+        assert exact.all()
+        assert (evaluated <= engine.n_trees).all()
+        np.testing.assert_array_equal(proba.argmax(axis=1), full.argmax(axis=1))
+
+
+def test_contributions_add_up(trained, data):
+    X = data[0].to_numpy(dtype=np.float64)
+    engine = _engine(trained, data)
+    proba, contributions, baseline = engine.predict_proba_with_contributions(X)
+    np.testing.assert_allclose(proba, trained.predict_proba(X), atol=1e-9)
+    total = baseline + contributions.sum(axis=1)
+    if isinstance(trained, GradientBoostingClassifier):
+        np.testing.assert_allclose(total, trained.decision_function(X), atol=1e-9)
+    else:
+        np.testing.assert_allclose(total, proba, atol=1e-9)
+
+
+# ============================================================================
+# PREDICTOR
+# ============================================================================
+
+def test_batch_matches_single(served, data):
+    rows = data[4][:60]
+    single = [served.predict(**row) for row in rows]
+    assert served.predict_batch(rows) == single
+
+    predictions, confidences, errors = served.predict_batch_with_confidence(rows)
+    assert not errors
+    assert predictions == single
+    expected = [served.predict_with_confidence(**row)[1] for row in rows]
+    np.testing.assert_allclose(confidences, expected, atol=1e-12)
+
+
+def test_early_exit_and_explain_match_predict(served, data):
+    for row in data[4][:30]:
+        disease, confidence, explanation = served.predict_with_confidence(explain=3, **row)
+        assert served.predict_early_exit(**row)['disease'] == disease
+        assert disease == served.predict(**row)
+        assert len(explanation['contributions']) == 3
+
+
+# ============================================================================
+# VALIDATION
+# ============================================================================
+
+def test_validator_reports_every_bad_field(served, data):
+    validator = RequestValidator.from_model(served)
+    good = data[4][0]
+    normalized, errors, _ = validator.validate(good)
+    assert not errors and normalized == good
+
+    bad = dict(good, location='wrist', age=500, itching=2, foo=1)
+    del bad['gender']
+    _, errors, _ = validator.validate(bad)
+    codes = {(e['field'], e['code']) for e in errors}
+    assert codes == {('location', 'unseen_category'), ('age', 'out_of_range'),
+                     ('itching', 'invalid_value'), ('gender', 'missing_feature'),
+                     ('foo', 'unknown_feature')}
+
+    valid_idx, columns, batch_errors, _ = validator.validate_batch([good, bad])
+    assert list(valid_idx) == [0]
+    assert {(e['field'], e['code']) for e in batch_errors[1]} == codes
+    assert served.predict_batch(columns) == [served.predict(**good)]
@@ -0,0 +1,14 @@
+"""The generator CLI never overwrites the tracked training CSV with --rows."""
+import pandas as pd
+
+from generate_dataset import main
+
+
+def test_rows_writes_its_own_csv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert main(['--rows', '1000', '--chunk-size', '400']) == 0
+    assert not (tmp_path / 'skin_disease_dataset.csv').exists()
+    assert len(pd.read_csv(tmp_path / 'skin_disease_dataset_1000.csv')) == 1000
+
+    assert main(['--rows', '500', '--out', 'load.csv']) == 0
+    assert len(pd.read_csv(tmp_path / 'load.csv')) == 500
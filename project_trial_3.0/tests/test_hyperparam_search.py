@@ -0,0 +1,24 @@
+"""The search's wall-clock budget holds even while fits are still running."""
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from hyperparam_search import successive_halving
+
+
+def test_max_seconds_does_not_wait_for_running_fits():
+    rng = np.random.default_rng(0)
+    X, y = rng.random((600, 8)), rng.integers(0, 3, 600)
+    # Rung 0 grows ~500 trees per fit, far longer than the budget
+    models = {'Random Forest': RandomForestClassifier(n_estimators=4500)}
+    budget = 0.5
+
+    started = time.perf_counter()
+    result = successive_halving(models, X, y, max_seconds=budget, n_candidates=2,
+                                workers=2, checkpoint=None)
+    elapsed = time.perf_counter() - started
+
+    assert not result['complete']
+    assert result['fits'] == 0 and result['best'] is None
+    assert elapsed < budget + 0.5
@@ -0,0 +1,61 @@
+"""Inference parallelism policy: chunking, result order and the shared pool."""
+import threading
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from inference_policy import InferencePolicy, disable_estimator_parallelism
+
+
+def test_workers_for():
+    policy = InferencePolicy(sequential_max_rows=100, rows_per_worker=50,
+                             max_workers_per_call=4, max_total_workers=8)
+    assert policy.workers_for(1) == 1
+    assert policy.workers_for(100) == 1
+    assert policy.workers_for(101) == 3
+    assert policy.workers_for(10_000) == 4
+    small_pool = InferencePolicy(sequential_max_rows=0, rows_per_worker=1,
+                                 max_workers_per_call=16, max_total_workers=2)
+    assert small_pool.workers_for(100) == 3  # the calling thread plus the pool
+
+
+def test_run_keeps_row_order_and_uses_calling_thread():
+    policy = InferencePolicy(sequential_max_rows=10, rows_per_worker=10, max_workers_per_call=4)
+    threads = set()
+
+    def score(X):
+        threads.add(threading.current_thread().name)
+        return X * 2
+
+    X = np.arange(100, dtype=np.float64).reshape(50, 2)
+    np.testing.assert_array_equal(policy.run(score, X), X * 2)
+    assert threading.current_thread().name in threads and len(threads) > 1
+
+    threads.clear()
+    policy.run(score, X[:10])
+    assert threads == {threading.current_thread().name}
+
+
+def test_one_shared_pool_under_concurrent_first_use():
+    policy = InferencePolicy(max_total_workers=2)
+    barrier = threading.Barrier(16)
+    pools = []
+
+    def first_use():
+        barrier.wait()
+        pools.append(policy._shared_pool())
+
+    threads = [threading.Thread(target=first_use) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(pool) for pool in pools}) == 1
+
+
+def test_disable_estimator_parallelism():
+    model = RandomForestClassifier(n_jobs=-1)
+    assert disable_estimator_parallelism(model) == ['n_jobs']
+    assert model.n_jobs == 1
+    assert disable_estimator_parallelism(model) == []
+    assert disable_estimator_parallelism(object()) == []
@@ -0,0 +1,68 @@
+"""Per-thread metrics shards: merging, exited threads and the exposition format."""
+import gc
+import threading
+
+from metrics import Metrics, ThreadShards
+
+
+def _run_threads(target, n):
+    threads = [threading.Thread(target=target) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_counts_from_many_threads_are_merged():
+    metrics = Metrics(buckets=(0.001, 0.01))
+
+    def record():
+        for _ in range(100):
+            metrics.inc('requests_total', labels=(('endpoint', '/predict'),))
+            metrics.observe_stage('inference', 0.005)
+
+    _run_threads(record, 8)
+    histograms, counters = metrics.snapshot()
+    assert counters[('requests_total', (('endpoint', '/predict'),))] == 800
+    counts, total = histograms[('stage_seconds', (('stage', 'inference'),))]
+    assert counts == [0, 800, 0]
+    assert abs(total - 4.0) < 1e-9
+
+
+def test_exited_threads_leave_no_shards_and_lose_no_counts():
+    metrics = Metrics()
+    for _ in range(20):
+        _run_threads(lambda: metrics.inc('errors_total', 3), 100)
+    gc.collect()
+    assert metrics._shards.live() <= 1  # at most a shard of this thread
+    assert metrics.snapshot()[1][('errors_total', ())] == 6000
+
+
+def test_thread_shards_fold_on_exit():
+    shards = ThreadShards(lambda: [0], lambda target, shard: target.__setitem__(0, target[0] + shard[0]))
+    shards.get()[0] += 1
+
+    def add():
+        shards.get()[0] += 10
+
+    _run_threads(add, 5)
+    gc.collect()
+    assert shards.live() == 1
+    assert shards.merge([0]) == [51]
+    assert shards.merge([0]) == [51]  # merging does not consume the shards
+
+
+def test_render_and_disabled():
+    metrics = Metrics(namespace='test', buckets=(0.1,))
+    metrics.observe('request_seconds', 0.05, (('endpoint', '/predict'),))
+    metrics.inc('requests_total')
+    metrics.add_gauges(lambda: [('model_info', 'Serving model', (('version', 'abc'),), 1)])
+    text = metrics.render()
+    assert 'test_request_seconds_bucket{endpoint="/predict",pid="' in text
+    assert 'le="+Inf"} 1' in text
+    assert '# TYPE test_model_info gauge' in text and 'version="abc"' in text
+
+    disabled = Metrics(enabled=False)
+    disabled.inc('requests_total')
+    disabled.observe_stage('inference', 1.0)
+    assert disabled.snapshot() == ({}, {})
@@ -0,0 +1,69 @@
+"""Micro-batcher: merging, per-item failures and statistics."""
+import threading
+
+import pytest
+
+from micro_batcher import MicroBatcher
+
+
+def _submit_together(batcher, items):
+    barrier = threading.Barrier(len(items))
+    results = {}
+
+    def call(item):
+        barrier.wait()
+        try:
+            results[item] = batcher(item, timeout=5)
+        except Exception as e:
+            results[item] = e
+
+    threads = [threading.Thread(target=call, args=(item,)) for item in items]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_items_are_merged():
+    calls = []
+
+    def score(items):
+        calls.append(len(items))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(score, max_batch_size=8, max_wait_ms=200)
+    results = _submit_together(batcher, list(range(8)))
+    assert results == {item: item * 10 for item in range(8)}
+    assert sum(calls) == 8 and len(calls) < 8 and max(calls) <= 8
+
+    stats = batcher.stats()
+    assert stats['items'] == 8 and stats['batches'] == len(calls)
+    assert sum(stats['batch_size_histogram'].values()) == len(calls)
+    assert stats['wait_ms_histogram']['+Inf'] == 8
+    assert stats['queue_depth'] == 0
+
+
+def test_batch_size_is_capped():
+    batcher = MicroBatcher(lambda items: items, max_batch_size=3, max_wait_ms=200)
+    assert _submit_together(batcher, list(range(7))) == {item: item for item in range(7)}
+    assert max(batcher.stats()['batch_size_histogram']) <= 3
+
+
+def test_failures_stay_with_their_item():
+    def score(items):
+        return [ValueError(f"bad {item}") if item % 2 else item for item in items]
+
+    batcher = MicroBatcher(score, max_batch_size=4, max_wait_ms=50)
+    results = _submit_together(batcher, [0, 1, 2, 3])
+    assert results[0] == 0 and results[2] == 2
+    assert isinstance(results[1], ValueError) and str(results[3]) == "bad 3"
+
+
+def test_score_fn_errors_fail_the_whole_batch():
+    batcher = MicroBatcher(lambda items: items[:-1], max_wait_ms=0)
+    with pytest.raises(RuntimeError, match="returned 0 results for 1 items"):
+        batcher(1, timeout=5)
+    # The background thread survives and keeps serving
+    batcher.score_fn = lambda items: items
+    assert batcher(2, timeout=5) == 2
@@ -0,0 +1,34 @@
+"""Every /predict response, errors included, names the model version that served it."""
+
+
+def test_success_and_errors_report_model_version(api, data):
+    client = api.app.test_client()
+    version = api.registry.current.version
+    good = data[4][0]
+
+    response = client.post('/predict', json=good)
+    assert response.status_code == 200
+    assert response.get_json()['model_version'] == version
+
+    bad = dict(good, age=500)
+    for path, body in (('/predict', bad), ('/predict', None), ('/predict_and_recommend', bad),
+                       ('/predict/batch', {'cases': 'nope'})):
+        response = client.post(path, json=body)
+        assert 400 <= response.status_code < 500, path
+        assert response.get_json()['model_version'] == version, path
+
+    response = client.post('/predict?explain=1&early_exit=1', json=good)
+    assert response.status_code == 400
+    assert response.get_json()['model_version'] == version
+
+    response = client.post('/predict_and_recommend?sort=price', json=good)
+    assert response.status_code == 400
+    assert response.get_json()['model_version'] == version
+
+
+def test_batch_reports_model_version(api, data):
+    response = api.app.test_client().post('/predict/batch', json=data[4][:3] + [{'age': 1}])
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['model_version'] == api.registry.current.version
+    assert body['n_errors'] == 1 and body['n_predicted'] == 3
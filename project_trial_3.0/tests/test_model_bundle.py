@@ -0,0 +1,43 @@
+"""Bundle round trip and integrity check."""
+import os
+
+import numpy as np
+import pytest
+
+from model_bundle import load_bundle, save_bundle, verify_bundle
+
+
+@pytest.fixture
+def bundle(tmp_path, data, boosting):
+    X, _, label_encoders, disease_encoder, _ = data
+    manifest = save_bundle(str(tmp_path), boosting, label_encoders, disease_encoder, list(X.columns))
+    return str(tmp_path), manifest
+
+
+def test_bundle_round_trip(bundle, data, boosting):
+    path, manifest = bundle
+    verify_bundle(path)
+    model, _, disease_encoder, feature_names, loaded = load_bundle(path, verify=True)
+    X = data[0].to_numpy(dtype=np.float64)
+    assert loaded['content_hash'] == manifest['content_hash']
+    assert feature_names == list(data[0].columns)
+    np.testing.assert_allclose(model.predict_proba(X), boosting.predict_proba(X), atol=1e-9)
+
+
+def test_edited_file_fails_verification(bundle):
+    path, manifest = bundle
+    name = next(iter(manifest['files']))
+    with open(os.path.join(path, name), 'r+b') as f:
+        first = f.read(1)
+        f.seek(0)
+        f.write(bytes([first[0] ^ 0xFF]))
+    with pytest.raises(ValueError, match=name):
+        verify_bundle(path)
+
+
+def test_missing_file_fails_verification(bundle):
+    path, manifest = bundle
+    name = sorted(manifest['files'])[-1]
+    os.remove(os.path.join(path, name))
+    with pytest.raises(ValueError, match=name):
+        load_bundle(path, verify=True)
@@ -0,0 +1,116 @@
+"""Hot reload: background load, compatibility checks, atomic swap and watching."""
+import shutil
+import threading
+import time
+
+import joblib
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier
+
+from model_registry import ModelRegistry
+from predictor import SkinDiseaseMLModel
+
+
+@pytest.fixture
+def paths(tmp_path, artifacts):
+    copied = {}
+    for key, path in artifacts.items():
+        copied[key] = str(tmp_path / f'{key}.pkl')
+        shutil.copy(path, copied[key])
+    return copied
+
+
+@pytest.fixture
+def retrained(data):
+    X, y = data[0], data[1]
+    return GradientBoostingClassifier(n_estimators=5, max_depth=2, random_state=1).fit(X.to_numpy(), y)
+
+
+def _registry(paths, **kwargs):
+    return ModelRegistry(lambda: SkinDiseaseMLModel(**paths), **kwargs)
+
+
+def test_reload_swaps_a_new_version(paths, retrained, data):
+    registry = _registry(paths)
+    serving = registry.current
+    assert registry.reload(wait=True)['status'] == 'unchanged'
+    assert registry.current is serving
+
+    joblib.dump(retrained, paths['model_path'])
+    result = registry.reload(wait=True)
+    assert result['status'] == 'swapped'
+    assert result['previous_version'] == serving.version != result['version']
+    assert registry.current.version == result['version']
+    # The old instance still serves the requests that already hold it
+    row = data[4][0]
+    assert serving.predict(**row) and registry.current.predict(**row)
+    assert registry.describe()['last_reload']['status'] == 'swapped'
+
+
+def test_incompatible_model_is_not_swapped_in(paths, data):
+    registry = _registry(paths)
+    serving = registry.current
+    encoders = joblib.load(paths['label_encoders_path'])
+    encoders['location'].classes_ = encoders['location'].classes_[::-1]
+    joblib.dump(encoders, paths['label_encoders_path'])
+
+    result = registry.reload(wait=True)
+    assert result['status'] == 'failed'
+    assert "'location' categories changed" in result['error']
+    assert registry.current is serving
+
+
+def test_failed_load_keeps_serving(paths):
+    registry = _registry(paths)
+    serving = registry.current
+    with open(paths['model_path'], 'wb') as f:
+        f.write(b'not a pickle')
+    assert registry.reload(wait=True)['status'] == 'failed'
+    assert registry.current is serving
+
+
+def test_background_reload_reports_in_progress(paths):
+    gate = threading.Event()
+    loads = []
+
+    def loader():
+        if loads:
+            gate.wait(5)
+        loads.append(1)
+        return SkinDiseaseMLModel(**paths)
+
+    registry = ModelRegistry(loader)
+    assert registry.reload(force=True) == {'status': 'started'}
+    assert registry.reload() == {'status': 'in_progress'}
+    gate.set()
+    deadline = time.monotonic() + 5
+    while registry.describe()['reloading'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert registry.last_reload['status'] == 'swapped'
+
+
+def test_watcher_picks_up_new_artifacts(paths, retrained):
+    registry = _registry(paths, poll_interval=0.05)
+    before = {t for t in threading.enumerate() if t.name == 'model-watcher'}
+    barrier = threading.Barrier(8)
+
+    def first_request():
+        barrier.wait()
+        registry.current
+
+    threads = [threading.Thread(target=first_request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Concurrent first requests start one watcher, not one each
+    watchers = {t for t in threading.enumerate() if t.name == 'model-watcher'} - before
+    assert len(watchers) == 1
+
+    old_version = registry.current.version
+    joblib.dump(retrained, paths['model_path'])
+    deadline = time.monotonic() + 5
+    while registry.current.version == old_version and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert registry.current.version != old_version
+    assert {t for t in threading.enumerate() if t.name == 'model-watcher'} - before == watchers
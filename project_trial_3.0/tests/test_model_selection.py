@@ -0,0 +1,45 @@
+"""Model selection by accuracy and serving cost, with and without a memory measure."""
+import numpy as np
+import pytest
+
+import model
+from model import measure_serving_cost, print_comparison, select_model, write_comparison
+
+
+def _results(memory):
+    cost = {
+        'fast': {'single_ms': 0.1, 'batch_us_per_row': 1.0, 'artifact_kb': 900.0, 'memory_kb': memory[0]},
+        'accurate': {'single_ms': 2.0, 'batch_us_per_row': 9.0, 'artifact_kb': 100.0, 'memory_kb': memory[1]},
+    }
+    accuracy = {'fast': 0.990, 'accurate': 0.993}
+    return {name: {'accuracy': accuracy[name], 'cv_scores': np.array([accuracy[name]]),
+                   'cost': cost[name]} for name in cost}
+
+
+def test_tolerance_picks_cheapest_within_tolerance():
+    results = _results([500.0, 100.0])
+    assert select_model(results, 'tolerance', 0.005, 'single_ms')[0] == 'fast'
+    assert select_model(results, 'tolerance', 0.005, 'memory_kb')[0] == 'accurate'
+    assert select_model(results, 'tolerance', 0.001, 'single_ms')[0] == 'accurate'
+
+
+def test_unknown_memory_is_not_a_crash(monkeypatch, tmp_path, data, boosting):
+    monkeypatch.setattr(model.os.path, 'exists', lambda path: False)
+    cost = measure_serving_cost(boosting, data[0], n_single=5, batch_size=16, repeats=1)
+    assert cost['memory_kb'] is None
+    monkeypatch.undo()
+
+    results = _results([None, None])
+    assert select_model(results, 'tolerance', 0.005, 'memory_kb')[0] == 'accurate'
+    selected, objective = select_model(results, 'weighted',
+                                       weights={'memory_kb': 1.0, 'single_ms': 0.001})
+    assert np.isfinite(list(objective.values())).all()
+    rows = write_comparison(results, objective, selected, str(tmp_path / 'comparison.csv'))
+    assert all(row['memory_kb'] is None for row in rows)
+    print_comparison(rows)
+
+
+@pytest.mark.skipif(not model.os.path.exists('/proc/self/statm'), reason="needs /proc")
+def test_memory_measured_with_proc(boosting, data):
+    cost = measure_serving_cost(boosting, data[0], n_single=5, batch_size=16, repeats=1)
+    assert cost['memory_kb'] is not None and cost['memory_kb'] >= 0
@@ -0,0 +1,70 @@
+"""LRU/TTL prediction cache and its use in front of predict."""
+import pytest
+
+import prediction_cache
+from model_registry import ModelRegistry
+from prediction_cache import PredictionCache
+from predictor import SkinDiseaseMLModel
+
+FEATURES = ['location', 'age', 'itching']
+
+
+def _cache(**kwargs):
+    return PredictionCache(FEATURES, ['location'], **kwargs)
+
+
+def test_keys_are_canonical():
+    cache = _cache(buckets={'age': 5})
+    key = cache.make_key({'itching': 1, 'age': 14, 'location': 'Face', 'extra': 'x'})
+    assert key == ('Face', 10, 1)
+    assert cache.make_key({'location': 'Face', 'age': '13.0', 'itching': 1.0}) == key
+    assert _cache().make_key({'location': 'Face', 'age': 14.5, 'itching': 1}) == ('Face', 14.5, 1)
+    assert cache.make_key({'location': 'Face', 'age': 14}) is None
+    assert cache.make_key({'location': 'Face', 'age': 'old', 'itching': 1}) is None
+    assert cache.make_key({'location': 'Face', 'age': float('nan'), 'itching': 1}) is None
+
+
+def test_lru_eviction_and_counters():
+    cache = _cache(max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # 'b' is now least recently used
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    stats = cache.stats()
+    assert (stats['size'], stats['hits'], stats['misses'], stats['evictions']) == (2, 3, 1, 1)
+    assert stats['hit_rate'] == 0.75
+
+
+def test_ttl_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(prediction_cache.time, 'monotonic', lambda: now[0])
+    cache = _cache(ttl=10)
+    cache.put('a', 1)
+    now[0] += 9
+    assert cache.get('a') == 1
+    now[0] += 2
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1 and len(cache) == 0
+
+
+def test_max_size_must_be_positive():
+    with pytest.raises(ValueError):
+        _cache(max_size=0)
+
+
+def test_cached_predictions_match_and_start_empty_per_version(artifacts, served, data):
+    rows = data[4][:40]
+    registry = ModelRegistry(lambda: SkinDiseaseMLModel(cache_size=16, **artifacts))
+    model = registry.current
+    for _ in range(2):
+        for row in rows:
+            assert model.predict_with_confidence(**row)[:2] == served.predict_with_confidence(**row)[:2]
+    stats = model.cache_stats()
+    assert stats['size'] == 16 and stats['evictions'] > 0 and stats['hits'] + stats['misses'] == 80
+
+    # A reload serves a new instance, so no output of the old version is reused
+    assert registry.reload(wait=True, force=True)['status'] == 'swapped'
+    assert registry.current is not model
+    assert registry.current.cache_stats()['size'] == 0
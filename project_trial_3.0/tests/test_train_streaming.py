@@ -0,0 +1,24 @@
+"""Out-of-core training writes the same artifact set as model.py."""
+import os
+
+from drift_monitor import DriftMonitor
+from generate_dataset import generate_legacy_dataset
+from model_bundle import verify_bundle
+from predictor import SkinDiseaseMLModel
+from train_streaming import main
+
+
+def test_streamed_artifacts_serve_with_drift_reference(tmp_path):
+    data = tmp_path / 'cases.csv'
+    generate_legacy_dataset(samples_per_disease=40, out=str(data))
+    out = tmp_path / 'out'
+    assert main(['--data', str(data), '--chunk-size', '150', '--max-trees', '12',
+                 '--out-dir', str(out)]) == 0
+
+    assert not [name for name in os.listdir(out) if '.tmp' in name]
+    verify_bundle(str(out / 'model_bundle'))
+    monitor = DriftMonitor.from_path(str(out / 'reference_profile.json'))
+    model = SkinDiseaseMLModel(*(str(out / name) for name in (
+        'skin_disease_model.pkl', 'label_encoders.pkl', 'disease_encoder.pkl', 'feature_names.pkl')),
+        monitor=monitor)
+    assert model._monitor is monitor
@@ -0,0 +1,321 @@
+"""
+Out-of-core training for datasets that do not fit in memory.
+
+The CSV is only ever read in chunks, and every pass over it streams:
+
+1. Schema: categories come from a first pass over the data (default), or
+   from the DISEASES spec in generate_dataset.py (--schema declared)
+2. Training:
+   forest  every chunk grows its share of --max-trees trees on its training
+           rows; the sub-forests are merged into one RandomForestClassifier
+   sgd     an incrementally fitted StandardScaler feeds an SGDClassifier
+           (log loss) through partial_fit, for --epochs passes
+3. Evaluation: accuracy and confusion matrix on the holdout rows. Every row
+   is assigned to the holdout by a seeded per-chunk draw, so all passes
+   agree on the split without storing it.
+
+The chunk size is derived from --max-memory-mb (parsed bytes per row are
+measured on a sample). Peak RSS is reported at the end (where the platform
+has the resource module). The output is the same artifact set model.py
+writes: the four pickles, model_bundle/ and the drift reference profile,
+which is built from a seeded sample of the holdout rows.
+
+Usage:
+    python train_streaming.py [--data skin_disease_dataset.csv] [--estimator forest|sgd]
+                              [--max-memory-mb 512] [--holdout 0.2] [--out-dir .]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import joblib
+import warnings
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from dataset_cache import _count_rows, _label_encoder
+warnings.filterwarnings('ignore')
+
+TARGET = 'disease'
+CATEGORICAL_FEATURES = ['location', 'color', 'texture', 'size', 'gender']
+# Parsed chunks are copied a few times (parsing buffers, encoding,
+# train/holdout split, float conversion), so only a fraction of the free
+# budget goes to the raw chunk
+_CHUNK_MEMORY_SHARE = 0.2
+# Merged forest size per bootstrap row per tree (measured: ~0.5 MB for a
+# 20k-row tree on the 10-class dataset)
+_FOREST_BYTES_PER_SAMPLE = 26
+# Holdout rows sampled for the drift reference profile
+_PROFILE_ROWS = 100_000
+
+
+def declared_schema():
+    """Category lists implied by generate_dataset.DISEASES."""
+    from generate_dataset import compile_spec
+
+    spec = compile_spec()
+    classes = dict(spec['vocab'])
+    classes[TARGET] = spec['diseases']
+    return classes
+
+
+def scan_schema(path, chunk_size):
+    """First pass: sorted category lists of every categorical column."""
+    seen = {column: set() for column in CATEGORICAL_FEATURES + [TARGET]}
+    for chunk in pd.read_csv(path, chunksize=chunk_size, usecols=list(seen),
+                             dtype={column: str for column in seen}):
+        for column, values in seen.items():
+            values.update(chunk[column].unique())
+    return {column: sorted(values) for column, values in seen.items()}
+
+
+def chunk_size_for(path, max_memory_mb, model_mb=0.0, sample_rows=10_000):
+    """
+    Rows per chunk so a parsed chunk stays within its share of the budget.
+
+    The budget is for the whole process, so what the interpreter and the
+    imported libraries already use and the expected model size (model_mb)
+    are subtracted first.
+    """
+    sample = pd.read_csv(path, nrows=sample_rows)
+    per_row = sample.memory_usage(deep=True).sum() / max(len(sample), 1)
+    used = peak_rss_mb() or 0.0
+    available = max_memory_mb - used - model_mb
+    if available <= 0:
+        raise ValueError(f"--max-memory-mb {max_memory_mb:.0f} does not cover the "
+                         f"{used:.0f} MB the process already uses plus the "
+                         f"~{model_mb:.0f} MB model")
+    return max(1_000, int(available * 1e6 * _CHUNK_MEMORY_SHARE / per_row))
+
+
+class ChunkStream:
+    """
+    Re-iterable stream of encoded (X, y, holdout mask) chunks.
+
+    Args:
+        path (str): CSV path
+        classes (dict): Column -> category list (codes are list positions)
+        chunk_size (int): Rows per chunk
+        holdout (float): Fraction of rows held out for evaluation
+        seed (int): Seed of the per-chunk holdout draws
+    """
+
+    def __init__(self, path, classes, chunk_size, holdout=0.2, seed=42):
+        self.path = path
+        self.classes = classes
+        self.chunk_size = chunk_size
+        self.holdout = holdout
+        self.seed = seed
+        self.feature_names = [c for c in pd.read_csv(path, nrows=0).columns if c != TARGET]
+
+    def __iter__(self):
+        reader = pd.read_csv(self.path, chunksize=self.chunk_size,
+                             dtype={column: str for column in self.classes})
+        for index, chunk in enumerate(reader):
+            for column, classes in self.classes.items():
+                codes = pd.Categorical(chunk[column], categories=classes).codes
+                if (codes < 0).any():
+                    unknown = sorted(set(chunk[column][codes < 0]))
+                    raise ValueError(f"'{column}' has values outside the schema: {unknown}")
+                chunk[column] = codes
+            y = chunk.pop(TARGET).to_numpy()
+            X = chunk[self.feature_names]
+            rng = np.random.default_rng([self.seed, index])
+            yield X, y, rng.random(len(y)) < self.holdout
+
+
+def train_forest(stream, n_classes, trees_per_chunk=20, max_samples=20_000, random_state=42):
+    """
+    Grow a forest chunk by chunk and merge the sub-forests.
+
+    A chunk missing some classes is carried over and combined with the next
+    one, so every sub-forest sees all classes (their probability columns
+    must line up to be merged).
+    """
+    forest = None
+    carry = None
+    for index, (X, y, holdout) in enumerate(stream):
+        X, y = X[~holdout], y[~holdout]
+        if carry is not None:
+            X, y = pd.concat([carry[0], X]), np.concatenate([carry[1], y])
+            carry = None
+        if len(np.unique(y)) < n_classes:
+            carry = (X, y)
+            continue
+        part = RandomForestClassifier(
+            n_estimators=trees_per_chunk,
+            max_depth=20,
+            min_samples_split=5,
+            min_samples_leaf=2,
+            max_samples=min(max_samples, len(y)),
+            random_state=random_state + index,
+            n_jobs=-1
+        ).fit(X, y)
+        if forest is None:
+            forest = part
+        else:
+            forest.estimators_ += part.estimators_
+            forest.n_estimators = len(forest.estimators_)
+        print(f"  chunk {index}: {len(y):,} rows, {len(forest.estimators_)} trees", flush=True)
+    if forest is None:
+        raise ValueError("No chunk contained every class; use a larger --max-memory-mb")
+    if carry is not None:
+        print(f"  {len(carry[1]):,} trailing rows lacked some classes and were not used")
+    return forest
+
+
+def train_sgd(stream, n_classes, epochs=3, random_state=42):
+    """Scaler + SGD logistic regression trained with partial_fit."""
+    scaler = StandardScaler()
+    for X, y, holdout in stream:
+        scaler.partial_fit(X[~holdout].to_numpy(dtype=np.float64))
+    classifier = SGDClassifier(loss='log_loss', alpha=1e-4, random_state=random_state)
+    classes = np.arange(n_classes)
+    for epoch in range(epochs):
+        for X, y, holdout in stream:
+            X_train = scaler.transform(X[~holdout].to_numpy(dtype=np.float64))
+            classifier.partial_fit(X_train, y[~holdout], classes=classes)
+        print(f"  epoch {epoch + 1}/{epochs} done", flush=True)
+    # Both steps are already fitted
+    return Pipeline([('scaler', scaler), ('classifier', classifier)])
+
+
+def evaluate(model, stream, n_classes, profile_share=0.0):
+    """
+    Confusion matrix over the holdout rows of every chunk.
+
+    Args:
+        profile_share (float): Fraction of the holdout rows also returned,
+            with their predictions, for the drift reference profile
+
+    Returns:
+        tuple: (confusion matrix, sampled holdout rows, their predictions)
+    """
+    cm = np.zeros((n_classes, n_classes), dtype=np.int64)
+    sampled, sampled_predictions = [], []
+    for index, (X, y, holdout) in enumerate(stream):
+        if holdout.any():
+            predicted = model.predict(X[holdout])
+            np.add.at(cm, (y[holdout], predicted), 1)
+            keep = np.random.default_rng([stream.seed, index, 1]).random(len(predicted)) < profile_share
+            sampled.append(X[holdout][keep])
+            sampled_predictions.append(predicted[keep])
+    if not sampled:
+        return cm, pd.DataFrame(columns=stream.feature_names), np.empty(0, dtype=np.int64)
+    return cm, pd.concat(sampled), np.concatenate(sampled_predictions)
+
+
+def peak_rss_mb():
+    """Peak RSS of this process in MB, or None without the resource module (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train from a CSV larger than memory")
+    parser.add_argument('--data', default='skin_disease_dataset.csv')
+    parser.add_argument('--estimator', choices=['forest', 'sgd'], default='forest')
+    parser.add_argument('--schema', choices=['scan', 'declared'], default='scan',
+                        help="Fit encoders with a first pass over the data or "
+                             "from the DISEASES spec")
+    parser.add_argument('--max-memory-mb', type=float, default=512)
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help="Rows per chunk (overrides the size derived from --max-memory-mb)")
+    parser.add_argument('--holdout', type=float, default=0.2)
+    parser.add_argument('--max-trees', type=int, default=200,
+                        help="Total forest size; split evenly over the chunks")
+    parser.add_argument('--trees-per-chunk', type=int, default=None,
+                        help="Trees grown per chunk (overrides --max-trees)")
+    parser.add_argument('--max-samples', type=int, default=20_000,
+                        help="Bootstrap rows per tree (bounds tree size)")
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out-dir', default='.')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    model_mb = 0.0
+    if args.estimator == 'forest':
+        model_mb = args.max_trees * args.max_samples * _FOREST_BYTES_PER_SAMPLE / 1e6
+    chunk_size = args.chunk_size or chunk_size_for(args.data, args.max_memory_mb, model_mb)
+    print(f"Streaming '{args.data}' in chunks of {chunk_size:,} rows "
+          f"(memory budget {args.max_memory_mb:.0f} MB)")
+
+    if args.schema == 'declared':
+        classes = declared_schema()
+    else:
+        print("Scanning categories...")
+        classes = scan_schema(args.data, chunk_size)
+    n_classes = len(classes[TARGET])
+    stream = ChunkStream(args.data, classes, chunk_size, args.holdout, args.seed)
+    n_rows = _count_rows(args.data)
+
+    print(f"Training {args.estimator}...")
+    if args.estimator == 'forest':
+        # The merged forest stays in memory, so its size is bounded up front
+        n_chunks = -(-n_rows // chunk_size)
+        trees_per_chunk = args.trees_per_chunk or max(1, args.max_trees // n_chunks)
+        model = train_forest(stream, n_classes, trees_per_chunk, args.max_samples, args.seed)
+    else:
+        model = train_sgd(stream, n_classes, args.epochs, args.seed)
+
+    print("Evaluating on the streamed holdout...")
+    profile_share = min(1.0, _PROFILE_ROWS / max(n_rows * args.holdout, 1))
+    cm, X_profile, y_profile = evaluate(model, stream, n_classes, profile_share)
+    accuracy = np.trace(cm) / max(cm.sum(), 1)
+    print(f"\nHoldout accuracy: {accuracy:.4f} on {cm.sum():,} rows")
+    recall = np.diag(cm) / np.maximum(cm.sum(axis=1), 1)
+    for disease, value in zip(classes[TARGET], recall):
+        print(f"  {disease:<20} recall {value:.3f}")
+    print("\nConfusion Matrix:")
+    print(cm)
+
+    # Same artifacts as model.py, written atomically and model first so the
+    # hot-reload watcher never sees a half-written set
+    from drift_monitor import DEFAULT_REFERENCE_PATH, build_reference, save_reference
+    from model_bundle import save_bundle
+    from tree_engine import write_atomic
+
+    label_encoders = {column: _label_encoder(classes[column]) for column in CATEGORICAL_FEATURES}
+    disease_encoder = _label_encoder(classes[TARGET])
+    os.makedirs(args.out_dir, exist_ok=True)
+    out = lambda name: os.path.join(args.out_dir, name)
+    write_atomic(out('skin_disease_model.pkl'), lambda f: joblib.dump(model, f))
+    write_atomic(out('label_encoders.pkl'), lambda f: joblib.dump(label_encoders, f))
+    write_atomic(out('disease_encoder.pkl'), lambda f: joblib.dump(disease_encoder, f))
+    write_atomic(out('feature_names.pkl'), lambda f: joblib.dump(stream.feature_names, f))
+    manifest = save_bundle(out('model_bundle'), model, label_encoders, disease_encoder,
+                           stream.feature_names)
+    if len(y_profile):
+        save_reference(build_reference(X_profile, y_profile, stream.feature_names,
+                                       label_encoders, disease_encoder),
+                       out(DEFAULT_REFERENCE_PATH))
+    else:
+        print(f"No holdout rows; {DEFAULT_REFERENCE_PATH} not written")
+
+    peak = peak_rss_mb()
+    print(f"\nSaved the model pickles, model_bundle/ ({manifest['engine']}, "
+          f"version {manifest['content_hash'][:12]}) and {DEFAULT_REFERENCE_PATH} "
+          f"({len(y_profile):,} holdout rows) to '{args.out_dir}'")
+    if peak is None:
+        print(f"Done in {time.perf_counter() - started:.1f}s (peak RSS not available)")
+        return 0
+    print(f"Done in {time.perf_counter() - started:.1f}s, peak RSS {peak:.0f} MB "
+          f"(budget {args.max_memory_mb:.0f} MB)")
+    if peak > args.max_memory_mb:
+        print("Warning: peak memory exceeded the budget; lower --max-memory-mb, "
+              "--max-samples or --max-trees")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
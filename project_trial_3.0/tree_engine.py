@@ -0,0 +1,925 @@
+"""
+Compiled NumPy inference engine for the trained tree ensembles.
+
+export_model() flattens a fitted RandomForest / ExtraTrees / DecisionTree or
+GradientBoosting classifier into contiguous node arrays (feature, threshold,
+left, right, leaf value) and writes them as plain .npy files next to a JSON
+header that also carries the feature names, category lists and disease names.
+CompiledForest.load() reads them back with NumPy only, so serving from a
+compiled model needs neither sklearn nor any pickle.
+
+export --quantize writes a compact variant (format version 2). Every feature
+of this model is trained on integers (category codes, 0/1 flags, age,
+duration), so every split threshold is a midpoint between two integers, a
+multiple of 0.5. Thresholds are stored as 2t on a half-unit grid as
+uint8/uint16 and inputs are mapped to ceil(2x): x <= t exactly when
+ceil(2x) <= 2t, for any real x (a float age of 15.7 included). A model whose
+thresholds are not on that grid is stored as floor(t), which is exact for
+integer inputs only, so such an export rejects non-integer inputs. Feature
+indices are uint8, node indices int32, and only leaves keep a
+(float32 or float16) value row. Leaves need no right child (their threshold
+is the grid maximum, so rows always take the left self-loop), so right[leaf]
+holds the leaf's value row. The export reports the size and memory saved
+and checks agreement with the original model on the full dataset.
+
+CompiledForest.predict_proba_early_exit() evaluates the trees block by block
+and stops for a row as soon as its leading class cannot be overtaken: every
+tree's contribution to each class score is bounded by the lowest and highest
+leaf of that tree, so once the leader's worst case still beats every other
+class's best case over the remaining trees, the label equals the full
+evaluation's. An optional time budget stops earlier without that guarantee.
+
+CompiledForest.predict_proba_with_contributions() also returns per-feature
+contributions (Saabas): every step down a tree changes the node value by a
+delta, precomputed once per model, that is credited to the feature split
+on. A row's contributions plus the root values (the baseline) add up to its
+class probabilities (forests) or raw scores (boosting). This needs the value
+of every node, so quantized models cannot explain predictions.
+
+Usage:
+    python tree_engine.py export [--model skin_disease_model.pkl] [--out compiled_model]
+                                 [--quantize [--value-dtype float32|float16]]
+    python tree_engine.py verify [--model skin_disease_model.pkl] [--compiled compiled_model]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+FORMAT_VERSION = 1
+QUANTIZED_FORMAT_VERSION = 2
+META_FILE = 'meta.json'
+ARRAY_NAMES = ('feature', 'threshold', 'left', 'right', 'value',
+               'missing_left', 'roots', 'tree_output')
+QUANTIZED_ARRAY_NAMES = ('feature', 'threshold', 'left', 'right', 'value',
+                         'roots', 'tree_output')
+
+# Upper bound on (rows x trees) node indices traversed at once
+_CHUNK_CELLS = 1 << 18
+# Early exit: default number of tree blocks, stops considered when
+# predicting where rows settle, and the margin by which the leader must be
+# safe (absorbs summation-order rounding)
+_EXIT_BLOCKS = 8
+_EXIT_CANDIDATES = 32
+_EXIT_SLACK = 1e-9
+
+
+# ============================================================================
+# EXPORT (needs the fitted sklearn objects, not used at serve time)
+# ============================================================================
+
+def export_model(model, out_dir, label_encoders, disease_encoder, feature_names,
+                 quantize=False, value_dtype='float32'):
+    """
+    Flatten a fitted tree ensemble and its encoders into a compiled model directory.
+
+    Args:
+        model: Fitted RandomForestClassifier, ExtraTreesClassifier,
+            DecisionTreeClassifier or GradientBoostingClassifier
+        out_dir (str): Directory to write (created if needed)
+        label_encoders (dict): Feature name -> fitted LabelEncoder
+        disease_encoder: Fitted LabelEncoder of the target
+        feature_names (list): Model column order
+        quantize (bool): Write the compact integer-grid format
+        value_dtype (str): Leaf value dtype of the compact format
+            ('float32' or 'float16')
+
+    Returns:
+        dict: The written header (meta.json contents)
+
+    Raises:
+        TypeError: If the model is not a supported tree ensemble
+        ValueError: If quantize is set and the model cannot be quantized
+    """
+    arrays, meta = compile_arrays(model, label_encoders, disease_encoder, feature_names)
+    if quantize:
+        arrays, meta['quantization'] = quantize_arrays(arrays, value_dtype)
+        meta['format_version'] = QUANTIZED_FORMAT_VERSION
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name, array in arrays.items():
+        write_atomic(os.path.join(out_dir, f'{name}.npy'), lambda f, a=array: np.save(f, a))
+    # Arrays of the other format would be mistaken for part of this one
+    stale = set(ARRAY_NAMES + QUANTIZED_ARRAY_NAMES) - set(arrays)
+    for name in stale:
+        path = os.path.join(out_dir, f'{name}.npy')
+        if os.path.exists(path):
+            os.remove(path)
+    write_atomic(os.path.join(out_dir, META_FILE),
+                 lambda f: f.write(json.dumps(meta, indent=2).encode()))
+
+    return meta
+
+
+def compile_arrays(model, label_encoders, disease_encoder, feature_names):
+    """
+    Flatten a fitted tree ensemble into float node arrays (format version 1).
+
+    Returns:
+        tuple: (arrays by name, header)
+    """
+    trees, kind = _collect_trees(model)
+    n_values = 1 if kind == 'boosting' else len(model.classes_)
+
+    sizes = [tree.node_count for tree, _ in trees]
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+    n_nodes = int(np.sum(sizes))
+
+    arrays = {
+        'feature': np.empty(n_nodes, dtype=np.int32),
+        'threshold': np.empty(n_nodes, dtype=np.float64),
+        'left': np.empty(n_nodes, dtype=np.int32),
+        'right': np.empty(n_nodes, dtype=np.int32),
+        'value': np.empty((n_nodes, n_values), dtype=np.float64),
+        'missing_left': np.zeros(n_nodes, dtype=bool),
+        'roots': offsets.astype(np.int32),
+        'tree_output': np.array([output for _, output in trees], dtype=np.int32),
+    }
+
+    scale = getattr(model, 'learning_rate', 1.0)
+    for (tree, _), start, size in zip(trees, offsets, sizes):
+        nodes = slice(start, start + size)
+        own = np.arange(start, start + size, dtype=np.int64)
+        leaf = tree.children_left == -1
+
+        # Leaves loop back to themselves, so every row can take max_depth steps
+        arrays['feature'][nodes] = np.where(leaf, 0, tree.feature)
+        arrays['threshold'][nodes] = np.where(leaf, np.inf, tree.threshold)
+        arrays['left'][nodes] = np.where(leaf, own, tree.children_left + start)
+        arrays['right'][nodes] = np.where(leaf, own, tree.children_right + start)
+        if hasattr(tree, 'missing_go_to_left'):
+            arrays['missing_left'][nodes] = np.asarray(tree.missing_go_to_left, dtype=bool)
+
+        value = tree.value[:, 0, :]
+        if kind == 'boosting':
+            arrays['value'][nodes] = value * scale
+        else:
+            totals = value.sum(axis=1, keepdims=True)
+            arrays['value'][nodes] = value / np.where(totals == 0, 1, totals)
+
+    meta = {
+        'format': 'compiled_trees',
+        'format_version': FORMAT_VERSION,
+        'kind': kind,
+        'n_features': int(model.n_features_in_),
+        'n_trees': len(trees),
+        'n_nodes': n_nodes,
+        'max_depth': int(max(tree.max_depth for tree, _ in trees)),
+        'classes': [int(c) for c in model.classes_],
+        'feature_names': list(feature_names),
+        'categories': {col: [str(c) for c in le.classes_] for col, le in label_encoders.items()},
+        'diseases': [str(c) for c in disease_encoder.classes_],
+    }
+    if kind == 'boosting':
+        meta.update(_boosting_meta(model))
+    return arrays, meta
+
+
+def quantize_arrays(arrays, value_dtype='float32'):
+    """
+    Convert float node arrays to the compact integer-grid format.
+
+    When every threshold is a multiple of 0.5 the grid has half-unit steps
+    (grid_scale 2) and stays exact for any real input, since x <= t is
+    ceil(2x) <= 2t. Otherwise thresholds are floored (grid_scale 1), which
+    is exact for integer inputs only: for integer x, x <= t is x <= floor(t).
+    The grid has no missing value, so missing-value routing is dropped and
+    the quantized model rejects NaN inputs.
+
+    Args:
+        arrays (dict): compile_arrays() output
+        value_dtype (str): 'float32' or 'float16' leaf values
+
+    Returns:
+        tuple: (compact arrays by name, quantization header)
+
+    Raises:
+        ValueError: If a split threshold is below 0 or beyond uint16
+    """
+    threshold = arrays['threshold']
+    split = np.isfinite(threshold)
+    doubled = threshold[split] * 2
+    scale = 2 if np.array_equal(doubled, np.floor(doubled)) else 1
+    grid = np.floor(threshold[split] * scale)
+    if grid.size and grid.min() < 0:
+        raise ValueError("Negative split thresholds cannot be stored on the unsigned grid")
+    top = grid.max() if grid.size else 0
+    if top < np.iinfo(np.uint8).max:
+        input_dtype = np.uint8
+    elif top < np.iinfo(np.uint16).max:
+        input_dtype = np.uint16
+    else:
+        raise ValueError(f"Split threshold {top:.0f} does not fit in uint16")
+
+    # The grid maximum sends every (clipped) row left, into the leaf's self-loop
+    q_threshold = np.full(len(threshold), np.iinfo(input_dtype).max, dtype=input_dtype)
+    q_threshold[split] = grid
+    leaves = np.flatnonzero(~split)
+    right = arrays['right'].astype(np.int32)
+    right[leaves] = np.arange(len(leaves), dtype=np.int32)
+    n_features = int(arrays['feature'].max()) + 1
+
+    compact = {
+        'feature': arrays['feature'].astype(np.uint8 if n_features <= 256 else np.uint16),
+        'threshold': q_threshold,
+        'left': arrays['left'].astype(np.int32),
+        'right': right,
+        'value': arrays['value'][leaves].astype(value_dtype),
+        'roots': arrays['roots'].astype(np.int32),
+        'tree_output': arrays['tree_output'].astype(np.int32),
+    }
+    header = {'input_dtype': np.dtype(input_dtype).name,
+              'value_dtype': np.dtype(value_dtype).name,
+              'grid_scale': scale,
+              'n_leaves': int(len(leaves))}
+    return compact, header
+
+
+def write_atomic(path, write):
+    """
+    Write a file through a temporary sibling and rename it into place.
+
+    Processes that still read (or memory-map) the old file keep seeing the
+    old contents, so artifacts can be replaced under a running server.
+
+    Args:
+        path (str): Destination file
+        write: Callable receiving the open binary file object
+    """
+    tmp = f'{path}.tmp-{os.getpid()}'
+    with open(tmp, 'wb') as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def _collect_trees(model):
+    """Return ([(sklearn Tree, output column)], kind) for a fitted model."""
+    if hasattr(model, 'tree_'):
+        return [(model.tree_, 0)], 'forest'
+
+    estimators = getattr(model, 'estimators_', None)
+    if isinstance(estimators, np.ndarray) and hasattr(model, 'learning_rate'):
+        # GradientBoosting: one regression tree per (stage, class)
+        return [(est.tree_, k) for stage in estimators for k, est in enumerate(stage)], 'boosting'
+    if isinstance(estimators, list) and estimators and all(hasattr(e, 'tree_') for e in estimators):
+        return [(est.tree_, 0) for est in estimators], 'forest'
+
+    raise TypeError(
+        f"Cannot compile {type(model).__name__}: only tree ensembles "
+        "(random forest, extra trees, decision tree, gradient boosting) are supported"
+    )
+
+
+def _boosting_meta(model):
+    """Baseline raw score and link function of a GradientBoostingClassifier."""
+    zeros = np.zeros((1, model.n_features_in_), dtype=np.float32)
+    init_raw = np.asarray(model._raw_predict_init(zeros), dtype=np.float64)[0]
+    if len(model.classes_) > 2:
+        link = 'softmax'
+    elif getattr(model, 'loss', 'log_loss') == 'exponential':
+        link = 'exponential'
+    else:
+        link = 'logistic'
+    return {'init_raw': init_raw.tolist(), 'link': link}
+
+
+# ============================================================================
+# SERVING (NumPy only)
+# ============================================================================
+
+class ExportedLabelEncoder:
+    """
+    Minimal stand-in for a fitted LabelEncoder, rebuilt from exported classes.
+    """
+
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes, dtype=object)
+
+    def transform(self, y):
+        values = np.asarray(y).astype(str)
+        classes = self.classes_.astype(str)
+        codes = np.searchsorted(classes, values)
+        known = classes[np.minimum(codes, len(classes) - 1)] == values
+        if not known.all():
+            raise ValueError(f"y contains previously unseen labels: {list(values[~known])}")
+        return codes
+
+    def inverse_transform(self, y):
+        return self.classes_[np.asarray(y, dtype=np.intp)]
+
+
+class CompiledForest:
+    """
+    Batched tree-ensemble traversal over flat NumPy node arrays.
+
+    Implements the subset of the sklearn classifier API the predictor uses:
+    classes_, predict() and predict_proba().
+    """
+
+    def __init__(self, arrays, meta):
+        self.meta = meta
+        self.kind = meta['kind']
+        self.classes_ = np.asarray(meta['classes'])
+        self.n_features_in_ = meta['n_features']
+        self.n_trees = meta['n_trees']
+        self.max_depth = meta['max_depth']
+        self.quantization = meta.get('quantization')
+
+        for name in QUANTIZED_ARRAY_NAMES if self.quantization else ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+        if self.quantization:
+            self.missing_left = None
+            self._has_missing_left = False
+            self._input_dtype = np.dtype(self.quantization['input_dtype'])
+            self._input_max = np.iinfo(self._input_dtype).max
+            # Exports without it predate the half-unit grid: integer inputs only
+            self._grid_scale = self.quantization.get('grid_scale', 1)
+        else:
+            self._has_missing_left = bool(self.missing_left.any())
+
+        if self.kind == 'boosting':
+            self.init_raw = np.asarray(meta['init_raw'], dtype=np.float64)
+            self.link = meta['link']
+            # Routes each tree's scalar output to its class column
+            self._output_map = np.zeros((self.n_trees, len(self.init_raw)))
+            self._output_map[np.arange(self.n_trees), self.tree_output] = 1.0
+        self._exit_bounds = None
+        self._explain_arrays = None
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        """
+        Load a compiled model directory written by export_model().
+
+        Args:
+            path (str): Compiled model directory
+            mmap_mode (str, optional): Passed to np.load, e.g. 'r' to
+                memory-map the node arrays instead of reading them
+
+        Returns:
+            CompiledForest
+        """
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        if (meta.get('format') != 'compiled_trees'
+                or meta.get('format_version') not in (FORMAT_VERSION, QUANTIZED_FORMAT_VERSION)):
+            raise ValueError(f"{path} is not a compiled model (format version "
+                             f"{FORMAT_VERSION} or {QUANTIZED_FORMAT_VERSION})")
+        names = QUANTIZED_ARRAY_NAMES if 'quantization' in meta else ARRAY_NAMES
+        arrays = {
+            name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode)
+            for name in names
+        }
+        return cls(arrays, meta)
+
+    def apply(self, X):
+        """
+        Find the leaf reached in every tree.
+
+        Args:
+            X: Array of shape (n_samples, n_features)
+
+        Returns:
+            np.ndarray: Global leaf node indices of shape (n_samples, n_trees)
+        """
+        return self._traverse(self._prepare(X), self.roots)
+
+    def _prepare(self, X):
+        """Inputs in the dtype the thresholds are compared in."""
+        if self.quantization:
+            return self._to_grid(X)
+        return np.asarray(X, dtype=np.float32)  # sklearn compares float32 features
+
+    def _traverse(self, X, roots, path=None):
+        """
+        Leaf reached by every prepared row in the trees starting at roots.
+
+        When path is a list, the nodes reached at every level are appended
+        to it (rows already on a leaf repeat it).
+        """
+        # Gathering from the flattened rows is cheaper than 2-D fancy indexing
+        flat = np.ascontiguousarray(X).ravel()
+        base = (np.arange(len(X)) * X.shape[1])[:, None]
+        node = np.repeat(roots[None, :], len(X), axis=0)
+
+        for _ in range(self.max_depth):
+            x = flat[base + self.feature[node]]
+            go_left = x <= self.threshold[node]
+            if self._has_missing_left:
+                go_left |= np.isnan(x) & self.missing_left[node]
+            nxt = np.where(go_left, self.left[node], self.right[node])
+            if (nxt == node).all():
+                break  # every row sits on a leaf in every tree
+            node = nxt
+            if path is not None:
+                path.append(node)
+        return node
+
+    def _to_grid(self, X):
+        """
+        Map inputs onto the grid of a quantized model and clip them to it.
+
+        Raises:
+            ValueError: For NaN inputs, and for non-integer inputs when the
+                thresholds are on the integer grid (grid_scale 1)
+        """
+        # sklearn compares float32 features; doubling a float32 is exact
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if np.isnan(X).any():
+            raise ValueError("Quantized models do not accept missing (NaN) feature values")
+        if self._grid_scale == 1:
+            if not np.array_equal(X, np.floor(X)):
+                raise ValueError("This quantized model only accepts integer feature values; "
+                                 "re-export it or serve the float model")
+        else:
+            X = np.ceil(X * self._grid_scale)
+        return np.clip(X, 0, self._input_max).astype(self._input_dtype)
+
+    def nbytes(self):
+        """Bytes held by the node arrays."""
+        names = QUANTIZED_ARRAY_NAMES if self.quantization else ARRAY_NAMES
+        return sum(getattr(self, name).nbytes for name in names)
+
+    def predict_proba(self, X):
+        """
+        Predict class probabilities, matching the source estimator's predict_proba.
+
+        Args:
+            X: Array of shape (n_samples, n_features)
+
+        Returns:
+            np.ndarray: Probabilities of shape (n_samples, n_classes)
+        """
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X[None, :]
+        out = np.empty((len(X), len(self.classes_)))
+        step = max(1, _CHUNK_CELLS // self.n_trees)
+        for start in range(0, len(X), step):
+            leaves = self.apply(X[start:start + step])
+            out[start:start + step] = self._aggregate(leaves)
+        return out
+
+    def predict(self, X):
+        """Predict class labels (argmax of predict_proba)."""
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def _aggregate(self, leaves):
+        """Combine per-tree leaf values into class probabilities."""
+        # Quantized models keep value rows for leaves only, indexed by right[leaf]
+        rows = self.right[leaves] if self.quantization else leaves
+        if self.kind == 'forest':
+            return self.value[rows].sum(axis=1, dtype=np.float64) / self.n_trees
+
+        raw = self.init_raw + self.value[rows, 0].astype(np.float64) @ self._output_map
+        return self._link(raw)
+
+    def _link(self, raw):
+        """Boosting raw scores -> class probabilities."""
+        if self.link == 'softmax':
+            raw = np.exp(raw - raw.max(axis=1, keepdims=True))
+            return raw / raw.sum(axis=1, keepdims=True)
+        factor = 2.0 if self.link == 'exponential' else 1.0
+        positive = 1.0 / (1.0 + np.exp(-factor * raw[:, 0]))
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict_proba_early_exit(self, X, block_size=None, budget_ms=None):
+        """
+        Predict class probabilities, stopping once each row's label is settled.
+
+        After a first block of trees, rows whose leading class can no longer
+        be overtaken by the remaining trees stop: their label is exact and
+        their probabilities are the partial ensemble's. The next block ends
+        where the earliest remaining row would be settled if its current
+        lead held, so the margin test runs a few times rather than after
+        every small block. Once budget_ms has passed, the remaining rows stop
+        and are reported as not exact; a block is only started when it is
+        expected to fit in the budget. The first block is always evaluated.
+
+        Args:
+            X: Array of shape (n_samples, n_features)
+            block_size (int, optional): Trees in the first block (rounded up
+                to whole boosting stages); defaults to an eighth of the trees
+            budget_ms (float, optional): Time budget for the whole call
+
+        Returns:
+            tuple: (probabilities of shape (n_samples, n_classes), trees
+            evaluated per row, whether each row's label is exact)
+        """
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X[None, :]
+        deadline = None if budget_ms is None else time.perf_counter() + budget_ms / 1000
+        per_stage = len(self.init_raw) if self.kind == 'boosting' else 1
+        if block_size is None:
+            block_size = -(-self.n_trees // _EXIT_BLOCKS)
+        block_size = min(self.n_trees, max(per_stage, -(-int(block_size) // per_stage) * per_stage))
+
+        out = np.empty((len(X), len(self.classes_)))
+        evaluated = np.empty(len(X), dtype=np.int64)
+        exact = np.empty(len(X), dtype=bool)
+        step = max(1, _CHUNK_CELLS // self.n_trees)
+        for start in range(0, len(X), step):
+            chunk = slice(start, start + step)
+            out[chunk], evaluated[chunk], exact[chunk] = self._early_exit(
+                self._prepare(X[chunk]), block_size, per_stage, deadline)
+        return out, evaluated, exact
+
+    def _early_exit(self, X, block_size, per_stage, deadline):
+        """predict_proba_early_exit() for one chunk of prepared rows."""
+        started = time.perf_counter()
+        lowest, highest, score_map = self._early_exit_bounds()
+        n_rows, n_classes = len(X), len(self.classes_)
+        spacing = per_stage * max(1, self.n_trees // per_stage // _EXIT_CANDIDATES)
+        candidates = np.append(np.arange(spacing, self.n_trees, spacing), self.n_trees)
+
+        # Class scores: summed probabilities (forest) or raw scores, where a
+        # binary model's single raw score is the second column
+        base = np.zeros(n_classes)
+        if self.kind == 'boosting':
+            base[n_classes - len(self.init_raw):] = self.init_raw
+        scores = np.repeat(base[None, :], n_rows, axis=0)
+        evaluated = np.zeros(n_rows, dtype=np.int64)
+        exact = np.zeros(n_rows, dtype=bool)
+        active = np.arange(n_rows)
+        start, stop = 0, block_size
+        block_started = started
+
+        while True:
+            leaves = self._traverse(X[active], self.roots[start:stop])
+            rows = self.right[leaves] if self.quantization else leaves
+            if self.kind == 'forest':
+                scores[active] += self.value[rows].sum(axis=1, dtype=np.float64)
+            else:
+                scores[active] += self.value[rows, 0].astype(np.float64) @ score_map[start:stop]
+            evaluated[active] = stop
+            if stop == self.n_trees:
+                exact[active] = True
+                break
+
+            # With the trees after stop k still to come, a row is settled
+            # when the leader's lowest possible final score beats every other
+            # class's highest. k = stop is the real test; later k predict
+            # where the row would settle if its scores kept growing at the
+            # same rate per tree.
+            later = candidates[candidates > stop]
+            ks = np.append(stop, later)
+            current = scores[active]
+            leader = np.argmax(current, axis=1)
+            index = np.arange(len(active))
+            projected = base + (current - base)[:, None, :] * (ks / stop)[None, :, None]
+            floor = projected[index, :, leader] + (lowest[-1] - lowest[ks])[:, leader].T
+            ceiling = projected + (highest[-1] - highest[ks])[None, :, :]
+            ceiling[index, :, leader] = -np.inf
+            safe = floor > ceiling.max(axis=2) + _EXIT_SLACK
+
+            settled = safe[:, 0]
+            exact[active[settled]] = True
+            active = active[~settled]
+            if not len(active):
+                break
+
+            safe = safe[~settled, 1:]
+            first = np.where(safe.any(axis=1), safe.argmax(axis=1), len(later) - 1)
+            start, stop = stop, int(later[first.min()])
+            if deadline is not None:
+                # Blocks cost a fixed overhead plus a share per tree: stop
+                # if even the last block's time no longer fits
+                now = time.perf_counter()
+                if now + (now - block_started) >= deadline:
+                    break
+                per_tree = (now - started) / start
+                fits = int((deadline - now) / per_tree) // per_stage * per_stage
+                stop = min(stop, start + max(per_stage, fits))
+            block_started = time.perf_counter()
+
+        if self.kind == 'forest':
+            return scores / evaluated[:, None], evaluated, exact
+        return self._link(scores[:, n_classes - len(self.init_raw):]), evaluated, exact
+
+    def predict_proba_with_contributions(self, X):
+        """
+        Predict class probabilities and per-feature contributions in one traversal.
+
+        Args:
+            X: Array of shape (n_samples, n_features)
+
+        Returns:
+            tuple: (probabilities of shape (n_samples, n_classes),
+            contributions of shape (n_samples, n_features, n_classes),
+            baseline of shape (n_classes,)). Contributions and baseline are
+            in probabilities for forests and in raw scores (log-odds) for
+            boosting, where a binary model's class 0 gets the negated
+            class 1 scores; baseline + contributions summed over features
+            gives the row's probabilities or raw scores.
+
+        Raises:
+            ValueError: For quantized models, which keep leaf values only
+        """
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X[None, :]
+        delta, split, baseline = self._explain()
+        n_rows, n_classes = len(X), len(self.classes_)
+        n_values = len(baseline)
+        probabilities = np.empty((n_rows, n_classes))
+        contributions = np.empty((n_rows, self.n_features_in_, n_values))
+        step = max(1, _CHUNK_CELLS // self.n_trees)
+        for start in range(0, n_rows, step):
+            chunk = slice(start, start + step)
+            path = []
+            leaves = self._traverse(self._prepare(X[chunk]), self.roots, path)
+            probabilities[chunk] = self._aggregate(leaves)
+            contributions[chunk] = self._credit(path, delta, split, len(leaves), n_values)
+
+        if self.kind == 'forest':
+            return probabilities, contributions / self.n_trees, baseline
+        if n_values == n_classes:
+            return probabilities, contributions, baseline
+        # Binary boosting: one raw score, the log-odds of class 1
+        return (probabilities, np.concatenate([-contributions, contributions], axis=2),
+                np.concatenate([-baseline, baseline]))
+
+    def _credit(self, path, delta, split, n_rows, n_values):
+        """Sum the value deltas along the visited nodes per (row, feature, score column)."""
+        n_features = self.n_features_in_
+        if not path:
+            return np.zeros((n_rows, n_features, n_values))
+        nodes = np.stack(path)  # (levels, rows, trees)
+        weights = delta[nodes]
+        # Rows already on a leaf repeat it; credit every node once
+        weights[1:][nodes[1:] == nodes[:-1]] = 0.0
+        cell = (np.arange(n_rows)[None, :, None] * n_features + split[nodes]) * n_values
+        if self.kind == 'forest':
+            cell = cell[..., None] + np.arange(n_values)  # a delta per class
+        else:
+            cell = cell + self.tree_output  # a delta for the tree's raw score
+        out = np.bincount(cell.ravel(), weights=weights.ravel(),
+                          minlength=n_rows * n_features * n_values)
+        return out.reshape(n_rows, n_features, n_values)
+
+    def _explain(self):
+        """
+        Per-node value deltas for contributions (computed once).
+
+        Returns:
+            tuple: (delta, split, baseline) where delta[node] is the node's
+            value minus its parent's (forests: a row of class probabilities,
+            boosting: a raw score), split[node] the feature its parent splits on and
+            baseline the summed root values per class (forests) or raw score
+            (boosting, including the initial raw score)
+
+        Raises:
+            ValueError: For quantized models
+        """
+        if self._explain_arrays is not None:
+            return self._explain_arrays
+        if self.quantization:
+            raise ValueError("Quantized compiled models keep leaf values only and cannot "
+                             "explain predictions; export without --quantize")
+        n_nodes = len(self.left)
+        own = np.arange(n_nodes)
+        parent = own.copy()  # roots are their own parent: zero delta
+        internal = np.flatnonzero(self.left != own)
+        parent[self.left[internal]] = internal
+        parent[self.right[internal]] = internal
+
+        value = np.asarray(self.value, dtype=np.float64)
+        if self.kind == 'boosting':
+            value = value[:, 0]
+        delta = value - value[parent]
+        split = np.asarray(self.feature, dtype=np.intp)[parent]
+        if self.kind == 'forest':
+            baseline = value[self.roots].sum(axis=0) / self.n_trees
+        else:
+            baseline = self.init_raw + value[self.roots] @ self._output_map
+        self._explain_arrays = (delta, split, baseline)
+        return self._explain_arrays
+
+    def _early_exit_bounds(self):
+        """
+        Cumulative per-tree bounds on the class scores (computed once).
+
+        Returns:
+            tuple: (lowest, highest, score_map) where lowest[k] / highest[k]
+            hold the smallest / largest total the first k trees can add to
+            each class score, and score_map routes a boosting tree's output
+            to its class score column
+        """
+        if self._exit_bounds is not None:
+            return self._exit_bounds
+        n_classes = len(self.classes_)
+        leaf_nodes = np.flatnonzero(self.left == np.arange(len(self.left)))
+        starts = np.searchsorted(leaf_nodes, self.roots)
+        rows = self.right[leaf_nodes] if self.quantization else leaf_nodes
+
+        score_map = None
+        if self.kind == 'forest':
+            values = self.value[rows].astype(np.float64)
+            lowest = np.minimum.reduceat(values, starts, axis=0)
+            highest = np.maximum.reduceat(values, starts, axis=0)
+        else:
+            values = self.value[rows, 0].astype(np.float64)
+            column = self.tree_output + (n_classes - len(self.init_raw))
+            trees = np.arange(self.n_trees)
+            score_map = np.zeros((self.n_trees, n_classes))
+            score_map[trees, column] = 1.0
+            lowest = np.zeros((self.n_trees, n_classes))
+            highest = np.zeros((self.n_trees, n_classes))
+            lowest[trees, column] = np.minimum.reduceat(values, starts)
+            highest[trees, column] = np.maximum.reduceat(values, starts)
+
+        zero = np.zeros((1, n_classes))
+        self._exit_bounds = (np.concatenate([zero, np.cumsum(lowest, axis=0)]),
+                             np.concatenate([zero, np.cumsum(highest, axis=0)]),
+                             score_map)
+        return self._exit_bounds
+
+
+def load_compiled(path, mmap_mode=None):
+    """
+    Load a compiled model directory with everything the predictor needs.
+
+    Returns:
+        tuple: (model, label_encoders, disease_encoder, feature_names)
+    """
+    model = CompiledForest.load(path, mmap_mode=mmap_mode)
+    label_encoders = {
+        col: ExportedLabelEncoder(classes) for col, classes in model.meta['categories'].items()
+    }
+    disease_encoder = ExportedLabelEncoder(model.meta['diseases'])
+    return model, label_encoders, disease_encoder, list(model.meta['feature_names'])
+
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+
+def _load_pickles(args):
+    import joblib
+    import warnings
+    warnings.filterwarnings('ignore')
+    return (joblib.load(args.model), joblib.load(args.label_encoders),
+            joblib.load(args.disease_encoder), joblib.load(args.feature_names))
+
+
+def _encoded_dataset(path, label_encoders, feature_names):
+    import pandas as pd
+    df = pd.read_csv(path)
+    for col, le in label_encoders.items():
+        df[col] = le.transform(df[col])
+    return df[feature_names].to_numpy(dtype=np.float64)
+
+
+def _single_row_latency(predict_proba, X, n=300):
+    """p50 / p99 single-row latency in milliseconds."""
+    timings = []
+    for i in range(n):
+        row = X[i % len(X)][None, :]
+        start = time.perf_counter()
+        predict_proba(row)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def _dir_bytes(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def _sklearn_tree_bytes(model):
+    """Node structs and value arrays held by the fitted sklearn trees."""
+    trees, _ = _collect_trees(model)
+    total = 0
+    for tree, _ in trees:
+        state = tree.__getstate__()
+        total += state['nodes'].nbytes + state['values'].nbytes
+    return total
+
+
+def report_compact(model, compiled_dir, model_path, X, label_encoders, disease_encoder,
+                   feature_names):
+    """
+    Print the size and memory saved by a quantized export and its agreement
+    with the original model.
+
+    Args:
+        model: The original fitted estimator
+        compiled_dir (str): The quantized export
+        model_path (str): The original pickle (for its file size)
+        X (np.ndarray): Encoded rows to compare predictions on
+        label_encoders, disease_encoder, feature_names: As for export_model
+
+    Agreement is also checked with the numeric features moved off the
+    integers (by multiples of 0.25, so some land exactly on thresholds).
+
+    Returns:
+        tuple: (label agreement fraction (the lower of the two checks),
+        max |proba difference|)
+    """
+    compact = CompiledForest.load(compiled_dir)
+    plain = CompiledForest(*compile_arrays(model, label_encoders, disease_encoder, feature_names))
+    q = compact.quantization
+
+    print(f"Quantized export: inputs {q['input_dtype']}, leaf values {q['value_dtype']}, "
+          f"{compact.meta['n_nodes']:,} nodes ({q['n_leaves']:,} leaves)")
+    print(f"{'':<28}{'bytes':>14}{'vs original':>13}")
+    original_disk = os.path.getsize(model_path)
+    original_memory = _sklearn_tree_bytes(model)
+    for label, size, base in (
+        ('Original pickle (disk)', original_disk, original_disk),
+        ('Quantized export (disk)', _dir_bytes(compiled_dir), original_disk),
+        ('sklearn trees (memory)', original_memory, original_memory),
+        ('Float compiled (memory)', plain.nbytes(), original_memory),
+        ('Quantized (memory)', compact.nbytes(), original_memory),
+    ):
+        print(f"{label:<28}{size:>14,}{size / base:>12.1%}")
+
+    expected = model.predict_proba(X)
+    actual = compact.predict_proba(X)
+    agreement = float(np.mean(expected.argmax(axis=1) == actual.argmax(axis=1)))
+    max_diff = float(np.abs(expected - actual).max())
+    print(f"Agreement with the original on {len(X):,} rows: {agreement:.4%} "
+          f"({int(round((1 - agreement) * len(X)))} differ), "
+          f"max |proba difference| {max_diff:.3e}")
+
+    if q.get('grid_scale', 1) == 1:
+        print("Non-integer inputs: rejected (thresholds are not on the half-unit grid)")
+        return agreement, max_diff
+    numeric = [j for j, name in enumerate(feature_names)
+               if name not in label_encoders and X[:, j].max() > 1]
+    X_real = np.array(X, dtype=np.float64)
+    rng = np.random.default_rng(0)
+    X_real[:, numeric] += rng.integers(-2, 3, size=(len(X), len(numeric))) * 0.25
+    X_real[:, numeric] = np.maximum(X_real[:, numeric], 0)
+    expected = model.predict_proba(X_real)
+    actual = compact.predict_proba(X_real)
+    real_agreement = float(np.mean(expected.argmax(axis=1) == actual.argmax(axis=1)))
+    max_diff = max(max_diff, float(np.abs(expected - actual).max()))
+    print(f"Agreement with non-integer numeric inputs: {real_agreement:.4%} "
+          f"({int(round((1 - real_agreement) * len(X)))} differ)")
+    return min(agreement, real_agreement), max_diff
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or verify a compiled tree model")
+    parser.add_argument('command', choices=['export', 'verify'])
+    parser.add_argument('--model', default='skin_disease_model.pkl')
+    parser.add_argument('--label-encoders', default='label_encoders.pkl')
+    parser.add_argument('--disease-encoder', default='disease_encoder.pkl')
+    parser.add_argument('--feature-names', default='feature_names.pkl')
+    parser.add_argument('--out', '--compiled', dest='compiled', default='compiled_model')
+    parser.add_argument('--data', default='skin_disease_dataset.csv')
+    parser.add_argument('--atol', type=float, default=1e-9)
+    parser.add_argument('--quantize', action='store_true',
+                        help="Export the compact integer-grid format")
+    parser.add_argument('--value-dtype', choices=['float32', 'float16'], default='float32',
+                        help="Leaf value precision of the quantized format")
+    parser.add_argument('--min-agreement', type=float, default=1.0,
+                        help="Fraction of dataset labels a quantized export must reproduce")
+    args = parser.parse_args(argv)
+
+    model, label_encoders, disease_encoder, feature_names = _load_pickles(args)
+
+    if args.command == 'export':
+        meta = export_model(model, args.compiled, label_encoders, disease_encoder, feature_names,
+                            quantize=args.quantize, value_dtype=args.value_dtype)
+        print(f"Exported {meta['n_trees']} trees ({meta['n_nodes']} nodes, "
+              f"max depth {meta['max_depth']}) to '{args.compiled}'")
+        if not args.quantize:
+            return 0
+        X = _encoded_dataset(args.data, label_encoders, feature_names)
+        agreement, _ = report_compact(model, args.compiled, args.model, X,
+                                      label_encoders, disease_encoder, feature_names)
+        if agreement < args.min_agreement:
+            print(f"VERIFICATION FAILED: agreement below {args.min_agreement:.4%}")
+            return 1
+        return 0
+
+    compiled = CompiledForest.load(args.compiled)
+    X = _encoded_dataset(args.data, label_encoders, feature_names)
+    print(f"Verifying '{args.compiled}' against '{args.model}' on {len(X)} rows of {args.data}")
+
+    expected = model.predict_proba(X)
+    actual = compiled.predict_proba(X)
+    max_diff = float(np.abs(expected - actual).max())
+    same_labels = np.array_equal(model.predict(X), compiled.predict(X))
+    print(f"Max |proba difference|: {max_diff:.3e} (tolerance {args.atol:.0e})")
+    print(f"Predicted labels identical: {same_labels}")
+
+    sk_p50, sk_p99 = _single_row_latency(model.predict_proba, X)
+    np_p50, np_p99 = _single_row_latency(compiled.predict_proba, X)
+    print(f"Single-row latency sklearn:  p50 {sk_p50:.3f} ms  p99 {sk_p99:.3f} ms")
+    print(f"Single-row latency compiled: p50 {np_p50:.3f} ms  p99 {np_p99:.3f} ms")
+
+    if max_diff > args.atol or not same_labels:
+        print("VERIFICATION FAILED")
+        return 1
+    print("Compiled model matches the original.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
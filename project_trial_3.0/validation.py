@@ -0,0 +1,351 @@
+"""
+Request validation compiled from SkinDiseaseMLModel.get_feature_info().
+
+RequestValidator turns the feature info into per-feature checks once
+(allowed category sets, numeric ranges, 0/1 flags). A case is then checked
+in a single pass that collects every problem instead of stopping at the
+first, and batches are checked column by column with NumPy. Bad input is
+rejected before it reaches the model, with one entry per bad field:
+
+    {"field": "location", "code": "unseen_category", "value": "wrist",
+     "message": "'wrist' is not an allowed value for 'location'",
+     "allowed": ["arms", "back", ...]}
+
+Codes: missing_feature, unknown_feature, unseen_category, invalid_type,
+invalid_value, out_of_range, malformed_case.
+
+Numeric features accept numbers and numeric strings (HTML forms send
+strings). With a fallback policy, unseen categories of the listed features
+are replaced by a known category and reported as warnings instead of errors.
+"""
+import math
+import re
+
+import numpy as np
+
+# Used when get_feature_info() gives a range the pattern cannot parse
+_DEFAULT_RANGE = (-math.inf, math.inf)
+_RANGE_PATTERN = re.compile(r'^\s*(-?\d+(?:\.\d+)?)\s*-\s*(-?\d+(?:\.\d+)?)')
+
+
+class ValidationError(ValueError):
+    """
+    A request failed validation.
+
+    Attributes:
+        errors (list): Field error dicts (see the module docstring)
+        status (int): HTTP status to answer with
+    """
+
+    def __init__(self, errors, status=422):
+        self.errors = errors
+        self.status = status
+        super().__init__('; '.join(e['message'] for e in errors))
+
+    def to_dict(self):
+        return {'error': 'invalid_request', 'message': str(self), 'errors': self.errors}
+
+
+class RequestValidator:
+    """
+    Validates cases against the model's feature schema.
+
+    Args:
+        feature_info (dict): SkinDiseaseMLModel.get_feature_info() output
+        fallback (dict, optional): Feature -> known category used in place
+            of an unseen one (features not listed still reject unseen values)
+        allow_extra (bool): Ignore unknown keys instead of rejecting them
+
+    Raises:
+        ValueError: If a fallback category is not itself allowed
+    """
+
+    def __init__(self, feature_info, fallback=None, allow_extra=False):
+        self.feature_names = list(feature_info['required_features'])
+        self.allow_extra = allow_extra
+        self.fallback = dict(fallback or {})
+
+        self.categories = {
+            name: frozenset(classes)
+            for name, classes in feature_info['categorical_features'].items()
+        }
+        self._sorted_categories = {
+            name: np.asarray(sorted(classes), dtype=str)
+            for name, classes in feature_info['categorical_features'].items()
+        }
+        self._allowed = {
+            name: sorted(classes) for name, classes in feature_info['categorical_features'].items()
+        }
+        self.ranges = {
+            name: _parse_range(text) for name, text in feature_info['numerical_features'].items()
+        }
+        self.binary = frozenset(feature_info['binary_features'])
+        for name, value in self.fallback.items():
+            if value not in self.categories.get(name, ()):
+                raise ValueError(f"Fallback {value!r} is not an allowed value for '{name}'")
+
+        # (name, kind, parameter) in feature order: the single-pass plan
+        self._plan = []
+        for name in self.feature_names:
+            if name in self.categories:
+                self._plan.append((name, 'category', self.categories[name]))
+            elif name in self.binary:
+                self._plan.append((name, 'binary', None))
+            else:
+                self._plan.append((name, 'number', self.ranges.get(name, _DEFAULT_RANGE)))
+        self._known = frozenset(self.feature_names)
+
+    @classmethod
+    def from_model(cls, model, **kwargs):
+        """Compile a validator from a loaded SkinDiseaseMLModel."""
+        return cls(model.get_feature_info(), **kwargs)
+
+    # ------------------------------------------------------------------
+    # Single case
+    # ------------------------------------------------------------------
+
+    def validate(self, case):
+        """
+        Check one case.
+
+        Args:
+            case: Parsed JSON body
+
+        Returns:
+            tuple: (normalized case, errors, warnings). The normalized case
+            holds exactly the model features, numeric strings converted to
+            numbers and fallbacks applied; it is None when there are errors.
+        """
+        if not isinstance(case, dict):
+            return None, [_error(None, 'malformed_case', case,
+                                 "case must be an object of features")], []
+
+        errors, warnings = [], []
+        normalized = {}
+        for name, kind, parameter in self._plan:
+            if name not in case or case[name] is None:
+                errors.append(_error(name, 'missing_feature', None, f"'{name}' is required"))
+                continue
+            value = case[name]
+            if kind == 'category':
+                if isinstance(value, str) and value in parameter:
+                    normalized[name] = value
+                elif name in self.fallback:
+                    normalized[name] = self.fallback[name]
+                    warnings.append(_fallback_warning(name, value, self.fallback[name]))
+                else:
+                    errors.append(self._category_error(name, value))
+                continue
+
+            number = _as_number(value)
+            if number is None:
+                errors.append(_error(name, 'invalid_type', value,
+                                     f"'{name}' must be a number, got {value!r}"))
+            elif kind == 'binary':
+                if number not in (0, 1):
+                    errors.append(_error(name, 'invalid_value', value,
+                                         f"'{name}' must be 0 or 1, got {value!r}"))
+                else:
+                    normalized[name] = int(number)
+            else:
+                low, high = parameter
+                if not low <= number <= high:
+                    errors.append(_error(name, 'out_of_range', value,
+                                         f"'{name}' must be between {low:g} and {high:g}, "
+                                         f"got {value!r}", range=[low, high]))
+                else:
+                    normalized[name] = value if type(value) in (int, float) else number
+
+        if not self.allow_extra and not self._known.issuperset(case):
+            for key in case:
+                if key not in self._known:
+                    errors.append(_error(key, 'unknown_feature', case[key],
+                                         f"'{key}' is not a model feature"))
+        if errors:
+            return None, errors, warnings
+        return normalized, errors, warnings
+
+    def check(self, case):
+        """
+        Validate one case or raise.
+
+        Returns:
+            tuple: (normalized case, warnings)
+
+        Raises:
+            ValidationError: Listing every bad field
+        """
+        normalized, errors, warnings = self.validate(case)
+        if errors:
+            raise ValidationError(errors, status=400 if errors[0]['code'] == 'malformed_case' else 422)
+        return normalized, warnings
+
+    # ------------------------------------------------------------------
+    # Batches
+    # ------------------------------------------------------------------
+
+    def validate_batch(self, records):
+        """
+        Check a batch column by column.
+
+        Args:
+            records: List of feature dicts, or a columnar mapping of feature
+                name -> sequence of values
+
+        Returns:
+            tuple: (valid_idx, columns, errors, warnings) where columns is a
+            columnar mapping of the valid rows only (ready for
+            predict_batch), errors maps row index -> list of field errors and
+            warnings maps row index -> list of fallback warnings
+        """
+        columns, n_rows, errors, malformed = self._to_columns(records)
+        warnings = {}
+        out = {}
+        for name, kind, _ in self._plan:
+            values = columns[name]
+            raw = np.empty(n_rows, dtype=object)
+            raw[:] = values
+            missing = np.equal(raw, None)
+            for i in np.flatnonzero(missing & ~malformed):
+                errors.setdefault(i, []).append(
+                    _error(name, 'missing_feature', None, f"'{name}' is required"))
+
+            if kind == 'category':
+                classes = self._sorted_categories[name]
+                text = raw.astype(str)
+                codes = np.searchsorted(classes, text)
+                is_str = np.fromiter((isinstance(v, str) for v in values), bool, n_rows)
+                known = is_str & (classes[np.minimum(codes, len(classes) - 1)] == text)
+                bad = np.flatnonzero(~known & ~missing)
+                text = text.astype(object)  # a fixed-width str array would truncate fallbacks
+                if name in self.fallback:
+                    text[bad] = self.fallback[name]
+                    for i in bad:
+                        warnings.setdefault(i, []).append(
+                            _fallback_warning(name, values[i], self.fallback[name]))
+                else:
+                    for i in bad:
+                        errors.setdefault(i, []).append(self._category_error(name, values[i]))
+                out[name] = text
+                continue
+
+            numbers = _as_float_column(raw, missing)
+            not_number = np.isnan(numbers) & ~missing
+            for i in np.flatnonzero(not_number):
+                errors.setdefault(i, []).append(
+                    _error(name, 'invalid_type', values[i],
+                           f"'{name}' must be a number, got {values[i]!r}"))
+            checked = ~np.isnan(numbers)
+            if kind == 'binary':
+                bad = np.flatnonzero(checked & (numbers != 0) & (numbers != 1))
+                for i in bad:
+                    errors.setdefault(i, []).append(
+                        _error(name, 'invalid_value', values[i],
+                               f"'{name}' must be 0 or 1, got {values[i]!r}"))
+            else:
+                low, high = self.ranges.get(name, _DEFAULT_RANGE)
+                bad = np.flatnonzero(checked & ((numbers < low) | (numbers > high)))
+                for i in bad:
+                    errors.setdefault(i, []).append(
+                        _error(name, 'out_of_range', values[i],
+                               f"'{name}' must be between {low:g} and {high:g}, "
+                               f"got {values[i]!r}", range=[low, high]))
+            out[name] = numbers
+
+        valid = np.ones(n_rows, dtype=bool)
+        valid[list(errors)] = False
+        valid_idx = np.flatnonzero(valid)
+        columns = {name: values[valid_idx] for name, values in out.items()}
+        errors = {int(i): errs for i, errs in sorted(errors.items())}
+        warnings = {int(i): w for i, w in sorted(warnings.items()) if valid[i]}
+        return valid_idx, columns, errors, warnings
+
+    def _to_columns(self, records):
+        """Row or columnar input -> (columns, n_rows, {row: [errors]}, malformed row mask)."""
+        errors = {}
+        if hasattr(records, 'keys'):
+            missing = [f for f in self.feature_names if f not in records]
+            extra = [] if self.allow_extra else [k for k in records if k not in self._known]
+            if missing or extra:
+                raise ValidationError(
+                    [_error(f, 'missing_feature', None, f"column '{f}' is required")
+                     for f in missing] +
+                    [_error(k, 'unknown_feature', None, f"'{k}' is not a model feature")
+                     for k in extra])
+            columns = {f: list(records[f]) for f in self.feature_names}
+            lengths = {len(v) for v in columns.values()}
+            if len(lengths) > 1:
+                raise ValidationError([_error(None, 'malformed_case', None,
+                                              "all feature columns must have the same length")],
+                                      status=400)
+            n_rows = lengths.pop() if lengths else 0
+            return columns, n_rows, errors, np.zeros(n_rows, dtype=bool)
+
+        records = list(records)
+        n_rows = len(records)
+        columns = {f: [None] * n_rows for f in self.feature_names}
+        malformed = np.zeros(n_rows, dtype=bool)
+        for i, row in enumerate(records):
+            if not isinstance(row, dict):
+                errors[i] = [_error(None, 'malformed_case', row,
+                                    "case must be an object of features")]
+                malformed[i] = True
+                continue
+            for f in self.feature_names:
+                columns[f][i] = row.get(f)
+            extra = [] if self.allow_extra else [k for k in row if k not in self._known]
+            if extra:
+                errors[i] = [_error(k, 'unknown_feature', row[k], f"'{k}' is not a model feature")
+                             for k in extra]
+        return columns, n_rows, errors, malformed
+
+    def _category_error(self, name, value):
+        return _error(name, 'unseen_category', value,
+                      f"{value!r} is not an allowed value for '{name}'",
+                      allowed=self._allowed[name])
+
+
+def _error(field, code, value, message, **extra):
+    error = {'field': field, 'code': code, 'message': message}
+    if value is not None:
+        error['value'] = value if isinstance(value, (str, int, float, bool)) else repr(value)
+    error.update(extra)
+    return error
+
+
+def _fallback_warning(name, value, used):
+    return {'field': name, 'code': 'category_fallback', 'value': value, 'used': used,
+            'message': f"{value!r} is not a known '{name}'; used {used!r}"}
+
+
+def _parse_range(text):
+    if isinstance(text, (list, tuple)) and len(text) == 2:
+        return float(text[0]), float(text[1])
+    match = _RANGE_PATTERN.match(str(text))
+    return (float(match.group(1)), float(match.group(2))) if match else _DEFAULT_RANGE
+
+
+def _as_number(value):
+    """A finite float from a number or numeric string, else None."""
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        number = float(value)
+    elif isinstance(value, str):
+        try:
+            number = float(value)
+        except ValueError:
+            return None
+    else:
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _as_float_column(raw, missing):
+    """Column -> float64 with NaN for missing, non-numeric and non-finite values."""
+    try:
+        numbers = np.where(missing, np.nan, raw).astype(np.float64)
+    except (TypeError, ValueError):
+        numbers = np.array([_as_number(v) for v in raw], dtype=np.float64)  # None -> NaN
+    numbers[~np.isfinite(numbers)] = np.nan
+    return numbers